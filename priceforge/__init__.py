@@ -1,3 +1,23 @@
-from priceforge.api import Model, Engine, create_option, ModelKind, EngineKind
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["Model", "Engine", "create_option", "ModelKind", "EngineKind"]
+if TYPE_CHECKING:
+    from priceforge.api import (
+        Model,
+        Engine,
+        calibrate,
+        create_option,
+        ModelKind,
+        EngineKind,
+    )
+
+__all__ = ["Model", "Engine", "calibrate", "create_option", "ModelKind", "EngineKind"]
+
+
+def __getattr__(name: str) -> Any:
+    # the API, and with it scipy, is imported on first use, so that modules
+    # such as the surrogate engine load with numpy only
+    if name in __all__:
+        from priceforge import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module 'priceforge' has no attribute {name!r}")
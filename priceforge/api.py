@@ -1,22 +1,39 @@
 import datetime as dt
 from enum import Enum
-from typing import Optional, Union
+from typing import Optional, Sequence, Union
+
+import numpy as np
 
 from priceforge.models.contracts import Forward, Option, OptionKind, Spot
 from priceforge.pricing.engines.closed_form import ClosedFormEngine
 from priceforge.pricing.engines.fourier import FourierEngine
 from priceforge.pricing.engines.monte_carlo import MonteCarloEngine
+from priceforge.pricing.engines.surrogate import SurrogateEngine
+from priceforge.pricing.calibration import (
+    CalibrationParameters,
+    CalibrationResult,
+    MarketQuote,
+)
+from priceforge.pricing.calibration import calibrate as calibrate_model
 from priceforge.pricing.models.black_76 import Black76Model
 from priceforge.pricing.models.black_scholes import BlackScholesModel
 from priceforge.pricing.models.heston import HestonModel
+from priceforge.pricing.models.piecewise_heston import PiecewiseHestonModel
 from priceforge.pricing.models.trolle_schwartz import TrolleSchwartzModel
 from priceforge.utils import parse_enum
 
 
+def _parse_time(time: Union[str, dt.datetime]) -> dt.datetime:
+    if isinstance(time, str):
+        return dt.datetime.strptime(time, "%Y-%m-%d")
+    return time
+
+
 class ModelKind(Enum):
     BLACK_76 = "BLACK_76"
     BLACK_SCHOLES = "BLACK_SCHOLES"
     HESTON = "HESTON"
+    PIECEWISE_HESTON = "PIECEWISE_HESTON"
     TROLLE_SCHWARTZ = "TROLLE_SCHWARTZ"
 
 
@@ -24,6 +41,7 @@ _MODEL_MAP = {
     ModelKind.BLACK_76: Black76Model,
     ModelKind.BLACK_SCHOLES: BlackScholesModel,
     ModelKind.HESTON: HestonModel,
+    ModelKind.PIECEWISE_HESTON: PiecewiseHestonModel,
     ModelKind.TROLLE_SCHWARTZ: TrolleSchwartzModel,
 }
 
@@ -54,12 +72,14 @@ class EngineKind(Enum):
     CLOSED_FORM = "CLOSED_FORM"
     FOURIER = "FOURIER"
     MONTE_CARLO = "MONTE_CARLO"
+    SURROGATE = "SURROGATE"
 
 
 _ENGINE_MAP = {
     EngineKind.CLOSED_FORM: ClosedFormEngine,
     EngineKind.FOURIER: FourierEngine,
     EngineKind.MONTE_CARLO: MonteCarloEngine,
+    EngineKind.SURROGATE: SurrogateEngine,
 }
 
 
@@ -97,6 +117,158 @@ class Engine:
             valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
         return self._engine.price(model._model, contract, valuation_time)
 
+    def price_with_error_estimate(
+        self,
+        valuation_time: Union[str, dt.datetime],
+        contract: Option,
+        model: Model,
+    ) -> tuple[float, float]:
+        if isinstance(valuation_time, str):
+            valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
+        assert hasattr(
+            self._engine, "price_with_error_estimate"
+        ), f"Engine {self.engine_kind.value} doesn't provide error estimates."
+        return self._engine.price_with_error_estimate(
+            model._model, contract, valuation_time
+        )
+
+    def price_with_greeks(
+        self,
+        valuation_time: Union[str, dt.datetime],
+        contract: Option,
+        model: Model,
+    ) -> dict[str, float]:
+        if isinstance(valuation_time, str):
+            valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
+        assert hasattr(
+            self._engine, "price_with_greeks"
+        ), f"Engine {self.engine_kind.value} doesn't provide Greeks."
+        return self._engine.price_with_greeks(model._model, contract, valuation_time)
+
+    def price_many(
+        self,
+        valuation_time: Union[str, dt.datetime],
+        contracts: Sequence[Option],
+        model: Model,
+    ) -> np.ndarray:
+        if isinstance(valuation_time, str):
+            valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
+        if hasattr(self._engine, "price_many"):
+            return self._engine.price_many(model._model, contracts, valuation_time)
+        return np.array(
+            [
+                self._engine.price(model._model, contract, valuation_time)
+                for contract in contracts
+            ]
+        )
+
+    def price_surface(
+        self,
+        valuation_time: Union[str, dt.datetime],
+        expiries: Sequence[Union[str, dt.datetime]],
+        strikes: Sequence[float],
+        option_kinds: Union[str, OptionKind, Sequence[Union[str, OptionKind]]],
+        model: Model,
+        underlying_expiries: Optional[Sequence[Union[str, dt.datetime]]] = None,
+    ) -> np.ndarray:
+        if isinstance(valuation_time, str):
+            valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
+        assert hasattr(
+            self._engine, "price_surface"
+        ), f"Engine {self.engine_kind.value} doesn't price surfaces."
+
+        if isinstance(option_kinds, (str, OptionKind)):
+            option_kinds = parse_enum(option_kinds, OptionKind)
+        else:
+            option_kinds = [parse_enum(kind, OptionKind) for kind in option_kinds]
+        if underlying_expiries is not None:
+            underlying_expiries = [_parse_time(time) for time in underlying_expiries]
+
+        return self._engine.price_surface(
+            model._model,
+            [_parse_time(expiry) for expiry in expiries],
+            strikes,
+            option_kinds,
+            valuation_time,
+            underlying_expiries,
+        )
+
+    def price_strip(
+        self,
+        valuation_time: Union[str, dt.datetime],
+        contracts: Sequence[Option],
+        model: Model,
+        forwards: Optional[Sequence[float]] = None,
+    ) -> np.ndarray:
+        if isinstance(valuation_time, str):
+            valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
+        assert hasattr(
+            self._engine, "price_strip"
+        ), f"Engine {self.engine_kind.value} doesn't price strips."
+        return self._engine.price_strip(
+            model._model, contracts, valuation_time, forwards
+        )
+
+    def simulate_forward_curve(
+        self,
+        valuation_time: Union[str, dt.datetime],
+        underlying_expiries: Sequence[Union[str, dt.datetime]],
+        end_time: Union[str, dt.datetime],
+        model: Model,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        assert hasattr(
+            self._engine, "simulate_forward_curve"
+        ), f"Engine {self.engine_kind.value} doesn't simulate forward curves."
+
+        return self._engine.simulate_forward_curve(
+            model._model,
+            [_parse_time(expiry) for expiry in underlying_expiries],
+            _parse_time(end_time),
+            _parse_time(valuation_time),
+        )
+
+
+def calibrate(
+    model_kind: Union[str, ModelKind],
+    market_quotes: Sequence[Union[MarketQuote, tuple[Option, float]]],
+    valuation_time: Union[str, dt.datetime],
+    config: Optional[dict] = None,
+    warm_start: Optional[Model] = None,
+    engine: Optional[Engine] = None,
+    **kwargs,
+) -> tuple[Model, CalibrationResult]:
+    """
+    Calibrate a model to (option, price) quotes, starting from `warm_start`
+    (e.g. the previous calibration) or from a model built with `config`.
+    Keyword arguments configure the calibration (n_workers, parameter_bounds,
+    max_evaluations, tolerance).
+    """
+    if isinstance(valuation_time, str):
+        valuation_time = dt.datetime.strptime(valuation_time, "%Y-%m-%d")
+    model = warm_start if warm_start is not None else Model(model_kind, config)
+    assert model.model_kind == parse_enum(
+        model_kind, ModelKind
+    ), f"Warm start is a {model.model_kind.value} model."
+    quotes = [
+        (
+            quote
+            if isinstance(quote, MarketQuote)
+            else MarketQuote(option=quote[0], price=quote[1])
+        )
+        for quote in market_quotes
+    ]
+
+    result = calibrate_model(
+        model._model,
+        quotes,
+        valuation_time,
+        None if engine is None else engine._engine,
+        CalibrationParameters(**kwargs),
+    )
+    calibrated = Model(model.model_kind)
+    calibrated._model = type(model._model)(result.params)
+    return calibrated, result
+
 
 def create_option(
     expiry: Union[str, dt.datetime],
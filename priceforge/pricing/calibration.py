@@ -0,0 +1,559 @@
+import datetime as dt
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from scipy import special
+from scipy.optimize import least_squares
+
+from priceforge.models.contracts import Option
+from priceforge.pricing.engines.fourier import (
+    FourierEngine,
+    FourierParameters,
+    Quadrature,
+)
+from priceforge.pricing.models.heston import HestonModel
+from priceforge.pricing.models.protocol import PricingModel
+from priceforge.pricing.models.trolle_schwartz import TrolleSchwartzModel
+from priceforge.utils import LRUCache
+
+# relative step of the finite-difference Jacobian
+JACOBIAN_STEP = 1e-6
+
+# smallest distance to a bound of the starting point of Levenberg-Marquardt,
+# as a fraction of the width of the bounds
+LOGIT_MARGIN = 1e-6
+
+# calibrated parameters and their bounds, by model
+DEFAULT_PARAMETER_BOUNDS: dict[type, dict[str, tuple[float, float]]] = {
+    HestonModel: {
+        "volatility.value": (1e-3, 5.0),
+        "volatility.mean_reversion_rate": (1e-3, 20.0),
+        "volatility.long_term_mean": (1e-3, 5.0),
+        "volatility.volatility": (1e-3, 10.0),
+        "correlation.spot_vol": (-0.999, 0.999),
+    },
+    TrolleSchwartzModel: {
+        "spot.volatility": (1e-3, 5.0),
+        "volatility.value": (1e-3, 5.0),
+        "volatility.mean_reversion_rate": (1e-3, 20.0),
+        "volatility.long_term_mean": (1e-3, 5.0),
+        "volatility.volatility": (1e-3, 10.0),
+        "cost_of_carry.alpha": (1e-4, 5.0),
+        "cost_of_carry.gamma": (1e-3, 20.0),
+        "correlation.spot_vol": (-0.999, 0.999),
+        "correlation.spot_cost_of_carry": (-0.999, 0.999),
+        "correlation.vol_cost_of_carry": (-0.999, 0.999),
+    },
+}
+
+
+class MarketQuote(BaseModel):
+    option: Option
+    price: float
+    weight: float = 1.0
+
+
+class CalibrationParameters(BaseModel):
+    # calibrated "group.field" parameters and bounds, the model's defaults
+    # in DEFAULT_PARAMETER_BOUNDS when None
+    parameter_bounds: Optional[dict[str, tuple[float, float]]] = None
+    n_workers: int = 1  # processes evaluating the Jacobian columns
+    # evaluations of the residuals (least_squares' max_nfev), each pricing the
+    # whole quote set
+    max_evaluations: int = 100
+    tolerance: float = 1e-10  # on the relative change of the cost and of x
+    # Levenberg-Marquardt with the analytical Jacobian of the engine, when the
+    # model and the engine provide one
+    analytic_jacobian: bool = True
+
+
+class CalibrationIteration(BaseModel):
+    iteration: int
+    # half the sum of squared weighted price errors, at the start of the iteration
+    cost: float
+    n_evaluations: int  # pricings of the whole quote set in the iteration
+    wall_time: float  # in seconds
+
+
+class CalibrationResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    params: Any  # parameters of the calibrated model
+    cost: float
+    success: bool
+    message: str
+    n_evaluations: int
+    wall_time: float
+    iterations: list[CalibrationIteration]
+    # model prices of the quotes at the calibrated parameters, and their
+    # Jacobian with respect to the calibrated parameters (None if never
+    # computed)
+    prices: Any = None
+    price_jacobian: Any = None
+    restarted: bool = False  # set by Recalibrator when it ran a full restart
+
+
+def parameter_values(params: BaseModel, names: Sequence[str]) -> np.ndarray:
+    return np.array(
+        [getattr(getattr(params, group), field) for group, field in _split(names)]
+    )
+
+
+def with_parameter_values(
+    params: BaseModel, names: Sequence[str], values: np.ndarray
+) -> BaseModel:
+    """
+    Copy of `params` with the "group.field" parameters `names` set to `values`.
+    """
+    params = params.model_copy(deep=True)
+    for (group, field), value in zip(_split(names), values):
+        setattr(getattr(params, group), field, float(value))
+    return params
+
+
+def _split(names: Sequence[str]) -> list[tuple[str, str]]:
+    return [tuple(name.split(".")) for name in names]  # type: ignore[misc]
+
+
+def _to_logits(values: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    # values on the bounds are moved inside by LOGIT_MARGIN of the width
+    fraction = np.clip(
+        (values - lower) / (upper - lower), LOGIT_MARGIN, 1 - LOGIT_MARGIN
+    )
+    return np.log(fraction / (1 - fraction))
+
+
+def _from_logits(
+    logits: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    return lower + (upper - lower) * special.expit(logits)
+
+
+class QuoteSetPricer:
+    """
+    Prices every quote for a vector of calibrated parameter values, as one
+    strip when the engine supports it. Picklable, so that process pool
+    workers build their own copy once.
+    """
+
+    def __init__(
+        self,
+        model_class: type,
+        base_params: BaseModel,
+        names: Sequence[str],
+        engine: Any,
+        options: Sequence[Option],
+        valuation_time: dt.datetime,
+    ):
+        self.model_class = model_class
+        self.base_params = base_params
+        self.names = list(names)
+        self.engine = engine
+        self.options = list(options)
+        self.valuation_time = valuation_time
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        model = self.model_class(
+            with_parameter_values(self.base_params, self.names, values)
+        )
+        if hasattr(self.engine, "price_strip"):
+            return self.engine.price_strip(model, self.options, self.valuation_time)
+        return self.engine.price_many(model, self.options, self.valuation_time)
+
+    def has_analytic_jacobian(self) -> bool:
+        model = self.model_class(self.base_params)
+        return (
+            hasattr(self.engine, "supports_parameter_jacobian")
+            and self.engine.supports_parameter_jacobian(model)
+            and set(self.names) <= set(model.gradient_parameters)
+        )
+
+    def price_with_jacobian(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Prices of the quotes and their derivatives with respect to the
+        calibrated parameters, of shape (len(options), len(names)).
+        """
+        model = self.model_class(
+            with_parameter_values(self.base_params, self.names, values)
+        )
+        prices, jacobian = self.engine.price_many_with_jacobian(
+            model, self.options, self.valuation_time
+        )
+        columns = [model.gradient_parameters.index(name) for name in self.names]
+        return prices, jacobian[:, columns]
+
+
+_worker_pricer: Optional[QuoteSetPricer] = None
+
+
+def _initialize_worker(pricer: QuoteSetPricer) -> None:
+    global _worker_pricer
+    _worker_pricer = pricer
+
+
+def _price_in_worker(values: np.ndarray) -> np.ndarray:
+    assert _worker_pricer is not None
+    return _worker_pricer(values)
+
+
+def calibrate(
+    model: PricingModel,
+    market_quotes: Sequence[MarketQuote],
+    valuation_time: dt.datetime,
+    engine: Any = None,
+    params: CalibrationParameters = CalibrationParameters(),
+    initial_evaluation: Optional[tuple[np.ndarray, Optional[np.ndarray]]] = None,
+) -> CalibrationResult:
+    """
+    Fit the parameters of `model` to option prices with a least-squares
+    search.
+
+    The current parameters of `model` are the starting point, so passing the
+    model of a previous calibration warm-starts the search. When the model
+    has an analytical characteristic function gradient (Heston) and the
+    engine a fixed-node configuration, each evaluation returns the prices
+    together with their exact Jacobian (`price_many_with_jacobian`) and the
+    search is Levenberg-Marquardt (Cui et al., 2017) on the logits of the
+    parameters within their bounds. Otherwise it is a bounded trust-region search
+    where each evaluation prices all quotes in one batch (`price_strip` for
+    the Fourier engine), and the finite-difference Jacobian columns, one
+    evaluation each, are spread over `n_workers` processes.
+
+    Args:
+        model: Model to calibrate, holding the initial parameters
+        market_quotes: Options and their market prices
+        engine: Engine pricing the quotes, a Fourier engine with a
+            Gauss-Legendre quadrature when None
+        initial_evaluation: Prices of the quotes at the parameters of
+            `model`, and their Jacobian (or None), known from a previous
+            calibration, so the first iteration prices nothing
+
+    Returns:
+        CalibrationResult: Calibrated parameters, with the cost, evaluation
+            count and wall time of every iteration
+    """
+    if engine is None:
+        engine = FourierEngine(FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE))
+    bounds = params.parameter_bounds or DEFAULT_PARAMETER_BOUNDS[type(model)]
+    names = list(bounds)
+    lower, upper = np.array(list(bounds.values())).T
+
+    pricer = QuoteSetPricer(
+        type(model),
+        model.params,
+        names,
+        engine,
+        [quote.option for quote in market_quotes],
+        valuation_time,
+    )
+    market_prices = np.array([quote.price for quote in market_quotes])
+    weights = np.array([quote.weight for quote in market_quotes])
+
+    analytic = (
+        params.analytic_jacobian
+        and pricer.has_analytic_jacobian()
+        # Levenberg-Marquardt needs at least as many residuals as parameters
+        and len(market_quotes) >= len(names)
+    )
+    executor: Optional[Executor] = (
+        ProcessPoolExecutor(
+            max_workers=params.n_workers,
+            initializer=_initialize_worker,
+            initargs=(pricer,),
+        )
+        if params.n_workers > 1 and not analytic
+        else None
+    )
+
+    iterations: list[CalibrationIteration] = []
+    counters = {"evaluations": 0, "last_evaluations": 0}
+    start = last_iteration = time.perf_counter()
+    # prices and price Jacobian (None until computed) of recent points
+    evaluations = LRUCache(maxsize=4)
+    last_price_jacobian: Optional[np.ndarray] = None
+
+    initial_values = np.clip(parameter_values(model.params, names), lower, upper)
+    if analytic:
+        initial_values = _to_logits(initial_values, lower, upper)
+    if initial_evaluation is not None:
+        evaluations[initial_values.tobytes()] = initial_evaluation
+
+    def evaluate(values: np.ndarray) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        key = values.tobytes()
+        if key not in evaluations:
+            counters["evaluations"] += 1
+            if analytic:
+                # Levenberg-Marquardt is unbounded, it searches the logits
+                # of the parameters within their bounds
+                evaluations[key] = pricer.price_with_jacobian(
+                    _from_logits(values, lower, upper)
+                )
+            else:
+                evaluations[key] = (pricer(values), None)
+        return evaluations[key]
+
+    def residuals(values: np.ndarray) -> np.ndarray:
+        return weights * (evaluate(values)[0] - market_prices)
+
+    def record_iteration(base: np.ndarray) -> None:
+        nonlocal last_iteration
+        now = time.perf_counter()
+        iterations.append(
+            CalibrationIteration(
+                iteration=len(iterations) + 1,
+                cost=0.5 * float(base @ base),
+                n_evaluations=counters["evaluations"] - counters["last_evaluations"],
+                wall_time=now - last_iteration,
+            )
+        )
+        counters["last_evaluations"] = counters["evaluations"]
+        last_iteration = now
+
+    def analytic_jacobian(values: np.ndarray) -> np.ndarray:
+        record_iteration(residuals(values))
+        _, price_jacobian = evaluate(values)
+        bounded = _from_logits(values, lower, upper)
+        return (weights[:, None] * price_jacobian) * (
+            (bounded - lower) * (upper - bounded) / (upper - lower)
+        )
+
+    def jacobian(values: np.ndarray) -> np.ndarray:
+        base = residuals(values)
+        prices, price_jacobian = evaluate(values)
+        if price_jacobian is None:
+            # forward steps, backwards at the upper bound
+            steps = JACOBIAN_STEP * np.maximum(1.0, np.abs(values))
+            steps = np.where(values + steps > upper, -steps, steps)
+            bumped = [
+                values + step * unit for step, unit in zip(steps, np.eye(len(values)))
+            ]
+            if executor is None:
+                bumped_prices = [pricer(x) for x in bumped]
+            else:
+                bumped_prices = list(executor.map(_price_in_worker, bumped))
+            counters["evaluations"] += len(bumped)
+            price_jacobian = np.column_stack(
+                [(bumped - prices) / step for bumped, step in zip(bumped_prices, steps)]
+            )
+            evaluations[values.tobytes()] = (prices, price_jacobian)
+        nonlocal last_price_jacobian
+        last_price_jacobian = price_jacobian
+        record_iteration(base)
+        return weights[:, None] * price_jacobian
+
+    try:
+        solution = least_squares(
+            residuals,
+            initial_values,
+            jac=analytic_jacobian if analytic else jacobian,
+            bounds=(-np.inf, np.inf) if analytic else (lower, upper),
+            method="lm" if analytic else "trf",
+            x_scale="jac",
+            ftol=params.tolerance,
+            xtol=params.tolerance,
+            gtol=params.tolerance,
+            max_nfev=params.max_evaluations,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    prices, price_jacobian = evaluate(solution.x)
+    if price_jacobian is None:
+        # the Jacobian of the last iteration, next to the solution
+        price_jacobian = last_price_jacobian
+
+    return CalibrationResult(
+        params=with_parameter_values(
+            model.params,
+            names,
+            _from_logits(solution.x, lower, upper) if analytic else solution.x,
+        ),
+        cost=float(solution.cost),
+        success=bool(solution.success),
+        message=str(solution.message),
+        n_evaluations=counters["evaluations"],
+        wall_time=time.perf_counter() - start,
+        iterations=iterations,
+        prices=prices,
+        price_jacobian=price_jacobian,
+    )
+
+
+class RecalibrationParameters(BaseModel):
+    calibration: CalibrationParameters = CalibrationParameters()
+    # evaluations allowed to a warm-started refinement
+    refinement_evaluations: int = 10
+    # deltas changing a larger fraction of the quotes restart from scratch
+    max_changed_fraction: float = 0.5
+    # refinements that do not converge within their evaluations, or whose
+    # root mean squared weighted price error exceeds restart_rmse, restart
+    # from scratch
+    restart_rmse: Optional[float] = None
+
+
+class Recalibrator:
+    """
+    Keeps a calibration up to date as quotes change during the day.
+
+    The model prices of every quote at the calibrated parameters and their
+    Jacobian are kept, along with the engine (and so its quadrature nodes
+    and the model's cached characteristic function terms). An update
+    replaces the changed quotes and refines the previous parameters with a
+    few warm-started iterations, the first of which reuses the kept prices
+    and Jacobian, so a small delta costs a handful of pricings instead of a
+    full calibration. Large deltas and refinements that stall restart from
+    the initial model.
+    """
+
+    def __init__(
+        self,
+        model: PricingModel,
+        market_quotes: Sequence[MarketQuote],
+        valuation_time: dt.datetime,
+        engine: Any = None,
+        params: RecalibrationParameters = RecalibrationParameters(),
+    ):
+        if engine is None:
+            engine = FourierEngine(
+                FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE)
+            )
+        self.initial_model = model
+        self.engine = engine
+        self.params = params
+        self.valuation_time = valuation_time
+        self.quotes = {self._key(quote.option): quote for quote in market_quotes}
+        self.result = self._calibrate(model, restarted=False)
+
+    @property
+    def model(self) -> PricingModel:
+        return type(self.initial_model)(self.result.params)
+
+    def update(
+        self,
+        changed_quotes: Sequence[MarketQuote] = (),
+        removed_options: Sequence[Option] = (),
+        valuation_time: Optional[dt.datetime] = None,
+    ) -> CalibrationResult:
+        """
+        Apply a delta of quotes (new options or new prices of known ones)
+        and recalibrate from the previous parameters.
+
+        Returns:
+            CalibrationResult: The new calibration, with `restarted` set if
+                it had to start from scratch
+        """
+        n_changed = len(changed_quotes) + len(removed_options)
+        for option in removed_options:
+            self.quotes.pop(self._key(option), None)
+            self._model_prices.pop(self._key(option), None)
+        for quote in changed_quotes:
+            self.quotes[self._key(quote.option)] = quote
+        moved = valuation_time is not None and valuation_time != self.valuation_time
+        if valuation_time is not None:
+            self.valuation_time = valuation_time
+
+        if n_changed > self.params.max_changed_fraction * len(self.quotes):
+            self.result = self._calibrate(self.initial_model, restarted=True)
+            return self.result
+
+        refined = self._calibrate(
+            self.model,
+            restarted=False,
+            max_evaluations=self.params.refinement_evaluations,
+            initial_evaluation=None if moved else self._initial_evaluation(),
+        )
+        rmse = np.sqrt(2 * refined.cost / len(self.quotes))
+        if refined.success and (
+            self.params.restart_rmse is None or rmse <= self.params.restart_rmse
+        ):
+            self.result = refined
+            return self.result
+
+        restarted = self._calibrate(self.initial_model, restarted=True)
+        if restarted.cost < refined.cost:
+            self.result = restarted
+        else:
+            # keep the prices and Jacobian of the better refinement
+            refined.restarted = True
+            self.result = refined
+            self._keep_evaluation(refined)
+        return self.result
+
+    def _calibrate(
+        self,
+        model: PricingModel,
+        restarted: bool,
+        max_evaluations: Optional[int] = None,
+        initial_evaluation: Optional[tuple] = None,
+    ) -> CalibrationResult:
+        params = self.params.calibration
+        if max_evaluations is not None:
+            params = params.model_copy(update={"max_evaluations": max_evaluations})
+        result = calibrate(
+            model,
+            list(self.quotes.values()),
+            self.valuation_time,
+            self.engine,
+            params,
+            initial_evaluation,
+        )
+        result.restarted = restarted
+        self._keep_evaluation(result)
+        return result
+
+    def _keep_evaluation(self, result: CalibrationResult) -> None:
+        self._model_prices = {
+            key: (
+                result.prices[i],
+                None if result.price_jacobian is None else result.price_jacobian[i],
+            )
+            for i, key in enumerate(self.quotes)
+        }
+
+    def _initial_evaluation(
+        self,
+    ) -> Optional[tuple[np.ndarray, Optional[np.ndarray]]]:
+        """
+        Kept prices and Jacobian of the current quotes, in their order, with
+        the quotes on new options priced at the current parameters. None
+        when new quotes would need a finite-difference Jacobian.
+        """
+        new_keys = [key for key in self.quotes if key not in self._model_prices]
+        if new_keys:
+            bounds = (
+                self.params.calibration.parameter_bounds
+                or DEFAULT_PARAMETER_BOUNDS[type(self.initial_model)]
+            )
+            pricer = QuoteSetPricer(
+                type(self.initial_model),
+                self.result.params,
+                list(bounds),
+                self.engine,
+                [self.quotes[key].option for key in new_keys],
+                self.valuation_time,
+            )
+            if not pricer.has_analytic_jacobian():
+                return None
+            prices, price_jacobian = pricer.price_with_jacobian(
+                parameter_values(self.result.params, list(bounds))
+            )
+            self._model_prices.update(
+                (key, (price, row))
+                for key, price, row in zip(new_keys, prices, price_jacobian)
+            )
+
+        kept = [self._model_prices[key] for key in self.quotes]
+        if any(row is None for _, row in kept):
+            return (np.array([price for price, _ in kept]), None)
+        return (
+            np.array([price for price, _ in kept]),
+            np.array([row for _, row in kept]),
+        )
+
+    @staticmethod
+    def _key(option: Option) -> str:
+        return option.model_dump_json()
@@ -1,24 +1,251 @@
 from enum import Enum
+from functools import lru_cache
 import datetime as dt
+from typing import Optional, Sequence, Union
 import numpy as np
 from pydantic import BaseModel
-from scipy import integrate
+from scipy import integrate, special
+from scipy.interpolate import CubicSpline
 
-from priceforge.models.contracts import Forward, Option
-from priceforge.pricing.models.protocol import PricingModel
+from priceforge.models.contracts import Forward, Option, OptionKind
+from priceforge.pricing.models.black_76 import Black76Model, Black76Parameters
+from priceforge.pricing.models.parameters import ForwardParameters, RateParameters
+from priceforge.pricing.models.protocol import AffineModel, PricingModel
+from priceforge.utils import LRUCache
 
 SECONDS_IN_A_YEAR = 365 * 24 * 60 * 60
 
+# sensitivities returned by FourierEngine.price_many_with_greeks
+GREEKS = ("price", "delta", "gamma", "vega")
+
+# search range and golden-section iterations of the optimal dampening factor
+MIN_DAMPENING_FACTOR = 0.01
+MAX_DAMPENING_FACTOR = 20.0
+DAMPENING_SEARCH_ITERATIONS = 30
+
+# smallest CARR_MADAN_FRFT log-strike spacing, for slices of a single strike
+MIN_FRFT_LOG_STRIKE_SPACING = 1e-4
+
+# log-spaced candidates of the automatic integral truncation
+TRUNCATION_CANDIDATES = np.geomspace(1.0, 10_000.0, 97)
+
 
 class FourierMethod(Enum):
     CARR_MADAN = "CARR_MADAN"
+    CARR_MADAN_FFT = "CARR_MADAN_FFT"
+    CARR_MADAN_FRFT = "CARR_MADAN_FRFT"
+    COS = "COS"
     HESTON_ORIGINAL = "HESTON_ORIGINAL"
+    LEWIS = "LEWIS"
+
+
+class Quadrature(Enum):
+    ADAPTIVE = "ADAPTIVE"
+    GAUSS_LEGENDRE = "GAUSS_LEGENDRE"  # on [0, integral_truncation]
+    GAUSS_LAGUERRE = "GAUSS_LAGUERRE"  # on [0, inf)
 
 
 class FourierParameters(BaseModel):
     method: FourierMethod = FourierMethod.CARR_MADAN
     integral_truncation: int = 100
-    dampening_factor: float = 0.75  # for CARR_MADAN
+    automatic_truncation: bool = False  # for the integral methods
+    truncation_tolerance: float = 1e-10  # for automatic_truncation, on |phi(u)|
+    dampening_factor: float = 0.75  # for CARR_MADAN and CARR_MADAN_FFT
+    optimal_dampening: bool = False  # for CARR_MADAN and CARR_MADAN_FFT
+    control_variate: bool = False  # for CARR_MADAN, CARR_MADAN_FFT and LEWIS
+    fft_grid_size: int = 4096  # for CARR_MADAN_FFT
+    fft_grid_spacing: float = 0.1  # for CARR_MADAN_FFT
+    # for CARR_MADAN_FRFT, on a range balancing aliasing and truncation
+    frft_grid_size: int = 512
+    # for CARR_MADAN_FRFT, spans the strikes of each expiry when None
+    frft_log_strike_spacing: Optional[float] = None
+    quadrature: Quadrature = Quadrature.ADAPTIVE  # for the integral methods
+    quadrature_nodes: int = 128  # for GAUSS_LEGENDRE and GAUSS_LAGUERRE
+    cos_terms: int = 256  # for COS
+    cos_truncation_width: float = 12.0  # for COS, in cumulant standard deviations
+
+
+@lru_cache(maxsize=32)
+def quadrature_rule(
+    quadrature: Quadrature, n_nodes: int, truncation: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Nodes and weights of a fixed-node rule for integrals over [0, truncation]
+    (GAUSS_LEGENDRE) or [0, inf) (GAUSS_LAGUERRE, truncation is ignored).
+
+    Tables are built once per configuration and returned read-only.
+    """
+    match quadrature:
+        case Quadrature.GAUSS_LEGENDRE:
+            nodes, weights = special.roots_legendre(n_nodes)
+            nodes = truncation * (nodes + 1) / 2
+            weights = truncation * weights / 2
+        case Quadrature.GAUSS_LAGUERRE:
+            nodes, weights = special.roots_laguerre(n_nodes)
+            # absorb the exp(-u) weight function so that sum(w * f(u))
+            # approximates the plain integral of f
+            with np.errstate(divide="ignore"):
+                weights = np.exp(np.log(weights) + nodes)
+        case _:
+            raise ValueError(f"{quadrature} is not a fixed-node quadrature.")
+
+    nodes.setflags(write=False)
+    weights.setflags(write=False)
+    return nodes, weights
+
+
+def fractional_fft(values: np.ndarray, fraction: float) -> np.ndarray:
+    """
+    Fractional FFT sum_j x_j exp(-2 pi i * fraction * j * m), m = 0..N-1.
+
+    Computed with Bluestein's chirp-z algorithm (Chourdakis, 2005) as a
+    circular convolution of length 2N, i.e. three FFTs; `fraction` = 1/N
+    recovers the ordinary FFT.
+    """
+    n = len(values)
+    j = np.arange(n)
+    chirp = np.exp(-1j * np.pi * fraction * j**2)
+
+    y = np.concatenate([values * chirp, np.zeros(n)])
+    z = np.concatenate([1 / chirp, np.exp(1j * np.pi * fraction * (n - j) ** 2)])
+
+    return chirp * np.fft.ifft(np.fft.fft(y) * np.fft.fft(z))[:n]
+
+
+class CharacteristicFunctionTransform(PricingModel):
+    """
+    View of `model` with a transformed characteristic function, priced in
+    place of the model by the linear Fourier methods. Discounting, forward
+    and cumulants are those of `model`.
+    """
+
+    def __init__(self, model: PricingModel) -> None:
+        self.model = model
+
+    @property
+    def params(self):
+        return self.model.params
+
+    def zero_coupon_bond(self, time_to_expiry) -> float:
+        return self.model.zero_coupon_bond(time_to_expiry)
+
+    def forward(self, time_to_expiry) -> float:
+        return self.model.forward(time_to_expiry)
+
+    def cumulants(
+        self,
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[float, float, float]:
+        return self.model.cumulants(time_to_option_expiry, time_to_underlying_expiry)
+
+
+class ControlVariateResidual(CharacteristicFunctionTransform):
+    """
+    Model whose characteristic function is the one of `model` minus the one of
+    a Black-76 `control` with the same forward and discounting.
+
+    Prices computed from it by a linear transform are the price differences
+    between the two models.
+    """
+
+    def __init__(self, model: PricingModel, control: Black76Model) -> None:
+        super().__init__(model)
+        self.control = control
+
+    def characteristic_function(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> Union[complex, np.ndarray]:
+        return self.model.characteristic_function(
+            u, time_to_option_expiry, time_to_underlying_expiry
+        ) - self.control.characteristic_function(
+            u, time_to_option_expiry, time_to_underlying_expiry
+        )
+
+
+class GreekIntegrand(CharacteristicFunctionTransform):
+    """
+    Characteristic function of an affine model times the factor that turns
+    its prices into one of GREEKS:
+
+        delta: i u / X,  gamma: i u (i u - 1) / X^2,  vega: 2 sqrt(v0) D(u)
+
+    with X the underlying value and v0 the initial variance. Integrands of
+    the same slice share `memo`, which keeps the affine terms of the last
+    grid, so all Greeks come from a single evaluation.
+    """
+
+    def __init__(self, model: AffineModel, greek: str, memo: dict) -> None:
+        super().__init__(model)
+        self.greek = greek
+        self.memo = memo
+
+    def characteristic_function(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> Union[complex, np.ndarray]:
+        u = np.asarray(u, dtype=complex)
+        underlying_value = self.model.underlying_value()
+        initial_variance = self.model.initial_variance()
+
+        key = (u.shape, u.tobytes(), time_to_option_expiry, time_to_underlying_expiry)
+        if self.memo.get("key") != key:
+            upper_c, upper_d = self.model.affine_terms(
+                u, time_to_option_expiry, time_to_underlying_expiry
+            )
+            cf = np.exp(
+                upper_c + upper_d * initial_variance + 1j * u * np.log(underlying_value)
+            )
+            self.memo.update(key=key, cf=cf, upper_d=upper_d)
+
+        match self.greek:
+            case "price":
+                factor = 1.0
+            case "delta":
+                factor = 1j * u / underlying_value
+            case "gamma":
+                factor = 1j * u * (1j * u - 1) / underlying_value**2
+            case "vega":
+                factor = 2 * np.sqrt(initial_variance) * self.memo["upper_d"]
+        return (factor * self.memo["cf"])[()]
+
+
+class ParameterGradientIntegrand(CharacteristicFunctionTransform):
+    """
+    Derivative of the characteristic function of `model` with respect to
+    its `index`-th gradient parameter, or the characteristic function itself
+    when `index` is None. Integrands of the same slice share `memo`, which
+    keeps the gradient of the last grid, so the prices and all the columns of
+    the Jacobian come from a single evaluation on the same nodes.
+    """
+
+    def __init__(self, model: PricingModel, index: Optional[int], memo: dict) -> None:
+        super().__init__(model)
+        self.index = index
+        self.memo = memo
+
+    def characteristic_function(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> Union[complex, np.ndarray]:
+        u = np.asarray(u, dtype=complex)
+        key = (u.shape, u.tobytes(), time_to_option_expiry, time_to_underlying_expiry)
+        if self.memo.get("key") != key:
+            cf, gradient = self.model.characteristic_function_gradient(
+                u, time_to_option_expiry, time_to_underlying_expiry
+            )
+            self.memo.update(key=key, cf=cf, gradient=gradient)
+
+        if self.index is None:
+            return self.memo["cf"]
+        return self.memo["gradient"][self.index][()]
 
 
 class FourierEngine:
@@ -29,6 +256,8 @@ class FourierEngine:
         params: FourierParameters,
     ):
         self.params = params
+        self._dampening_cache = LRUCache(maxsize=4096)
+        self._truncation_cache = LRUCache(maxsize=1024)
 
     def price(
         self, model: PricingModel, option: Option, initial_time: dt.datetime
@@ -42,30 +271,704 @@ class FourierEngine:
         Returns:
             float: Option price
         """
+        if self._prices_by_slice():
+            return float(self.price_many(model, [option], initial_time)[0])
+
+        tau, time_to_underlying_expiry = self._times_to_expiry(option, initial_time)
+        price, _ = self._adaptive_price(
+            model, tau, time_to_underlying_expiry, option.strike, option.option_kind
+        )
+        return price
+
+    def price_with_error_estimate(
+        self, model: PricingModel, option: Option, initial_time: dt.datetime
+    ) -> tuple[float, float]:
+        """
+        Price an option together with an estimate of its absolute error.
+
+        With adaptive quadrature the estimate is the error reported by
+        `quad` plus an estimate of the integral beyond the truncation. Grid
+        based methods estimate it as the change in price when the resolution
+        (`quadrature_nodes`, `fft_grid_size`, `frft_grid_size` or `cos_terms`)
+        is halved.
+
+        Returns:
+            tuple[float, float]: Option price and its error estimate
+        """
+        if self._prices_by_slice():
+            price = self.price(model, option, initial_time)
+            coarse_params = self.params.model_copy(
+                update={
+                    "quadrature_nodes": self.params.quadrature_nodes // 2,
+                    "fft_grid_size": self.params.fft_grid_size // 2,
+                    "frft_grid_size": self.params.frft_grid_size // 2,
+                    "cos_terms": self.params.cos_terms // 2,
+                }
+            )
+            coarse_price = FourierEngine(coarse_params).price(
+                model, option, initial_time
+            )
+            return price, abs(price - coarse_price)
+
+        tau, time_to_underlying_expiry = self._times_to_expiry(option, initial_time)
+        return self._adaptive_price(
+            model, tau, time_to_underlying_expiry, option.strike, option.option_kind
+        )
+
+    def price_many(
+        self, model: PricingModel, options: Sequence[Option], initial_time: dt.datetime
+    ) -> np.ndarray:
+        """
+        Price several options at once.
+
+        Options sharing the same expiry and underlying are priced together, so
+        grid based methods (CARR_MADAN_FFT, CARR_MADAN_FRFT, COS or any method
+        with a fixed-node quadrature) evaluate the characteristic function once per expiry
+        rather than once per strike.
+
+        Args:
+            model: Model implementing the characteristic function
+            options: Options to price
+
+        Returns:
+            np.ndarray: Option prices, in the same order as `options`
+        """
+        if not self._prices_by_slice():
+            return np.array(
+                [self.price(model, option, initial_time) for option in options]
+            )
+
+        prices = np.empty(len(options))
+        slices = self._group_by_slice(options, initial_time)
+        for (tau, time_to_underlying_expiry), indices in slices.items():
+            strikes = np.array([options[i].strike for i in indices])
+            is_call = np.array(
+                [options[i].option_kind == OptionKind.CALL for i in indices]
+            )
+            prices[indices] = self._price_slice(
+                model, tau, time_to_underlying_expiry, strikes, is_call
+            )
+        return prices
+
+    def price_with_greeks(
+        self, model: AffineModel, option: Option, initial_time: dt.datetime
+    ) -> dict[str, float]:
+        """
+        Price an option together with its delta, gamma and vega.
+
+        See `price_many_with_greeks`.
+        """
+        greeks = self.price_many_with_greeks(model, [option], initial_time)
+        return {greek: float(values[0]) for greek, values in greeks.items()}
+
+    def price_many_with_greeks(
+        self, model: AffineModel, options: Sequence[Option], initial_time: dt.datetime
+    ) -> dict[str, np.ndarray]:
+        """
+        Prices and Greeks of several options from one characteristic function
+        evaluation per expiry.
+
+        Delta and gamma are taken with respect to the underlying value of the
+        model (spot or forward), vega with respect to the initial volatility
+        sqrt(v0). Each is the transform of the characteristic function times
+        an analytic factor, so it is the exact derivative of the discretized
+        price. Requires a grid based configuration (CARR_MADAN_FFT,
+        CARR_MADAN_FRFT, COS, or CARR_MADAN and LEWIS with a fixed-node
+        quadrature) without control variate.
+
+        Returns:
+            dict[str, np.ndarray]: Values of each of GREEKS, in the same order
+                as `options`
+        """
+        if (
+            not self._prices_by_slice()
+            or self.params.method == FourierMethod.HESTON_ORIGINAL
+            or self.params.control_variate
+        ):
+            raise ValueError(
+                "Greeks need a grid based method other than HESTON_ORIGINAL "
+                "and no control variate."
+            )
+
+        results = {greek: np.empty(len(options)) for greek in GREEKS}
+        slices = self._group_by_slice(options, initial_time)
+        for (tau, time_to_underlying_expiry), indices in slices.items():
+            strikes = np.array([options[i].strike for i in indices])
+            is_put = np.array(
+                [options[i].option_kind == OptionKind.PUT for i in indices]
+            )
+
+            memo: dict = {}
+            for greek in GREEKS:
+                results[greek][indices] = self._price_slice(
+                    GreekIntegrand(model, greek, memo),
+                    tau,
+                    time_to_underlying_expiry,
+                    strikes,
+                    np.full(len(strikes), True),
+                )
+
+            zero_coupon_bond = model.zero_coupon_bond(tau)
+            forward = model.forward(tau)
+            forward_delta = forward / model.underlying_value()
+            if self.params.method == FourierMethod.LEWIS:
+                # the constant discounted forward of the formula was priced
+                # alongside every Greek, replace it by its derivative
+                results["delta"][indices] += zero_coupon_bond * (
+                    forward_delta - forward
+                )
+                results["gamma"][indices] -= zero_coupon_bond * forward
+                results["vega"][indices] -= zero_coupon_bond * forward
+
+            put_indices = np.array(indices)[is_put]
+            results["price"][put_indices] -= zero_coupon_bond * (
+                forward - strikes[is_put]
+            )
+            results["delta"][put_indices] -= zero_coupon_bond * forward_delta
+
+        return results
+
+    def price_many_with_jacobian(
+        self, model: PricingModel, options: Sequence[Option], initial_time: dt.datetime
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Prices of several options and their derivatives with respect to the
+        `gradient_parameters` of a model providing an analytical
+        `characteristic_function_gradient` (e.g. Heston).
+
+        The derivative of a price is the same transform applied to the
+        derivative of the characteristic function, evaluated on the nodes of
+        the price, so the Jacobian is exact for the discretized prices. The
+        forward and the discount factor do not depend on the gradient
+        parameters, so puts share the derivatives of calls. Requires the same
+        configurations as `price_many_with_greeks`.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Prices, in the same order as
+                `options`, and the Jacobian of shape
+                (len(options), len(model.gradient_parameters))
+        """
+        if not self.supports_parameter_jacobian(model):
+            raise ValueError(
+                "Jacobians need a model with an analytical gradient, a grid based "
+                "method other than HESTON_ORIGINAL and no control variate."
+            )
+
+        prices = np.empty(len(options))
+        jacobian = np.empty((len(options), len(model.gradient_parameters)))
+        slices = self._group_by_slice(options, initial_time)
+        for (tau, time_to_underlying_expiry), indices in slices.items():
+            strikes = np.array([options[i].strike for i in indices])
+            is_call = np.array(
+                [options[i].option_kind == OptionKind.CALL for i in indices]
+            )
+            # COS prices puts from their own payoff, the other methods by
+            # parity, which adds a term independent of the parameters
+            column_is_call = (
+                is_call
+                if self.params.method == FourierMethod.COS
+                else np.full(len(strikes), True)
+            )
+
+            memo: dict = {}
+            prices[indices] = self._price_slice(
+                ParameterGradientIntegrand(model, None, memo),
+                tau,
+                time_to_underlying_expiry,
+                strikes,
+                is_call,
+            )
+            for j in range(jacobian.shape[1]):
+                jacobian[indices, j] = self._price_slice(
+                    ParameterGradientIntegrand(model, j, memo),
+                    tau,
+                    time_to_underlying_expiry,
+                    strikes,
+                    column_is_call,
+                )
+            if self.params.method == FourierMethod.LEWIS:
+                # the constant discounted forward of the formula was priced
+                # alongside every derivative
+                jacobian[indices] -= model.zero_coupon_bond(tau) * model.forward(tau)
+
+        return prices, jacobian
+
+    def supports_parameter_jacobian(self, model: PricingModel) -> bool:
+        """
+        Whether `price_many_with_jacobian` applies to `model` with this
+        configuration.
+        """
+        return (
+            hasattr(model, "characteristic_function_gradient")
+            and self._prices_by_slice()
+            and self.params.method != FourierMethod.HESTON_ORIGINAL
+            and not self.params.control_variate
+        )
+
+    def price_surface(
+        self,
+        model: PricingModel,
+        expiries: Sequence[dt.datetime],
+        strikes: Sequence[float],
+        option_kinds: Union[OptionKind, Sequence[OptionKind]],
+        initial_time: dt.datetime,
+        underlying_expiries: Optional[Sequence[dt.datetime]] = None,
+    ) -> np.ndarray:
+        """
+        Price every (expiry, strike) pair of a surface.
+
+        With a fixed-node quadrature (CARR_MADAN, HESTON_ORIGINAL or LEWIS)
+        and a model whose characteristic function broadcasts over expiries
+        (e.g. analytical Heston), the characteristic function is evaluated
+        once on an (expiry, node) grid and all prices follow from one matrix
+        product. Otherwise each expiry is priced as a slice.
+
+        Args:
+            model: Model implementing the characteristic function
+            expiries: Option expiries, one row of the surface each
+            strikes: Strikes, one column of the surface each
+            option_kinds: A single kind, or one kind per strike
+            underlying_expiries: Expiries of the Forward underlying of each
+                row, None for a Spot underlying
+
+        Returns:
+            np.ndarray: Option prices, of shape (len(expiries), len(strikes))
+        """
+        strikes = np.asarray(strikes, dtype=float)
+        is_call = np.broadcast_to(
+            np.asarray(option_kinds) == OptionKind.CALL, strikes.shape
+        )
+        times = [
+            (
+                self._year_fraction(expiry, initial_time),
+                (
+                    None
+                    if underlying_expiries is None
+                    else self._year_fraction(underlying_expiries[i], initial_time)
+                ),
+            )
+            for i, expiry in enumerate(expiries)
+        ]
+
+        if self._broadcasts_expiries(model):
+            taus = np.array([tau for tau, _ in times])[:, None]
+            time_to_underlying_expiry = (
+                None
+                if underlying_expiries is None
+                else np.array([time for _, time in times])[:, None]
+            )
+            call_prices = self._broadcast_call_prices(
+                model, taus, time_to_underlying_expiry, strikes
+            )
+            put_prices = call_prices - model.zero_coupon_bond(taus) * (
+                model.forward(taus) - strikes
+            )
+            return np.where(is_call, call_prices, put_prices)
+
+        prices = np.empty((len(times), len(strikes)))
+        for i, (tau, time_to_underlying_expiry) in enumerate(times):
+            if self._prices_by_slice():
+                prices[i] = self._price_slice(
+                    model, tau, time_to_underlying_expiry, strikes, is_call
+                )
+            else:
+                prices[i] = [
+                    self._adaptive_price(
+                        model,
+                        tau,
+                        time_to_underlying_expiry,
+                        strike,
+                        OptionKind.CALL if call else OptionKind.PUT,
+                    )[0]
+                    for strike, call in zip(strikes, is_call)
+                ]
+        return prices
+
+    def price_strip(
+        self,
+        model: PricingModel,
+        options: Sequence[Option],
+        initial_time: dt.datetime,
+        forwards: Optional[Sequence[float]] = None,
+    ) -> np.ndarray:
+        """
+        Price a strip of options on different expiries or futures contracts,
+        e.g. the monthly contracts of a commodity curve.
+
+        With a fixed-node quadrature (CARR_MADAN, HESTON_ORIGINAL or LEWIS)
+        and a model whose characteristic function broadcasts over expiries,
+        the characteristic function is evaluated once on a (contract, node)
+        grid. Trolle-Schwartz then integrates its Riccati equations once per
+        gap between option and futures expiry (or shares the Kummer functions
+        at the start of the integration) instead of once per contract.
+        Otherwise the contracts are priced one slice at a time, as in
+        `price_many`.
+
+        Args:
+            model: Model implementing the characteristic function
+            options: Options to price
+            forwards: Price of the underlying of each option, when it differs
+                from the model's forward. Prices scale with the underlying,
+                C(F, K) = F / F0 * C(F0, K * F0 / F), so each option is priced
+                at the model's forward F0 with a rescaled strike.
+
+        Returns:
+            np.ndarray: Option prices, in the same order as `options`
+        """
+        taus = np.array(
+            [self._year_fraction(option.expiry, initial_time) for option in options]
+        )
+        model_forwards = np.array([model.forward(tau) for tau in taus])
+        scales = (
+            np.ones(len(options))
+            if forwards is None
+            else np.asarray(forwards, dtype=float) / model_forwards
+        )
+        strikes = np.array([option.strike for option in options]) / scales
+        is_call = np.array(
+            [option.option_kind == OptionKind.CALL for option in options]
+        )
+
+        prices = np.empty(len(options))
+        slices = self._group_by_slice(options, initial_time)
+        if self._broadcasts_expiries(model):
+            unique_strikes, strike_indices = np.unique(strikes, return_inverse=True)
+            underlying_times = [time for _, time in slices]
+            call_prices = self._broadcast_call_prices(
+                model,
+                np.array([tau for tau, _ in slices])[:, None],
+                (
+                    None
+                    if underlying_times[0] is None
+                    else np.array(underlying_times)[:, None]
+                ),
+                unique_strikes,
+            )
+            for row, indices in enumerate(slices.values()):
+                prices[indices] = call_prices[row, strike_indices[indices]]
+            prices -= np.where(
+                is_call,
+                0.0,
+                model.zero_coupon_bond(taus) * (model_forwards - strikes),
+            )
+        else:
+            for (tau, time_to_underlying_expiry), indices in slices.items():
+                if self._prices_by_slice():
+                    prices[indices] = self._price_slice(
+                        model,
+                        tau,
+                        time_to_underlying_expiry,
+                        strikes[indices],
+                        is_call[indices],
+                    )
+                else:
+                    prices[indices] = [
+                        self._adaptive_price(
+                            model,
+                            tau,
+                            time_to_underlying_expiry,
+                            strikes[i],
+                            options[i].option_kind,
+                        )[0]
+                        for i in indices
+                    ]
+        return scales * prices
+
+    def _broadcast_call_prices(
+        self,
+        model: PricingModel,
+        taus: np.ndarray,
+        time_to_underlying_expiry: Optional[np.ndarray],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Call prices of shape (len(taus), len(strikes)) from one evaluation of
+        the characteristic function on a column of expiries.
+        """
+        match self.params.method:
+            case FourierMethod.CARR_MADAN:
+                return self._carr_madan_quadrature_prices(
+                    model, taus, time_to_underlying_expiry, strikes
+                )
+            case FourierMethod.HESTON_ORIGINAL:
+                return self._heston_original_quadrature_prices(
+                    model, taus, time_to_underlying_expiry, strikes
+                )
+            case FourierMethod.LEWIS:
+                return self._lewis_quadrature_prices(
+                    model, taus, time_to_underlying_expiry, strikes
+                )
+
+    def _group_by_slice(
+        self, options: Sequence[Option], initial_time: dt.datetime
+    ) -> dict[tuple[float, Optional[float]], list[int]]:
+        slices: dict[tuple[float, Optional[float]], list[int]] = {}
+        for i, option in enumerate(options):
+            slices.setdefault(self._times_to_expiry(option, initial_time), []).append(i)
+        return slices
+
+    def _broadcasts_expiries(self, model: PricingModel) -> bool:
+        return (
+            model.broadcasts_expiries()
+            and self.params.quadrature != Quadrature.ADAPTIVE
+            and self.params.method
+            in (
+                FourierMethod.CARR_MADAN,
+                FourierMethod.HESTON_ORIGINAL,
+                FourierMethod.LEWIS,
+            )
+            # these are chosen per expiry
+            and not self.params.optimal_dampening
+            and not self.params.automatic_truncation
+            and not self.params.control_variate
+        )
+
+    def _adaptive_price(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strike: float,
+        option_kind: OptionKind,
+    ) -> tuple[float, float]:
+        """
+        Price and error estimate of one option with adaptive quadrature.
+        """
+        integrand_model, control = self._control_variate(
+            model, tau, time_to_underlying_expiry
+        )
+
         if self.params.method == FourierMethod.CARR_MADAN:
-            return self._carr_madan_price(model, option, initial_time)
+            call_price, error = self._carr_madan_price(
+                integrand_model, tau, time_to_underlying_expiry, strike
+            )
+        elif self.params.method == FourierMethod.LEWIS:
+            call_price, error = self._lewis_price(
+                integrand_model, tau, time_to_underlying_expiry, strike
+            )
         else:
-            return self._heston_original_price(model, option, initial_time)
+            call_price, error = self._heston_original_price(
+                model, tau, time_to_underlying_expiry, strike
+            )
 
-    def _carr_madan_price(
-        self, model: PricingModel, option: Option, initial_time: dt.datetime
+        if control is not None:
+            call_price += self._control_variate_prices(
+                control, tau, np.array([strike])
+            )[0]
+
+        # puts differ from calls by a closed-form parity term
+        if option_kind == OptionKind.PUT:
+            call_price -= model.zero_coupon_bond(tau) * (model.forward(tau) - strike)
+        return call_price, error
+
+    def _prices_by_slice(self) -> bool:
+        return (
+            self.params.method
+            in (
+                FourierMethod.CARR_MADAN_FFT,
+                FourierMethod.CARR_MADAN_FRFT,
+                FourierMethod.COS,
+            )
+            or self.params.quadrature != Quadrature.ADAPTIVE
+        )
+
+    def _price_slice(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+        is_call: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Price all strikes of one (tau, underlying expiry) slice from a single
+        vectorized evaluation of the characteristic function.
+        """
+        integrand_model, control = self._control_variate(
+            model, tau, time_to_underlying_expiry
+        )
+
+        match self.params.method:
+            case FourierMethod.COS:
+                return self._cos_prices(
+                    model, tau, time_to_underlying_expiry, strikes, is_call
+                )
+            case FourierMethod.CARR_MADAN_FFT:
+                call_prices = self._carr_madan_fft_prices(
+                    integrand_model, tau, time_to_underlying_expiry, strikes
+                )
+            case FourierMethod.CARR_MADAN_FRFT:
+                call_prices = self._carr_madan_frft_prices(
+                    integrand_model, tau, time_to_underlying_expiry, strikes
+                )
+            case FourierMethod.CARR_MADAN:
+                call_prices = self._carr_madan_quadrature_prices(
+                    integrand_model, tau, time_to_underlying_expiry, strikes
+                )
+            case FourierMethod.HESTON_ORIGINAL:
+                call_prices = self._heston_original_quadrature_prices(
+                    model, tau, time_to_underlying_expiry, strikes
+                )
+            case FourierMethod.LEWIS:
+                call_prices = self._lewis_quadrature_prices(
+                    integrand_model, tau, time_to_underlying_expiry, strikes
+                )
+
+        if control is not None:
+            call_prices = call_prices + self._control_variate_prices(
+                control, tau, strikes
+            )
+
+        put_prices = call_prices - model.zero_coupon_bond(tau) * (
+            model.forward(tau) - strikes
+        )
+        return np.where(is_call, call_prices, put_prices)
+
+    def _control_variate(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[PricingModel, Optional[Black76Model]]:
+        """
+        Model whose characteristic function enters the integrand, and the
+        Black-76 control variate subtracted from it (None when disabled).
+
+        The control shares the forward and discount factor of `model` and its
+        variance is the model's second cumulant, so the residual integrand
+        vanishes to second order at u = 0 and decays much faster than the
+        characteristic function itself.
+        """
+        if not self.params.control_variate:
+            return model, None
+
+        if self.params.method not in (
+            FourierMethod.CARR_MADAN,
+            FourierMethod.CARR_MADAN_FFT,
+            FourierMethod.CARR_MADAN_FRFT,
+            FourierMethod.LEWIS,
+        ):
+            raise ValueError(
+                f"Control variate is not supported for {self.params.method}."
+            )
+
+        _, variance, _ = model.cumulants(tau, time_to_underlying_expiry)
+        control = Black76Model(
+            Black76Parameters(
+                forward=ForwardParameters(
+                    value=model.forward(tau), volatility=np.sqrt(variance / tau)
+                ),
+                rate=RateParameters(value=-np.log(model.zero_coupon_bond(tau)) / tau),
+            )
+        )
+        return ControlVariateResidual(model, control), control
+
+    def _control_variate_prices(
+        self, control: Black76Model, tau: float, strikes: np.ndarray
+    ) -> np.ndarray:
+        """
+        Closed-form call prices added back to the prices of the residual.
+
+        Lewis' formula is affine rather than linear in the characteristic
+        function, so its constant discounted forward is removed once.
+        """
+        call_prices = control.price(tau, strikes, OptionKind.CALL)
+        if self.params.method == FourierMethod.LEWIS:
+            call_prices = call_prices - control.zero_coupon_bond(tau) * control.forward(
+                tau
+            )
+        return call_prices
+
+    @staticmethod
+    def _slice_key(
+        model: PricingModel, tau: float, time_to_underlying_expiry: Optional[float]
+    ) -> tuple:
+        return (
+            type(model).__name__,
+            model.params.model_dump_json(),
+            tau,
+            time_to_underlying_expiry,
+        )
+
+    def _integral_truncation(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
     ) -> float:
         """
-        Implementation of Carr-Madan FFT method.
+        Upper limit of the integral methods.
+
+        With `automatic_truncation` this is the first of TRUNCATION_CANDIDATES
+        where |phi(u)| falls below `truncation_tolerance`, so long expiries,
+        whose characteristic function decays quickly, integrate over a much
+        shorter range than short ones. Candidates are scanned in blocks,
+        evaluating the characteristic function only as far as needed, and the
+        result is cached per (model, tau, underlying expiry, tolerance).
         """
-        tau = (option.expiry - initial_time).total_seconds() / SECONDS_IN_A_YEAR
-        strike = option.strike
+        if not self.params.automatic_truncation:
+            return self.params.integral_truncation
 
-        zero_coupon_bond = model.zero_coupon_bond(tau)
+        # the control variate residual is small near the origin only
+        if isinstance(model, CharacteristicFunctionTransform):
+            model = model.model
+
+        key = self._slice_key(model, tau, time_to_underlying_expiry) + (
+            self.params.truncation_tolerance,
+        )
+        if key not in self._truncation_cache:
+            truncation = TRUNCATION_CANDIDATES[-1]
+            for block in np.array_split(TRUNCATION_CANDIDATES, 8):
+                with np.errstate(all="ignore"):
+                    modulus = np.abs(
+                        model.characteristic_function(
+                            block, tau, time_to_underlying_expiry
+                        )
+                    )
+                # a non-finite value means the model is past its usable range
+                is_small = ~(modulus > self.params.truncation_tolerance)
+                if is_small.any():
+                    truncation = block[np.argmax(is_small)]
+                    break
+            self._truncation_cache[key] = truncation
+
+        return self._truncation_cache[key]
+
+    @staticmethod
+    def _year_fraction(time: dt.datetime, initial_time: dt.datetime) -> float:
+        return (time - initial_time).total_seconds() / SECONDS_IN_A_YEAR
+
+    @staticmethod
+    def _times_to_expiry(
+        option: Option, initial_time: dt.datetime
+    ) -> tuple[float, Optional[float]]:
+        tau = FourierEngine._year_fraction(option.expiry, initial_time)
 
         if isinstance(option.underlying, Forward):
-            time_to_underlying_expiry = (
-                option.underlying.expiry - initial_time
-            ).total_seconds() / SECONDS_IN_A_YEAR
+            time_to_underlying_expiry = FourierEngine._year_fraction(
+                option.underlying.expiry, initial_time
+            )
         else:
             time_to_underlying_expiry = None
 
-        dampening_factor = self.params.dampening_factor
+        return tau, time_to_underlying_expiry
+
+    def _carr_madan_price(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strike: float,
+    ) -> tuple[float, float]:
+        """
+        Implementation of Carr-Madan FFT method, returning the call price and
+        an estimate of its absolute error.
+        """
+        zero_coupon_bond = model.zero_coupon_bond(tau)
+
+        (dampening_factor,) = self._dampening_factors(
+            model, tau, time_to_underlying_expiry, np.array([strike])
+        )
 
         def integrand(u: float) -> float:
             """Integrand for the first probability P1"""
@@ -85,34 +988,502 @@ class FourierEngine:
             temp = np.exp(-1j * u * np.log(strike)) * cf / denominator
             return temp.real
 
-        truncation = self.params.integral_truncation
-        integral, _ = integrate.quad(integrand, 0, truncation)
+        truncation = self._integral_truncation(model, tau, time_to_underlying_expiry)
+        integral, error = integrate.quad(integrand, 0, truncation)
+        error += self._tail_estimate(integrand, truncation)
+
+        scale = zero_coupon_bond * np.exp(-dampening_factor * np.log(strike)) / np.pi
+        return scale * integral, scale * error
+
+    @staticmethod
+    def _tail_estimate(integrand, truncation: float) -> float:
+        """
+        Estimate of the integral beyond the truncation, int_U^inf |f| of
+        about U * |f(U)|, exact for an integrand decaying like 1 / u^2.
+        """
+        return truncation * abs(integrand(truncation))
+
+    def _carr_madan_fft_prices(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Carr-Madan over a whole log-strike grid with a single FFT.
+
+        The dampened integrand is sampled on u_j = j * eta and integrated with
+        Simpson weights; the FFT returns call prices on the log-strike grid
+        k_m = log(F) - b + m * lambda, with lambda * eta = 2 * pi / N. Prices
+        at the requested strikes are interpolated with a cubic spline.
+        """
+        n = self.params.fft_grid_size
+        eta = self.params.fft_grid_spacing
+
+        zero_coupon_bond = model.zero_coupon_bond(tau)
+        forward = model.forward(tau)
+
+        # one transform serves the whole grid, so it is damped for the forward
+        (dampening_factor,) = self._dampening_factors(
+            model, tau, time_to_underlying_expiry, np.array([forward])
+        )
+
+        log_strike_spacing = 2 * np.pi / (n * eta)
+        lowest_log_strike = np.log(forward) - n * log_strike_spacing / 2
+
+        u = eta * np.arange(n)
+        cf = model.characteristic_function(
+            u - 1j * (dampening_factor + 1), tau, time_to_underlying_expiry
+        )
+        denominator = (
+            dampening_factor**2
+            + dampening_factor
+            - u**2
+            + 1j * u * (2 * dampening_factor + 1)
+        )
+        psi = zero_coupon_bond * cf / denominator
+
+        simpson_weights = (3 + (-1) ** (np.arange(n) + 1)) / 3
+        simpson_weights[0] = 1 / 3
+
+        transform = np.fft.fft(
+            np.exp(-1j * u * lowest_log_strike) * psi * eta * simpson_weights
+        )
+        log_strikes = lowest_log_strike + log_strike_spacing * np.arange(n)
 
-        price = (
-            zero_coupon_bond
-            * np.exp(-dampening_factor * np.log(strike))
+        # far from the forward exp(-alpha * k) amplifies the transform's
+        # round-off without bound, so only the grid around the strikes is used
+        first, last = np.searchsorted(
+            log_strikes, np.log([strikes.min(), strikes.max()])
+        )
+        window = slice(max(first - 4, 0), min(last + 4, n))
+        call_prices = (
+            np.exp(-dampening_factor * log_strikes[window])
             / np.pi
-            * integral
+            * transform.real[window]
         )
-        return price
 
-    def _heston_original_price(
-        self, model: PricingModel, option: Option, initial_time: dt.datetime
-    ) -> float:
+        return CubicSpline(log_strikes[window], call_prices)(np.log(strikes))
+
+    def _carr_madan_frft_prices(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
         """
-        Implementation of original Heston formula using Gil-Pelaez inversion.
+        Carr-Madan over a log-strike grid with a single fractional FFT.
+
+        Unlike CARR_MADAN_FFT the log-strike spacing lambda is not tied to the
+        integration grid u_j = j * eta: the grid spans only the requested
+        strikes (or uses `frft_log_strike_spacing` around their centre), so a
+        tight strike chain is resolved with a small `frft_grid_size`. The
+        spacing eta is set by `_frft_integration_spacing` rather than by
+        integral_truncation. The real part of the integrand is even in u, so
+        the trapezoidal rule converges spectrally and its error is the
+        aliasing of the dampened price 2 pi / eta away in log-strike.
         """
+        n = self.params.frft_grid_size
+
+        log_strikes = np.log(strikes)
+        if self.params.frft_log_strike_spacing is None:
+            lowest_log_strike = log_strikes.min()
+            log_strike_spacing = max(
+                (log_strikes.max() - lowest_log_strike) / (n - 1),
+                MIN_FRFT_LOG_STRIKE_SPACING,
+            )
+        else:
+            log_strike_spacing = self.params.frft_log_strike_spacing
+            lowest_log_strike = (
+                log_strikes.max() + log_strikes.min() - (n - 1) * log_strike_spacing
+            ) / 2
+            if lowest_log_strike > log_strikes.min():
+                raise ValueError(
+                    "Strikes span more than frft_grid_size * frft_log_strike_spacing "
+                    "in log-strike."
+                )
 
-        tau = (option.expiry - initial_time).total_seconds() / SECONDS_IN_A_YEAR
-        strike = option.strike
         zero_coupon_bond = model.zero_coupon_bond(tau)
+        (dampening_factor,) = self._dampening_factors(
+            model, tau, time_to_underlying_expiry, np.array([model.forward(tau)])
+        )
+        eta = self._frft_integration_spacing(
+            model, tau, time_to_underlying_expiry, dampening_factor, lowest_log_strike
+        )
 
-        if isinstance(option.underlying, Forward):
-            time_to_underlying_expiry = (
-                option.underlying.expiry - initial_time
-            ).total_seconds() / SECONDS_IN_A_YEAR
+        u = eta * np.arange(n)
+        cf = model.characteristic_function(
+            u - 1j * (dampening_factor + 1), tau, time_to_underlying_expiry
+        )
+        psi = zero_coupon_bond * cf / self._carr_madan_denominator(u, dampening_factor)
+
+        trapezoid_weights = np.ones(n)
+        trapezoid_weights[[0, -1]] = 1 / 2
+
+        transform = fractional_fft(
+            np.exp(-1j * u * lowest_log_strike) * psi * eta * trapezoid_weights,
+            eta * log_strike_spacing / (2 * np.pi),
+        )
+        grid_log_strikes = lowest_log_strike + log_strike_spacing * np.arange(n)
+        call_prices = (
+            np.exp(-dampening_factor * grid_log_strikes) / np.pi * transform.real
+        )
+
+        return CubicSpline(grid_log_strikes, call_prices)(log_strikes)
+
+    def _frft_integration_spacing(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        dampening_factor: float,
+        lowest_log_strike: float,
+    ) -> float:
+        """
+        Spacing of the CARR_MADAN_FRFT integration grid.
+
+        The grid of frft_grid_size points ends at one of
+        TRUNCATION_CANDIDATES, the one minimising the larger of the aliasing
+        error, about B F exp(-alpha 2 pi / eta), and the integrand at the
+        end of the grid for the lowest strike. A longer grid is coarser, so
+        these two errors are balanced rather than either set by
+        integral_truncation. The spacing is cached per (model, tau,
+        underlying expiry, grid size, dampening factor, lowest strike).
+        """
+        key = self._slice_key(model, tau, time_to_underlying_expiry) + (
+            self.params.frft_grid_size,
+            dampening_factor,
+            lowest_log_strike,
+        )
+        if key not in self._truncation_cache:
+            spacings = TRUNCATION_CANDIDATES / (self.params.frft_grid_size - 1)
+            zero_coupon_bond = model.zero_coupon_bond(tau)
+            with np.errstate(all="ignore"):
+                aliasing_errors = (
+                    zero_coupon_bond
+                    * model.forward(tau)
+                    * np.exp(-2 * np.pi * dampening_factor / spacings)
+                )
+                truncation_errors = (
+                    np.exp(-dampening_factor * lowest_log_strike)
+                    / np.pi
+                    * np.abs(
+                        zero_coupon_bond
+                        * model.characteristic_function(
+                            TRUNCATION_CANDIDATES - 1j * (dampening_factor + 1),
+                            tau,
+                            time_to_underlying_expiry,
+                        )
+                        / self._carr_madan_denominator(
+                            TRUNCATION_CANDIDATES, dampening_factor
+                        )
+                    )
+                )
+            # a non-finite value means the model is past its usable range
+            errors = np.maximum(aliasing_errors, truncation_errors)
+            errors[~np.isfinite(errors)] = np.inf
+            self._truncation_cache[key] = spacings[np.argmin(errors)]
+
+        return self._truncation_cache[key]
+
+    @staticmethod
+    def _carr_madan_denominator(u: np.ndarray, dampening_factor: float) -> np.ndarray:
+        return (
+            dampening_factor**2
+            + dampening_factor
+            - u**2
+            + 1j * u * (2 * dampening_factor + 1)
+        )
+
+    def _carr_madan_quadrature_prices(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Carr-Madan call prices for a strike ladder on fixed quadrature nodes.
+        """
+        nodes, weights = quadrature_rule(
+            self.params.quadrature,
+            self.params.quadrature_nodes,
+            self._integral_truncation(model, tau, time_to_underlying_expiry),
+        )
+        log_strikes = np.log(strikes)
+
+        if self.params.optimal_dampening:
+            # one contour per strike, all evaluated in a single call
+            dampening_factor = self._dampening_factors(
+                model, tau, time_to_underlying_expiry, strikes
+            )[:, None]
         else:
-            time_to_underlying_expiry = None
+            dampening_factor = self.params.dampening_factor
+
+        cf = model.characteristic_function(
+            nodes - 1j * (dampening_factor + 1), tau, time_to_underlying_expiry
+        )
+        denominator = (
+            dampening_factor**2
+            + dampening_factor
+            - nodes**2
+            + 1j * nodes * (2 * dampening_factor + 1)
+        )
+
+        fourier_kernel = np.exp(-1j * np.outer(log_strikes, nodes))
+        if self.params.optimal_dampening:
+            integrals = np.sum(fourier_kernel * (weights * cf / denominator), axis=-1)
+        else:
+            integrals = (weights * cf / denominator) @ fourier_kernel.T
+        integrals = integrals.real
+
+        return (
+            model.zero_coupon_bond(tau)
+            * np.exp(-np.ravel(dampening_factor) * log_strikes)
+            / np.pi
+            * integrals
+        )
+
+    def _dampening_factors(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Carr-Madan dampening factor for each strike.
+
+        With `optimal_dampening` the factor minimizes the magnitude of the
+        integrand at u = 0, -alpha * log(K) + log(phi(-(alpha + 1) i))
+        - log(alpha^2 + alpha), as proposed by Lord & Kahl (2007). The search
+        is restricted to factors below the moment explosion of the model and
+        its results are cached per (model, tau, underlying expiry, strike).
+        """
+        if not self.params.optimal_dampening:
+            return np.full(len(strikes), self.params.dampening_factor)
+
+        # the control variate has all moments, only the model restricts alpha
+        if isinstance(model, CharacteristicFunctionTransform):
+            model = model.model
+
+        slice_key = self._slice_key(model, tau, time_to_underlying_expiry)
+        if slice_key not in self._dampening_cache:
+            self._dampening_cache[slice_key] = self._max_dampening_factor(
+                model, tau, time_to_underlying_expiry
+            )
+        max_dampening_factor = self._dampening_cache[slice_key]
+
+        keys = [slice_key + (strike,) for strike in strikes]
+        missing = np.array([key not in self._dampening_cache for key in keys])
+        if missing.any():
+            log_strikes = np.log(strikes[missing])
+
+            def objective(dampening_factor: np.ndarray) -> np.ndarray:
+                cf = model.characteristic_function(
+                    -1j * (dampening_factor + 1), tau, time_to_underlying_expiry
+                )
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    value = (
+                        -dampening_factor * log_strikes
+                        + np.log(cf.real)
+                        - np.log(dampening_factor**2 + dampening_factor)
+                    )
+                return np.where(np.isfinite(value), value, np.inf)
+
+            # golden-section search, vectorized over the strikes
+            golden_ratio = (np.sqrt(5) - 1) / 2
+            lower = np.full(len(log_strikes), MIN_DAMPENING_FACTOR)
+            upper = np.full(len(log_strikes), max_dampening_factor)
+            for _ in range(DAMPENING_SEARCH_ITERATIONS):
+                left = upper - golden_ratio * (upper - lower)
+                right = lower + golden_ratio * (upper - lower)
+                is_left = objective(left) < objective(right)
+                upper = np.where(is_left, right, upper)
+                lower = np.where(is_left, lower, left)
+
+            missing_keys = [key for key, is_missing in zip(keys, missing) if is_missing]
+            for key, dampening_factor in zip(missing_keys, (lower + upper) / 2):
+                self._dampening_cache[key] = dampening_factor
+
+        return np.array([self._dampening_cache[key] for key in keys])
+
+    @staticmethod
+    def _max_dampening_factor(
+        model: PricingModel, tau: float, time_to_underlying_expiry: Optional[float]
+    ) -> float:
+        """
+        Largest dampening factor on a log-spaced grid for which the moment
+        E[S^(alpha + 1)] is finite, i.e. phi(-(alpha + 1) i) is real and
+        positive.
+        """
+        candidates = np.geomspace(MIN_DAMPENING_FACTOR, MAX_DAMPENING_FACTOR, 64)
+        with np.errstate(all="ignore"):
+            cf = model.characteristic_function(
+                -1j * (candidates + 1), tau, time_to_underlying_expiry
+            )
+            is_valid = (
+                np.isfinite(cf)
+                & (cf.real > 0)
+                & (np.abs(cf.imag) <= 1e-8 * np.abs(cf.real))
+            )
+
+        if is_valid.all():
+            return MAX_DAMPENING_FACTOR
+        first_invalid = np.argmin(is_valid)
+        if first_invalid == 0:
+            raise ValueError(
+                "No finite moment E[S^(alpha + 1)] found for alpha > "
+                f"{MIN_DAMPENING_FACTOR}, Carr-Madan dampening is not applicable."
+            )
+        return candidates[first_invalid - 1]
+
+    def _cos_prices(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+        is_call: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Fang-Oosterlee COS method.
+
+        The density of the log underlying is expanded in a cosine series on
+        [a, b] = c1 -/+ L * sqrt(c2 + sqrt(c4)), built from the model's
+        cumulants. Calls and puts are priced from their own payoff
+        coefficients, for all strikes in one matrix product.
+        """
+        c1, c2, c4 = model.cumulants(tau, time_to_underlying_expiry)
+        half_width = self.params.cos_truncation_width * np.sqrt(c2 + np.sqrt(c4))
+        a, b = c1 - half_width, c1 + half_width
+
+        omega = np.arange(self.params.cos_terms) * np.pi / (b - a)
+        cf = model.characteristic_function(omega, tau, time_to_underlying_expiry)
+        density_terms = (cf * np.exp(-1j * omega * a)).real
+        density_terms[0] /= 2
+
+        # calls pay on [log(K), b], puts on [a, log(K)]
+        log_strikes = np.clip(np.log(strikes), a, b)[:, None]
+        lower = np.where(is_call[:, None], log_strikes, a)
+        upper = np.where(is_call[:, None], b, log_strikes)
+
+        chi = (
+            np.cos(omega * (upper - a)) * np.exp(upper)
+            - np.cos(omega * (lower - a)) * np.exp(lower)
+            + omega * np.sin(omega * (upper - a)) * np.exp(upper)
+            - omega * np.sin(omega * (lower - a)) * np.exp(lower)
+        ) / (1 + omega**2)
+        psi = np.empty_like(chi)
+        psi[:, 0] = (upper - lower)[:, 0]
+        psi[:, 1:] = (
+            np.sin(omega[1:] * (upper - a)) - np.sin(omega[1:] * (lower - a))
+        ) / omega[1:]
+
+        sign = np.where(is_call, 1.0, -1.0)[:, None]
+        payoff_terms = sign * 2 / (b - a) * (chi - strikes[:, None] * psi)
+
+        return model.zero_coupon_bond(tau) * (payoff_terms @ density_terms)
+
+    def _lewis_price(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strike: float,
+    ) -> tuple[float, float]:
+        """
+        Implementation of Lewis (2001) single-integral formula.
+
+        C = DF * (F - sqrt(K) / pi * int_0^inf Re[exp(-i u log(K)) phi(u - i/2)]
+        / (u^2 + 1/4) du), integrated along the line Im(z) = -1/2 where the
+        integrand is damped symmetrically in the strike.
+        """
+        log_strike = np.log(strike)
+
+        def integrand(u: float) -> float:
+            cf = model.characteristic_function(u - 0.5j, tau, time_to_underlying_expiry)
+            return (np.exp(-1j * u * log_strike) * cf).real / (u**2 + 0.25)
+
+        truncation = self._integral_truncation(model, tau, time_to_underlying_expiry)
+        integral, error = integrate.quad(integrand, 0, truncation)
+        error += self._tail_estimate(integrand, truncation)
+
+        zero_coupon_bond = model.zero_coupon_bond(tau)
+        scale = zero_coupon_bond * np.sqrt(strike) / np.pi
+        return zero_coupon_bond * model.forward(tau) - scale * integral, scale * error
+
+    def _lewis_quadrature_prices(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Lewis call prices for a strike ladder on fixed quadrature nodes.
+        """
+        nodes, weights = quadrature_rule(
+            self.params.quadrature,
+            self.params.quadrature_nodes,
+            self._integral_truncation(model, tau, time_to_underlying_expiry),
+        )
+
+        cf = model.characteristic_function(nodes - 0.5j, tau, time_to_underlying_expiry)
+        fourier_kernel = np.exp(-1j * np.outer(np.log(strikes), nodes))
+        integrals = ((weights * cf / (nodes**2 + 0.25)) @ fourier_kernel.T).real
+
+        return model.zero_coupon_bond(tau) * (
+            model.forward(tau) - np.sqrt(strikes) / np.pi * integrals
+        )
+
+    def _heston_original_quadrature_prices(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strikes: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Gil-Pelaez call prices for a strike ladder on fixed quadrature nodes.
+        """
+        nodes, weights = quadrature_rule(
+            self.params.quadrature,
+            self.params.quadrature_nodes,
+            self._integral_truncation(model, tau, time_to_underlying_expiry),
+        )
+
+        char_minus1j = model.characteristic_function(
+            -1j + 1e-12, tau, time_to_underlying_expiry
+        )
+        cf_p1 = model.characteristic_function(
+            nodes - 1j, tau, time_to_underlying_expiry
+        )
+        cf_p2 = model.characteristic_function(nodes, tau, time_to_underlying_expiry)
+
+        fourier_kernel = np.exp(-1j * np.outer(np.log(strikes), nodes))
+        P1 = (weights * cf_p1 / (1j * nodes * char_minus1j)) @ fourier_kernel.T
+        P1 = 0.5 + P1.real / np.pi
+
+        P2 = (weights * cf_p2 / (1j * nodes)) @ fourier_kernel.T
+        P2 = 0.5 + P2.real / np.pi
+
+        price = (model.forward(tau) * P1 - strikes * P2) * model.zero_coupon_bond(tau)
+        return np.maximum(0, price)
+
+    def _heston_original_price(
+        self,
+        model: PricingModel,
+        tau: float,
+        time_to_underlying_expiry: Optional[float],
+        strike: float,
+    ) -> tuple[float, float]:
+        """
+        Implementation of original Heston formula using Gil-Pelaez inversion.
+        """
+        zero_coupon_bond = model.zero_coupon_bond(tau)
 
         char_minus1j = model.characteristic_function(
             -1j + 1e-12, tau, time_to_underlying_expiry
@@ -137,16 +1508,20 @@ class FourierEngine:
             return temp.real
 
         # Compute probabilities through numerical integration
-        truncation = self.params.integral_truncation
+        truncation = self._integral_truncation(model, tau, time_to_underlying_expiry)
 
-        P1, _ = integrate.quad(integrand_p1, 0, truncation)
+        P1, error_p1 = integrate.quad(integrand_p1, 0, truncation)
         P1 = 0.5 + P1 / np.pi
+        error_p1 += self._tail_estimate(integrand_p1, truncation)
 
-        P2, _ = integrate.quad(integrand_p2, 0, truncation)
+        P2, error_p2 = integrate.quad(integrand_p2, 0, truncation)
         P2 = 0.5 + P2 / np.pi
+        error_p2 += self._tail_estimate(integrand_p2, truncation)
 
         # Calculate call price
-        price = (model.forward(tau) * P1 - strike * P2) * zero_coupon_bond
+        forward = model.forward(tau)
+        price = (forward * P1 - strike * P2) * zero_coupon_bond
         # price = spot * P1 - strike * zero_coupon_bond * P2
+        error = zero_coupon_bond * (forward * error_p1 + strike * error_p2) / np.pi
 
-        return max(0, price)
+        return max(0, price), error
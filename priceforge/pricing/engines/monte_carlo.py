@@ -1,18 +1,37 @@
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Sequence
 import numpy as np
 import datetime as dt
 
 from pydantic import BaseModel
 
-from priceforge.models.contracts import Option
-from priceforge.pricing.models.protocol import SimulatableModel, StochasticProcess
+from priceforge.models.contracts import Forward, Option
+from priceforge.pricing.models.protocol import (
+    SimulatableModel,
+    SimulationScheme,
+    StochasticProcess,
+)
+
+SECONDS_IN_A_YEAR = 365 * 24 * 60 * 60
+
+
+# (payoff sums, sample sums, sample squared sums, number of samples) of a
+# chunk of paths
+ChunkStatistics = tuple[np.ndarray, np.ndarray, np.ndarray, int]
 
 
 class MonteCarloParameters(BaseModel):
+    # entropy of the SeedSequence the random streams of the chunks are spawned
+    # from, fresh entropy if None
     seed: Optional[int] = None
     antithetic_variates: bool = True
     n_paths: int = 10_000
     n_steps: int = 100
+    scheme: SimulationScheme = SimulationScheme.EULER
+    # paths simulated at once, which bounds the memory of a run by chunk_size
+    # rather than n_paths; the last chunk takes the remaining paths
+    chunk_size: int = 100_000
+    n_workers: int = 1  # processes pricing the chunks
 
 
 class MonteCarloEngine:
@@ -24,61 +43,318 @@ class MonteCarloEngine:
     def price(
         self, model: SimulatableModel, option: Option, valuation_time: dt.datetime
     ):
-        process = model.process
-        end_time = (option.expiry - valuation_time).total_seconds() / (
-            365 * 24 * 60 * 60
-        )
-        final_values = np.exp(self.simulate(process, end_time))
-
-        payoffs = option.payoff(final_values[:, 0])
+        return self.price_many(model, [option], valuation_time)[0]
 
-        price = np.mean(payoffs) * model.zero_coupon_bond(end_time)
-        return price
-
-    def _generate_random_samples(
-        self, size: int, correlation: np.ndarray
+    def price_many(
+        self,
+        model: SimulatableModel,
+        options: Sequence[Option],
+        valuation_time: dt.datetime,
     ) -> np.ndarray:
-        # axis 0 is path, axis 1 is time and axis 2 is sub_process
-        antithetic_variates = self.params.antithetic_variates
-        n_paths = self.params.n_paths
-        n_steps = self.params.n_steps
+        """
+        Price options on any expiries from one set of paths, simulated up to
+        the last expiry with every expiry on the time grid. Options on
+        futures read the futures price of their contract off the simulated
+        state, so a whole strip shares the paths.
+        """
+        return self.price_many_with_standard_errors(model, options, valuation_time)[0]
 
-        if not antithetic_variates:
-            uncorrelated_samples = np.random.normal(size=(n_paths, n_steps, size))
+    def price_many_with_standard_errors(
+        self,
+        model: SimulatableModel,
+        options: Sequence[Option],
+        valuation_time: dt.datetime,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Prices, as in `price_many`, and their Monte Carlo standard errors.
+        Paths are simulated chunk_size at a time, and only running sums and
+        squared sums of the discounted payoffs are kept across chunks. With
+        antithetic variates, the errors are those of the means of antithetic
+        pairs. With n_workers > 1, the chunks are split over a pool of
+        processes; each chunk draws from its own stream, so the prices are
+        the same for any n_workers.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The prices and their standard errors
+        """
+        chunks = self._chunks()
+        batches = [
+            batch
+            for batch in np.array_split(np.arange(len(chunks)), self.params.n_workers)
+            if len(batch)
+        ]
+        if len(batches) > 1:
+            with ProcessPoolExecutor(
+                max_workers=len(batches),
+                initializer=_initialize_worker,
+                initargs=(self, model, options, valuation_time),
+            ) as executor:
+                batch_statistics = list(
+                    executor.map(
+                        _payoff_statistics_in_worker,
+                        [[chunks[i] for i in batch] for batch in batches],
+                    )
+                )
+            statistics = [chunk for batch in batch_statistics for chunk in batch]
         else:
-            standardized_random_samples = np.random.normal(
-                size=(n_paths // 2 + n_paths % 2, n_steps, size)
+            statistics = self._payoff_statistics(model, options, valuation_time, chunks)
+
+        # merged in the order of the chunks, whichever process simulated them
+        payoff_sums = np.zeros(len(options))
+        sample_sums = np.zeros(len(options))
+        sample_squared_sums = np.zeros(len(options))
+        n_samples = 0
+        for chunk_statistics in statistics:
+            payoff_sums += chunk_statistics[0]
+            sample_sums += chunk_statistics[1]
+            sample_squared_sums += chunk_statistics[2]
+            n_samples += chunk_statistics[3]
+
+        variances = (sample_squared_sums - sample_sums**2 / n_samples) / max(
+            n_samples - 1, 1
+        )
+        return payoff_sums / self.params.n_paths, np.sqrt(
+            np.maximum(variances, 0.0) / n_samples
+        )
+
+    def _payoff_statistics(
+        self,
+        model: SimulatableModel,
+        options: Sequence[Option],
+        valuation_time: dt.datetime,
+        chunks: Sequence[tuple[int, np.random.SeedSequence]],
+    ) -> list[ChunkStatistics]:
+        """
+        Sums and squared sums of the discounted payoffs of `options` over
+        each of `chunks`.
+        """
+        process = model.process
+        expiries = np.array(
+            [self._year_fraction(option.expiry, valuation_time) for option in options]
+        )
+        times_to_underlying_expiry = [
+            (
+                self._year_fraction(option.underlying.expiry, valuation_time)
+                if isinstance(option.underlying, Forward)
+                else None
             )
-            uncorrelated_samples = np.concatenate(
+            for option in options
+        ]
+        observation_times = np.unique(expiries)
+        observed = np.searchsorted(observation_times, expiries)
+        discounts = np.array([model.zero_coupon_bond(expiry) for expiry in expiries])
+
+        statistics = []
+        for states in self._simulate_chunks(process, observation_times, chunks):
+            payoffs = discounts * np.column_stack(
                 [
-                    standardized_random_samples,
-                    -standardized_random_samples[: n_paths // 2, :],
-                ],
-                axis=0,
+                    option.payoff(
+                        process.underlying_value(
+                            expiries[i],
+                            states[:, observed[i]],
+                            times_to_underlying_expiry[i],
+                        )
+                    )
+                    for i, option in enumerate(options)
+                ]
+            )
+            samples = self._independent_samples(payoffs)
+            statistics.append(
+                (
+                    payoffs.sum(axis=0),
+                    samples.sum(axis=0),
+                    (samples**2).sum(axis=0),
+                    len(samples),
+                )
             )
+        return statistics
+
+    def simulate_forward_curve(
+        self,
+        model: SimulatableModel,
+        underlying_expiries: Sequence[dt.datetime],
+        end_time: dt.datetime,
+        valuation_time: dt.datetime,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Joint evolution of the futures prices of `underlying_expiries` over
+        n_steps steps up to `end_time`, from a single set of paths, e.g. to
+        price calendar spreads.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The times of the steps, in years,
+                and the futures prices of shape (n_paths, n_steps + 1,
+                len(underlying_expiries)), NaN once a contract has expired
+        """
+        process = model.process
+        assert hasattr(
+            process, "forward_curve"
+        ), f"Model {model.__class__.__name__} doesn't simulate a forward curve."
 
-        cholesky_decomposition = np.linalg.cholesky(correlation)
-        correlated_samples = np.einsum(
-            "ij,klj->kli", cholesky_decomposition, uncorrelated_samples
+        times = np.linspace(
+            0, self._year_fraction(end_time, valuation_time), self.params.n_steps + 1
         )
-        return correlated_samples
+        states = self.simulate_paths(process, times)
+        underlying_times = np.array(
+            [
+                self._year_fraction(expiry, valuation_time)
+                for expiry in underlying_expiries
+            ]
+        )
+        curves = np.stack(
+            [
+                process.forward_curve(time, states[:, i], underlying_times)
+                for i, time in enumerate(times)
+            ],
+            axis=1,
+        )
+        return times, curves
 
-    def simulate(self, process: StochasticProcess, end_time: float):
-        n_steps = self.params.n_steps
+    def _year_fraction(self, time: dt.datetime, valuation_time: dt.datetime) -> float:
+        return (time - valuation_time).total_seconds() / SECONDS_IN_A_YEAR
+
+    def _chunks(self) -> list[tuple[int, np.random.SeedSequence]]:
+        """
+        Number of paths of each chunk, and the seed of its random stream,
+        spawned from the seed of the engine. The paths of a chunk only depend
+        on its seed, so the prices do not depend on which process simulates
+        which chunk.
+        """
         n_paths = self.params.n_paths
-        random_samples = self._generate_random_samples(
-            process.dimensions(), process.correlation_matrix()
+        chunk_size = self.params.chunk_size
+        chunk_sizes = [
+            min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)
+        ]
+        seeds = np.random.SeedSequence(self.params.seed).spawn(len(chunk_sizes))
+        return list(zip(chunk_sizes, seeds))
+
+    def _independent_samples(self, payoffs: np.ndarray) -> np.ndarray:
+        # antithetic pairs are averaged, the last path of an odd chunk has no
+        # antithetic
+        if not self.params.antithetic_variates:
+            return payoffs
+        n_paths = len(payoffs)
+        n_draws = n_paths // 2 + n_paths % 2
+        return np.concatenate(
+            [
+                (payoffs[: n_paths // 2] + payoffs[n_draws:]) / 2,
+                payoffs[n_paths // 2 : n_draws],
+            ]
         )
 
-        time_delta = end_time / n_steps
-        time_steps = np.linspace(0, end_time, n_steps + 1)
+    def _generate_random_samples(
+        self,
+        generator: np.random.Generator,
+        cholesky_decomposition: np.ndarray,
+        uncorrelated_samples: np.ndarray,
+        correlated_samples: np.ndarray,
+    ) -> None:
+        """
+        Fill `correlated_samples`, of shape (n_paths, sub_process), with the
+        correlated standard normal samples of a step drawn from `generator`,
+        using `uncorrelated_samples` of the same shape as scratch space.
+        """
+        n_paths = len(uncorrelated_samples)
+        if not self.params.antithetic_variates:
+            generator.standard_normal(out=uncorrelated_samples)
+        else:
+            n_draws = n_paths // 2 + n_paths % 2
+            generator.standard_normal(out=uncorrelated_samples[:n_draws])
+            np.negative(
+                uncorrelated_samples[: n_paths // 2],
+                out=uncorrelated_samples[n_draws:],
+            )
+        np.matmul(
+            uncorrelated_samples, cholesky_decomposition.T, out=correlated_samples
+        )
+
+    def simulate(self, process: StochasticProcess, end_time: float):
+        return self.simulate_paths(process, np.array([end_time]))[:, 0]
 
-        state = np.tile(process.initial_state(), (n_paths, 1))
-        for i, time_step in enumerate(time_steps[1:]):
-            drift = process.drift(time_step, state)
-            volatility = process.volatility(time_step, state)
-            state += drift * time_delta + volatility * random_samples[:, i] * np.sqrt(
-                time_delta
+    def simulate_paths(
+        self, process: StochasticProcess, observation_times: np.ndarray
+    ) -> np.ndarray:
+        """
+        State of each path at the sorted `observation_times`, of shape
+        (n_paths, len(observation_times), state size). The grid has n_steps
+        steps up to the last observation time, refined so that every
+        observation time is on it.
+        """
+        states = np.empty(
+            (
+                self.params.n_paths,
+                len(observation_times),
+                np.size(process.initial_state()),
             )
+        )
+        start = 0
+        for chunk in self._simulate_chunks(process, observation_times, self._chunks()):
+            states[start : start + len(chunk)] = chunk
+            start += len(chunk)
+        return states
+
+    def _simulate_chunks(
+        self,
+        process: StochasticProcess,
+        observation_times: np.ndarray,
+        chunks: Sequence[tuple[int, np.random.SeedSequence]],
+    ) -> Iterator[np.ndarray]:
+        """
+        States at `observation_times`, as in `simulate_paths`, for each of
+        `chunks` of paths, from its own random stream. The random samples are drawn a step at a
+        time into buffers allocated once, and the chunks are views of the same
+        buffer, so each chunk must be used before the next one is simulated.
+        """
+        end_time = observation_times[-1]
+        time_steps = np.union1d(
+            np.linspace(0, end_time, self.params.n_steps + 1), observation_times
+        )
+        observed = np.searchsorted(time_steps, observation_times)
+        cholesky_decomposition = np.linalg.cholesky(process.correlation_matrix())
+        initial_state = np.atleast_1d(process.initial_state())
+
+        largest_chunk = max(chunk_size for chunk_size, _ in chunks)
+        uncorrelated_samples = np.empty((largest_chunk, process.dimensions()))
+        correlated_samples = np.empty_like(uncorrelated_samples)
+        states = np.empty((largest_chunk, len(observation_times), len(initial_state)))
+        for chunk_size, seed in chunks:
+            generator = np.random.default_rng(seed)
+            state = np.tile(initial_state, (chunk_size, 1))
+            states[:chunk_size, observed == 0] = state[:, None]
+            for i, time_step in enumerate(time_steps[1:]):
+                self._generate_random_samples(
+                    generator,
+                    cholesky_decomposition,
+                    uncorrelated_samples[:chunk_size],
+                    correlated_samples[:chunk_size],
+                )
+                state = process.evolve(
+                    time_step,
+                    time_step - time_steps[i],
+                    state,
+                    correlated_samples[:chunk_size],
+                    self.params.scheme,
+                )
+                states[:chunk_size, observed == i + 1] = state[:, None]
+            yield states[:chunk_size]
+
+
+_worker_pricing: Optional[tuple] = None
+
+
+def _initialize_worker(
+    engine: MonteCarloEngine,
+    model: SimulatableModel,
+    options: Sequence[Option],
+    valuation_time: dt.datetime,
+) -> None:
+    global _worker_pricing
+    _worker_pricing = (engine, model, options, valuation_time)
+
 
-        return state
+def _payoff_statistics_in_worker(
+    chunks: Sequence[tuple[int, np.random.SeedSequence]],
+) -> list[ChunkStatistics]:
+    assert _worker_pricing is not None
+    engine, model, options, valuation_time = _worker_pricing
+    return engine._payoff_statistics(model, options, valuation_time, chunks)
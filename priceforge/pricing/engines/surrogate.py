@@ -0,0 +1,217 @@
+import datetime as dt
+import json
+from typing import Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from priceforge.models.contracts import Forward, Option, OptionKind
+
+SECONDS_IN_A_YEAR = 365 * 24 * 60 * 60
+
+# parameters that only scale the prices, which are stored normalised by the
+# discounted forward
+SCALE_PARAMETERS = ("spot.value", "forward.value", "rate.value")
+
+# largest difference, in years, between the gap to the underlying expiry of
+# an option and the one of the surrogate
+UNDERLYING_GAP_TOLERANCE = 1 / 365
+
+
+def chebyshev_nodes(degree: int) -> np.ndarray:
+    """
+    The degree + 1 Chebyshev extrema cos(pi j / degree) on [-1, 1].
+    """
+    return np.cos(np.pi * np.arange(degree + 1) / degree)
+
+
+def chebyshev_coefficients(values: np.ndarray) -> np.ndarray:
+    """
+    Coefficients of the tensor Chebyshev interpolant of `values`, sampled on
+    the Chebyshev extrema along every axis (a type I discrete cosine
+    transform per axis).
+    """
+    coefficients = values
+    for axis, size in enumerate(values.shape):
+        degree = size - 1
+        weights = np.ones(size)
+        weights[[0, -1]] = 0.5
+        transform = (
+            2
+            / degree
+            * weights[:, None]
+            * weights[None, :]
+            * np.cos(np.pi * np.outer(np.arange(size), np.arange(size)) / degree)
+        )
+        coefficients = np.moveaxis(
+            np.tensordot(transform, coefficients, axes=(1, axis)), 0, axis
+        )
+    return coefficients
+
+
+def chebyshev_polynomials(x: np.ndarray, degree: int) -> np.ndarray:
+    """
+    T_0(x), ..., T_degree(x) along a new last axis, for x in [-1, 1].
+    """
+    angles = np.arccos(np.clip(x, -1.0, 1.0))
+    return np.cos(angles[..., None] * np.arange(degree + 1))
+
+
+def evaluate_chebyshev(
+    coefficients: np.ndarray, points: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """
+    Tensor Chebyshev series with `coefficients` at `points` of shape
+    (n_points, dimensions) in the box [lower, upper].
+    """
+    x = 2 * (points - lower) / (upper - lower) - 1
+    result = np.tensordot(
+        chebyshev_polynomials(x[:, 0], coefficients.shape[0] - 1),
+        coefficients,
+        axes=(1, 0),
+    )
+    for axis in range(1, coefficients.ndim):
+        polynomials = chebyshev_polynomials(x[:, axis], coefficients.shape[axis] - 1)
+        result = np.einsum("nk,nk...->n...", polynomials, result)
+    return result
+
+
+def flatten_parameters(params: dict) -> dict:
+    """
+    Parameters as {"group.field": value}.
+    """
+    return {
+        f"{group}.{field}": value
+        for group, values in params.items()
+        if isinstance(values, dict)
+        for field, value in values.items()
+    } | {name: value for name, value in params.items() if not isinstance(value, dict)}
+
+
+class SurrogateParameters(BaseModel):
+    path: str  # .npz file written by build_surrogate
+
+
+class SurrogateEngine:
+    """
+    Chebyshev interpolation of the call prices of a model, normalised by the
+    discounted forward, over (log moneyness log(K / F), time to expiry and
+    the parameters selected at build time). Loading and evaluating only
+    needs numpy; `error_estimate` is the error on the normalised prices
+    estimated by the build.
+    """
+
+    params_class = SurrogateParameters
+
+    def __init__(self, params: SurrogateParameters):
+        self.params = params
+
+    @property
+    def params(self) -> SurrogateParameters:
+        return self._params
+
+    @params.setter
+    def params(self, params: SurrogateParameters):
+        # the coefficients are reloaded when the parameters are replaced
+        self._params = params
+        with np.load(params.path) as data:
+            self.coefficients = data["coefficients"]
+            self.lower = data["lower"]
+            self.upper = data["upper"]
+            self.names = [str(name) for name in data["names"]]
+            metadata = json.loads(str(data["metadata"]))
+        self.model_class: str = metadata["model_class"]
+        self.fixed_parameters: dict = metadata["fixed_parameters"]
+        self.underlying_gap: Optional[float] = metadata["underlying_gap"]
+        self.error_estimate: float = metadata["error_estimate"]
+
+    def evaluate(self, points: np.ndarray) -> np.ndarray:
+        """
+        Normalised call prices C / (B F) at `points` of shape (n_points,
+        2 + len(names)), whose columns are the log moneyness, the time to
+        expiry and the selected parameters.
+
+        Raises:
+            ValueError: If a point is outside the domain of the surrogate
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        outside = (points < self.lower) | (points > self.upper)
+        if outside.any():
+            dimensions = ["log_moneyness", "time_to_expiry"] + self.names
+            raise ValueError(
+                "Outside the domain of the surrogate in "
+                f"{sorted({dimensions[i] for i in np.nonzero(outside)[1]})}."
+            )
+        return evaluate_chebyshev(self.coefficients, points, self.lower, self.upper)
+
+    def price(self, model, option: Option, valuation_time: dt.datetime) -> float:
+        return float(self.price_many(model, [option], valuation_time)[0])
+
+    def price_many(
+        self, model, options: Sequence[Option], valuation_time: dt.datetime
+    ) -> np.ndarray:
+        """
+        Price options of `model` from one vectorized evaluation.
+
+        Raises:
+            ValueError: If the model, its fixed parameters or the gap to the
+                underlying expiry differ from the ones of the build, or if
+                an option is outside the domain
+        """
+        self._check_model(model)
+        taus = np.array(
+            [self._year_fraction(option.expiry, valuation_time) for option in options]
+        )
+        for option, tau in zip(options, taus):
+            self._check_underlying(option, tau, valuation_time)
+
+        strikes = np.array([option.strike for option in options])
+        forwards = np.array([model.forward(tau) for tau in taus])
+        discounts = np.array([model.zero_coupon_bond(tau) for tau in taus])
+        params = flatten_parameters(model.params.model_dump(mode="json"))
+
+        points = np.column_stack(
+            [np.log(strikes / forwards), taus]
+            + [np.full(len(options), params[name]) for name in self.names]
+        )
+        call_prices = discounts * forwards * self.evaluate(points)
+        is_call = np.array(
+            [option.option_kind == OptionKind.CALL for option in options]
+        )
+        return np.where(
+            is_call, call_prices, call_prices - discounts * (forwards - strikes)
+        )
+
+    def _check_model(self, model) -> None:
+        if type(model).__name__ != self.model_class:
+            raise ValueError(
+                f"Surrogate of {self.model_class}, not {type(model).__name__}."
+            )
+        params = flatten_parameters(model.params.model_dump(mode="json"))
+        changed = [
+            name
+            for name, value in self.fixed_parameters.items()
+            if params.get(name) != value
+        ]
+        if changed:
+            raise ValueError(f"Parameters {changed} differ from the surrogate's.")
+
+    def _check_underlying(
+        self, option: Option, tau: float, valuation_time: dt.datetime
+    ) -> None:
+        if isinstance(option.underlying, Forward):
+            gap = self._year_fraction(option.underlying.expiry, valuation_time) - tau
+            if (
+                self.underlying_gap is None
+                or abs(gap - self.underlying_gap) > UNDERLYING_GAP_TOLERANCE
+            ):
+                raise ValueError(
+                    f"Underlying expires {gap:.4f} years after the option, the "
+                    f"surrogate was built for {self.underlying_gap}."
+                )
+        elif self.underlying_gap is not None:
+            raise ValueError("The surrogate prices options on futures.")
+
+    @staticmethod
+    def _year_fraction(time: dt.datetime, valuation_time: dt.datetime) -> float:
+        return (time - valuation_time).total_seconds() / SECONDS_IN_A_YEAR
@@ -1,3 +1,4 @@
+from typing import Optional, Union
 import numpy as np
 from pydantic import BaseModel
 from scipy.stats import norm
@@ -6,7 +7,7 @@ from priceforge.pricing.models.parameters import (
     ForwardParameters,
     RateParameters,
 )
-from priceforge.pricing.models.protocol import ClosedFormModel
+from priceforge.pricing.models.protocol import AffineModel, ClosedFormModel
 
 
 class Black76Parameters(BaseModel):
@@ -14,7 +15,7 @@ class Black76Parameters(BaseModel):
     rate: RateParameters = RateParameters()
 
 
-class Black76Model(ClosedFormModel):
+class Black76Model(ClosedFormModel, AffineModel):
     params_class = Black76Parameters
 
     def __init__(self, params: Black76Parameters) -> None:
@@ -54,3 +55,33 @@ class Black76Model(ClosedFormModel):
 
     def zero_coupon_bond(self, time_to_expiry):
         return np.exp(-self.params.rate.value * time_to_expiry)
+
+    def forward(self, time_to_expiry) -> float:
+        return self.params.forward.value
+
+    def underlying_value(self) -> float:
+        return self.params.forward.value
+
+    def initial_variance(self) -> float:
+        return self.params.forward.volatility**2
+
+    def affine_terms(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        u = np.asarray(u, dtype=complex)
+        upper_d = -(1j * u + u**2) * time_to_option_expiry / 2
+        return np.zeros_like(upper_d)[()], upper_d[()]
+
+    def broadcasts_expiries(self) -> bool:
+        return True
+
+    def cumulants(
+        self,
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[float, float, float]:
+        variance = self.params.forward.volatility**2 * time_to_option_expiry
+        return np.log(self.params.forward.value) - variance / 2, variance, 0.0
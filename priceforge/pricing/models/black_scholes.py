@@ -8,6 +8,7 @@ from priceforge.pricing.models.parameters import (
     RateParameters,
 )
 from priceforge.pricing.models.protocol import (
+    AffineModel,
     ClosedFormModel,
     SimulatableModel,
     StochasticProcess,
@@ -41,7 +42,7 @@ class GeometricBrownianMotion(StochasticProcess):
         return self.vol
 
 
-class BlackScholesModel(ClosedFormModel, SimulatableModel):
+class BlackScholesModel(ClosedFormModel, SimulatableModel, AffineModel):
     params_class = BlackScholesParameters
     process: GeometricBrownianMotion
 
@@ -90,19 +91,34 @@ class BlackScholesModel(ClosedFormModel, SimulatableModel):
     def zero_coupon_bond(self, time_to_expiry):
         return np.exp(-self.params.rate.value * time_to_expiry)
 
-    # def characteristic_function(
-    #     self,
-    #     u: complex,
-    #     time_to_option_expiry: float,
-    #     time_to_underlying_expiry: Optional[float],
-    # ) -> complex:
-    #     if u == 0.0 + 0.0j:
-    #         return 1.0 + 0.0j
-    #
-    #     spot = self.params.spot.value
-    #     vol = self.params.spot.volatility
-    #     rate = self.params.rate.value
-    #     return np.exp(
-    #         1j * u * (np.log(spot) + (rate - vol**2 / 2) * time_to_option_expiry)
-    #         + (vol * u) ** 2 / 2 * time_to_option_expiry
-    #     )
+    def forward(self, time_to_expiry) -> float:
+        return self.params.spot.value / self.zero_coupon_bond(time_to_expiry)
+
+    def underlying_value(self) -> float:
+        return self.params.spot.value
+
+    def initial_variance(self) -> float:
+        return self.params.spot.volatility**2
+
+    def affine_terms(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        u = np.asarray(u, dtype=complex)
+        upper_c = 1j * u * self.params.rate.value * time_to_option_expiry
+        upper_d = -(1j * u + u**2) * time_to_option_expiry / 2
+        return upper_c[()], upper_d[()]
+
+    def broadcasts_expiries(self) -> bool:
+        return True
+
+    def cumulants(
+        self,
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[float, float, float]:
+        variance = self.params.spot.volatility**2 * time_to_option_expiry
+        log_forward = np.log(self.forward(time_to_option_expiry))
+        return log_forward - variance / 2, variance, 0.0
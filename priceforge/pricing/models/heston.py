@@ -1,7 +1,8 @@
 import numpy as np
 from pydantic import BaseModel
+from scipy import special
 from typing import Optional, Callable, Union
-from priceforge.pricing.models.ode_solver import OdeSolution, RootSign
+from priceforge.pricing.models.ode_solver import OdeSolution, RiccatiCache, RootSign
 from priceforge.pricing.models.parameters import (
     CorrelationParameters,
     RateParameters,
@@ -9,12 +10,17 @@ from priceforge.pricing.models.parameters import (
     VolatilityParameters,
 )
 from priceforge.pricing.models.protocol import (
+    AffineModel,
     CharacteristicFunctionODEs,
-    PricingModel,
     SimulatableModel,
+    SimulationScheme,
     StochasticProcess,
 )
 
+# switch between the quadratic and exponential variance samplers of the QE
+# scheme, on the squared coefficient of variation of the next variance
+QE_CRITICAL_PSI = 1.5
+
 
 class OrnsteinUhlenbeckProcess(StochasticProcess):
     def __init__(
@@ -101,6 +107,148 @@ class HestonCompositeProcess(StochasticProcess):
         vol_of_vol = self.vol_process.volatility(time, current_state=current_vol)
         return np.array([spot_vol, vol_of_vol]).T
 
+    def evolve(
+        self,
+        time: float,
+        time_delta: float,
+        current_state: np.ndarray,
+        random_samples: np.ndarray,
+        scheme: SimulationScheme,
+    ) -> np.ndarray:
+        match scheme:
+            case SimulationScheme.EULER:
+                return super().evolve(
+                    time, time_delta, current_state, random_samples, scheme
+                )
+            case SimulationScheme.FULL_TRUNCATION:
+                return self._full_truncation_step(
+                    time, time_delta, current_state, random_samples
+                )
+            case SimulationScheme.QUADRATIC_EXPONENTIAL:
+                return self._quadratic_exponential_step(
+                    time_delta, current_state, random_samples
+                )
+
+    def _full_truncation_step(
+        self,
+        time: float,
+        time_delta: float,
+        current_state: np.ndarray,
+        random_samples: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Euler step with the variance floored at zero in the drift and the
+        volatility, but not in the variance itself (Lord, Koekkoek & van Dijk).
+        """
+        variance = current_state[:, 1]
+        positive_variance = np.maximum(variance, 0.0)
+        spot_drift = self.spot_process.drift(time, current_state=positive_variance)
+        spot_vol = self.spot_process.volatility(time, current_state=positive_variance)
+        vol_of_vol = self.vol_process.volatility(time, current_state=positive_variance)
+        mean_reversion_rate = self.vol_process.mean_reversion_rate
+        vol_drift = mean_reversion_rate * (
+            self.vol_process.long_term_mean - positive_variance
+        )
+        sqrt_delta = np.sqrt(time_delta)
+        return np.column_stack(
+            [
+                current_state[:, 0]
+                + spot_drift * time_delta
+                + spot_vol * random_samples[:, 0] * sqrt_delta,
+                variance
+                + vol_drift * time_delta
+                + vol_of_vol * random_samples[:, 1] * sqrt_delta,
+            ]
+        )
+
+    def _quadratic_exponential_step(
+        self, time_delta: float, current_state: np.ndarray, random_samples: np.ndarray
+    ) -> np.ndarray:
+        """
+        Andersen's quadratic-exponential step: the variance is drawn from a
+        moment-matched approximation of its non-central chi-squared law, and
+        the log spot from the integrated variance (trapezoidal rule) with
+        the martingale correction, so that E[S'] = S exp(r dt) exactly
+        wherever the moment it needs is finite.
+        """
+        kappa = self.vol_process.mean_reversion_rate
+        theta = self.vol_process.long_term_mean
+        sigma = self.vol_process.vol_of_vol
+        scale = self.spot_process.vol
+        rho = self._correlation_matrix[0, 1]
+
+        variance = current_state[:, 1]
+        decay = np.exp(-kappa * time_delta)
+        mean = theta + (variance - theta) * decay
+        conditional_variance = variance * sigma**2 * decay * (
+            1 - decay
+        ) / kappa + theta * sigma**2 * (1 - decay) ** 2 / (2 * kappa)
+        psi = conditional_variance / mean**2
+
+        # the spot shock independent of the variance shock
+        variance_samples = random_samples[:, 1]
+        orthogonal = np.sqrt(max(1 - rho**2, 0.0))
+        spot_samples = (
+            (random_samples[:, 0] - rho * variance_samples) / orthogonal
+            if orthogonal > 0
+            else np.zeros_like(variance_samples)
+        )
+
+        # log S' = log S + r dt + k0 + k1 v + k2 v' + sqrt(k3 v + k4 v') Z, with
+        # k0 set per path so that E[S'] = S exp(r dt), which cancels k1
+        k2 = 0.5 * time_delta * (scale * kappa * rho / sigma - 0.5 * scale**2) + (
+            scale * rho / sigma
+        )
+        k3 = 0.5 * time_delta * scale**2 * (1 - rho**2)
+        k4 = k3
+        exponent = k2 + 0.5 * k4
+
+        quadratic = psi <= QE_CRITICAL_PSI
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # quadratic branch, v' = a (b + Z)**2
+            b_squared = np.maximum(
+                2 / psi - 1 + np.sqrt(2 / psi) * np.sqrt(np.maximum(2 / psi - 1, 0.0)),
+                0.0,
+            )
+            a = mean / (1 + b_squared)
+            quadratic_variance = a * (np.sqrt(b_squared) + variance_samples) ** 2
+            quadratic_log_moment = exponent * b_squared * a / (
+                1 - 2 * exponent * a
+            ) - 0.5 * np.log(1 - 2 * exponent * a)
+
+            # exponential branch, a mass p at zero and an exponential tail
+            p = (psi - 1) / (psi + 1)
+            beta = (1 - p) / mean
+            uniform = special.ndtr(variance_samples)
+            exponential_variance = np.where(
+                uniform <= p, 0.0, np.log((1 - p) / (1 - uniform)) / beta
+            )
+            exponential_log_moment = np.log(p + beta * (1 - p) / (beta - exponent))
+
+        next_variance = np.where(quadratic, quadratic_variance, exponential_variance)
+        # log E[exp(k2 v' + k4 v' / 2)]
+        log_moment = np.where(quadratic, quadratic_log_moment, exponential_log_moment)
+        # the moment is infinite for 2 A a >= 1 or A >= beta, e.g. for a large
+        # positive correlation and time step; these paths drop the martingale
+        # correction for the drift k0 + k1 v of the plain scheme (Andersen)
+        undefined = np.where(quadratic, 2 * exponent * a >= 1, exponent >= beta)
+        k0 = -scale * rho * kappa * theta * time_delta / sigma
+        k1 = 0.5 * time_delta * (scale * kappa * rho / sigma - 0.5 * scale**2) - (
+            scale * rho / sigma
+        )
+        drift = np.where(
+            undefined, k0 + k1 * variance, -log_moment - 0.5 * k3 * variance
+        )
+
+        next_log_spot = (
+            current_state[:, 0]
+            + self.spot_process.rate * time_delta
+            + drift
+            + k2 * next_variance
+            + np.sqrt(k3 * variance + k4 * next_variance) * spot_samples
+        )
+        return np.column_stack([next_log_spot, next_variance])
+
 
 class SolverParameters(BaseModel):
     d_root_sign: RootSign = RootSign.MINUS
@@ -112,7 +260,7 @@ class HestonParameters(BaseModel):
     volatility: VolatilityParameters = VolatilityParameters()
     correlation: CorrelationParameters = CorrelationParameters()
     ode_solution: OdeSolution = OdeSolution.ANALYTICAL
-    analytical_soluton: SolverParameters = SolverParameters()
+    analytical_solution: SolverParameters = SolverParameters()
 
 
 class HestonODEs(CharacteristicFunctionODEs):
@@ -154,12 +302,31 @@ class HestonODEs(CharacteristicFunctionODEs):
 
         return y_prime
 
-    def analytical_soluton(
+    def riccati_coefficients(
         self,
-        u: complex,
+        u: Union[complex, np.ndarray],
+        times: np.ndarray,
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float],
-    ) -> tuple[complex, complex]:
+    ) -> tuple[Union[complex, np.ndarray], ...]:
+        assert isinstance(time_to_underlying_expiry, type(None))
+        volatility = self.params.volatility
+
+        return (
+            1j * u * self.params.rate.value,
+            volatility.mean_reversion_rate * volatility.long_term_mean**2,
+            -0.5 * (u**2 + 1j * u),
+            -volatility.mean_reversion_rate
+            + 1j * u * volatility.volatility * self.params.correlation.spot_vol,
+            0.5 * volatility.volatility**2,
+        )
+
+    def analytical_solution(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
         assert isinstance(time_to_underlying_expiry, type(None))
         d_term, g_term, kappa_rho_sigma = self._compute_intermediate_terms(u)
         upper_d = self._compute_upper_d(
@@ -171,6 +338,72 @@ class HestonODEs(CharacteristicFunctionODEs):
 
         return (upper_c, upper_d)
 
+    def analytical_gradient(
+        self, u: Union[complex, np.ndarray], time_to_option_expiry: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Analytical C and D terms together with their derivatives with respect
+        to (kappa, theta, sigma, rho), differentiating the closed form term by
+        term as in Cui, del Bano Rollin & Germano (2017).
+
+        Returns:
+            tuple: C, D, and the gradients of C and D, stacked on a leading
+                axis of length 4
+        """
+        u = np.asarray(u, dtype=complex)
+        tau = time_to_option_expiry
+        vol = self.params.volatility
+        kappa = vol.mean_reversion_rate
+        theta = vol.long_term_mean**2
+        sigma = vol.volatility
+        rho = self.params.correlation.spot_vol
+
+        d_term, g_term, kappa_rho_sigma = self._compute_intermediate_terms(u)
+        upper_d = self._compute_upper_d(tau, d_term, g_term, kappa_rho_sigma)
+        upper_c = self._compute_upper_c(u, tau, d_term, g_term, kappa_rho_sigma)
+
+        zeros = np.zeros_like(u)
+        d_kappa_rho_sigma = np.stack(
+            np.broadcast_arrays(zeros + 1, zeros, -1j * u * rho, -1j * u * sigma)
+        )
+        d_sigma = np.array([0.0, 0.0, 1.0, 0.0]).reshape((4,) + (1,) * u.ndim)
+
+        d_d_term = (
+            kappa_rho_sigma * d_kappa_rho_sigma + sigma * (u**2 + 1j * u) * d_sigma
+        ) / d_term
+        d_g_term = (
+            2
+            * (kappa_rho_sigma * d_d_term - d_term * d_kappa_rho_sigma)
+            / (kappa_rho_sigma - d_term) ** 2
+        )
+        exp_dt = np.exp(d_term * tau)
+        d_exp_dt = tau * exp_dt * d_d_term
+        one_minus_g_exp = 1 - g_term * exp_dt
+        d_one_minus_g_exp = -(d_g_term * exp_dt + g_term * d_exp_dt)
+
+        # D = N / M with N = (krs + d)(1 - e^(d tau)), M = sigma^2 (1 - g e^(d tau))
+        d_numerator = (d_kappa_rho_sigma + d_d_term) * (1 - exp_dt) - (
+            kappa_rho_sigma + d_term
+        ) * d_exp_dt
+        denominator = sigma**2 * one_minus_g_exp
+        d_denominator = (
+            2 * sigma * d_sigma * one_minus_g_exp + sigma**2 * d_one_minus_g_exp
+        )
+        d_upper_d = (d_numerator - upper_d * d_denominator) / denominator
+
+        # C = r i u tau + K ((krs + d) tau - 2 L), K = kappa theta / sigma^2
+        kappa_theta_term = kappa * theta / sigma**2
+        d_kappa_theta_term = np.array(
+            [theta / sigma**2, kappa / sigma**2, -2 * kappa_theta_term / sigma, 0.0]
+        ).reshape((4,) + (1,) * u.ndim)
+        log_term = np.log(one_minus_g_exp / (1 - g_term))
+        d_log_term = d_one_minus_g_exp / one_minus_g_exp + d_g_term / (1 - g_term)
+        d_upper_c = d_kappa_theta_term * (
+            (kappa_rho_sigma + d_term) * tau - 2 * log_term
+        ) + kappa_theta_term * ((d_kappa_rho_sigma + d_d_term) * tau - 2 * d_log_term)
+
+        return upper_c, upper_d, d_upper_c, d_upper_d
+
     def _compute_intermediate_terms(
         self, u: complex
     ) -> tuple[complex, complex, complex]:
@@ -181,7 +414,7 @@ class HestonODEs(CharacteristicFunctionODEs):
             vol.mean_reversion_rate - 1j * u * vol.volatility * corr.spot_vol
         )
 
-        d_term = self.params.analytical_soluton.d_root_sign * (
+        d_term = self.params.analytical_solution.d_root_sign * (
             (kappa_rho_sigma**2 + vol.volatility**2 * (u**2 + 1j * u)) ** 0.5
         )
         g_term = (kappa_rho_sigma + d_term) / (kappa_rho_sigma - d_term)
@@ -223,12 +456,36 @@ class HestonODEs(CharacteristicFunctionODEs):
         )
 
 
-class HestonModel(PricingModel, SimulatableModel):
+class HestonModel(AffineModel, SimulatableModel):
     params_class = HestonParameters
     characteristic_function_odes: HestonODEs
+    riccati_cache = RiccatiCache()
+    # "group.field" parameters of characteristic_function_gradient
+    gradient_parameters = (
+        "volatility.value",
+        "volatility.mean_reversion_rate",
+        "volatility.long_term_mean",
+        "volatility.volatility",
+        "correlation.spot_vol",
+    )
 
-    def __init__(self, params: HestonParameters):
+    def __init__(
+        self, params: HestonParameters, riccati_cache: Optional[RiccatiCache] = None
+    ):
         self.params = params
+        if riccati_cache is not None:
+            # e.g. a PersistentRiccatiCache, in place of the in-memory cache
+            # shared by all models of the class
+            self.riccati_cache = riccati_cache
+
+    @property
+    def params(self) -> HestonParameters:
+        return self._params
+
+    @params.setter
+    def params(self, params: HestonParameters):
+        # the ODEs and the process are rebuilt when the parameters are replaced
+        self._params = params
 
         self.characteristic_function_odes = HestonODEs(params)
 
@@ -255,27 +512,153 @@ class HestonModel(PricingModel, SimulatableModel):
     def forward(self, time_to_expiry) -> float:
         return self.params.spot.value / self.zero_coupon_bond(time_to_expiry)
 
-    def characteristic_function(
+    def broadcasts_expiries(self) -> bool:
+        # the analytical C and D terms are closed-form in tau, the numerical
+        # ones are integrated once up to the longest expiry
+        return True
+
+    def cumulants(
         self,
-        u: complex,
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float],
-    ) -> complex:
-        if u == 0.0 + 0.0j:
-            return 1.0 + 0.0j
+    ) -> tuple[float, float, float]:
+        """
+        Closed-form first and second cumulants of log(S_T).
+
+        As in Fang & Oosterlee (2008) the lengthy fourth cumulant is left out
+        (returned as zero) and a wider truncation compensates. Note the
+        sigma**2 * theta term of c2 reads theta * (4 * exp(-kappa * T) - 5);
+        the version printed in the paper carries a typo.
+        """
+        tau = time_to_option_expiry
+        kappa = self.params.volatility.mean_reversion_rate
+        theta = self.params.volatility.long_term_mean**2
+        sigma = self.params.volatility.volatility
+        rho = self.params.correlation.spot_vol
+        v0 = self.params.volatility.value**2
+        exp_kt = np.exp(-kappa * tau)
+
+        c1 = (
+            np.log(self.params.spot.value)
+            + self.params.rate.value * tau
+            + (1 - exp_kt) * (theta - v0) / (2 * kappa)
+            - theta * tau / 2
+        )
+        c2 = (
+            sigma * tau * kappa * exp_kt * (v0 - theta) * (8 * kappa * rho - 4 * sigma)
+            + kappa * rho * sigma * (1 - exp_kt) * (16 * theta - 8 * v0)
+            + 2
+            * theta
+            * kappa
+            * tau
+            * (-4 * kappa * rho * sigma + sigma**2 + 4 * kappa**2)
+            + sigma**2
+            * ((theta - 2 * v0) * exp_kt**2 + theta * (4 * exp_kt - 5) + 2 * v0)
+            + 8 * kappa**2 * (v0 - theta) * (1 - exp_kt)
+        ) / (8 * kappa**3)
+        return c1, c2, 0.0
+
+    def underlying_value(self) -> float:
+        return self.params.spot.value
+
+    def initial_variance(self) -> float:
+        return self.params.volatility.value**2
+
+    def affine_terms(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        u = np.asarray(u, dtype=complex)
+        # C and D do not depend on the spot or on v0
+        structure = self.params.model_dump_json(
+            exclude={"spot": {"value"}, "volatility": {"value"}}
+        )
+        return self.riccati_cache.get_or_solve(
+            structure,
+            u,
+            time_to_option_expiry,
+            time_to_underlying_expiry,
+            lambda: self._solve_affine_terms(
+                u, time_to_option_expiry, time_to_underlying_expiry
+            ),
+        )
+
+    def _solve_affine_terms(
+        self,
+        u: np.ndarray,
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        is_zero = u == 0.0 + 0.0j
+        u = np.where(is_zero, 1.0 + 0.0j, u)
 
         match self.params.ode_solution:
             case OdeSolution.ANALYTICAL:
-                upper_c, upper_d = self.characteristic_function_odes.analytical_soluton(
-                    u, time_to_option_expiry, time_to_underlying_expiry
+                upper_c, upper_d = (
+                    self.characteristic_function_odes.analytical_solution(
+                        u, time_to_option_expiry, time_to_underlying_expiry
+                    )
                 )
             case OdeSolution.NUMERICAL:
                 upper_c, upper_d = self.characteristic_function_odes.numerical_solution(
                     u, time_to_option_expiry, time_to_underlying_expiry
                 )
-        psi = np.exp(
+            case OdeSolution.NUMERICAL_BATCHED:
+                upper_c, upper_d = (
+                    self.characteristic_function_odes.batched_numerical_solution(
+                        u, time_to_option_expiry, time_to_underlying_expiry
+                    )
+                )
+        return (
+            np.where(is_zero, 0.0j, upper_c)[()],
+            np.where(is_zero, 0.0j, upper_d)[()],
+        )
+
+    def characteristic_function_gradient(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Characteristic function of log(S_T) and its analytical derivatives
+        with respect to `gradient_parameters`, from one evaluation of the
+        closed-form C and D terms whatever `ode_solution` is.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: phi(u), and its gradient stacked on
+                a leading axis of length len(gradient_parameters)
+        """
+        assert isinstance(time_to_underlying_expiry, type(None))
+        u = np.asarray(u, dtype=complex)
+        is_zero = u == 0.0 + 0.0j
+        upper_c, upper_d, d_upper_c, d_upper_d = (
+            self.characteristic_function_odes.analytical_gradient(
+                np.where(is_zero, 1.0 + 0.0j, u), time_to_option_expiry
+            )
+        )
+        upper_c = np.where(is_zero, 0.0j, upper_c)
+        upper_d = np.where(is_zero, 0.0j, upper_d)
+
+        volatility = self.params.volatility
+        initial_variance = volatility.value**2
+        cf = np.exp(
             upper_c
-            + upper_d * self.params.volatility.value**2
+            + upper_d * initial_variance
             + 1j * u * np.log(self.params.spot.value)
         )
-        return psi
+        # d/d(kappa, theta, sigma, rho) of C + D v0
+        d_exponent = np.where(is_zero, 0.0j, d_upper_c + d_upper_d * initial_variance)
+        # v0 and theta are the squares of volatility.value and long_term_mean
+        gradient = np.stack(
+            [
+                2 * volatility.value * upper_d,
+                d_exponent[0],
+                2 * volatility.long_term_mean * d_exponent[1],
+                d_exponent[2],
+                d_exponent[3],
+            ]
+        )
+        return cf[()], (cf * gradient)
@@ -1,11 +1,293 @@
+import hashlib
+import math
+import os
+import tempfile
 from enum import Enum, IntEnum
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from priceforge.utils import LRUCache
 
 
 class OdeSolution(Enum):
     ANALYTICAL = "ANALYTICAL"
     NUMERICAL = "NUMERICAL"
+    NUMERICAL_BATCHED = "NUMERICAL_BATCHED"
 
 
 class RootSign(IntEnum):
     PLUS = 1
     MINUS = -1
+
+
+AffineTerms = tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]
+RiccatiCoefficients = tuple[Union[complex, np.ndarray], ...]
+
+# largest step of the batched Runge-Kutta scheme, in years and relative to the
+# fastest rate of the linearised Riccati equation
+RK4_MAX_STEP = 0.05
+RK4_MAX_RATE_STEP = 0.1
+
+# part of the file names of PersistentRiccatiCache, bumped when the tables of
+# a given key change
+PERSISTENT_CACHE_VERSION = "1"
+
+
+class RiccatiCache:
+    """
+    Bounded cache of the (C, D) solutions of the Riccati ODEs on a u-grid.
+
+    C and D depend on the structural parameters, the times to expiry and u,
+    not on the level of the underlying or on the initial variance. Keyed on
+    those, a move in spot or v0 reprices with one exponential per node.
+    Scalar u (adaptive quadrature) is not cached, it would only evict grids.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self._cache = LRUCache(maxsize)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_or_solve(
+        self,
+        structure: str,
+        u: np.ndarray,
+        time_to_option_expiry: Union[float, np.ndarray],
+        time_to_underlying_expiry: Optional[Union[float, np.ndarray]],
+        solve: Callable[[], AffineTerms],
+    ) -> AffineTerms:
+        if u.ndim == 0:
+            return solve()
+
+        key = self._key(structure, u, time_to_option_expiry, time_to_underlying_expiry)
+        if key not in self._cache:
+            terms = solve()
+            for term in terms:
+                if isinstance(term, np.ndarray):
+                    term.setflags(write=False)
+            self._cache[key] = terms
+        return self._cache[key]
+
+    def _key(
+        self,
+        structure: str,
+        u: np.ndarray,
+        time_to_option_expiry: Union[float, np.ndarray],
+        time_to_underlying_expiry: Optional[Union[float, np.ndarray]],
+    ) -> tuple:
+        tau = np.asarray(time_to_option_expiry, dtype=float)
+        return (
+            structure,
+            u.shape,
+            u.tobytes(),
+            tau.shape,
+            tau.tobytes(),
+            (
+                None
+                if time_to_underlying_expiry is None
+                else np.asarray(time_to_underlying_expiry, dtype=float).tobytes()
+            ),
+        )
+
+
+class PersistentRiccatiCache(RiccatiCache):
+    """
+    RiccatiCache backed by `.npy` tables under `directory`, shared by the
+    processes using it and surviving their restarts.
+
+    Each (C, D) table is one file named after a hash of the cache key, i.e.
+    of the structural parameters, the times to expiry and the u-grid. Tables
+    are written to a temporary file and renamed into place, so concurrent
+    readers only ever see complete tables, and read back memory-mapped. Once
+    the tables exceed `max_bytes` the least recently used files are removed;
+    readers holding a removed table keep their mapping.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        max_bytes: int = 1 << 30,
+        maxsize: int = 256,
+    ):
+        super().__init__(maxsize)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def get_or_solve(
+        self,
+        structure: str,
+        u: np.ndarray,
+        time_to_option_expiry: Union[float, np.ndarray],
+        time_to_underlying_expiry: Optional[Union[float, np.ndarray]],
+        solve: Callable[[], AffineTerms],
+    ) -> AffineTerms:
+        if u.ndim == 0:
+            return solve()
+
+        key = self._key(structure, u, time_to_option_expiry, time_to_underlying_expiry)
+        if key in self._cache:
+            return self._cache[key]
+
+        path = self.directory / f"{self._digest(key)}.npy"
+        terms = self._read(path)
+        if terms is None:
+            terms = solve()
+            for term in terms:
+                if isinstance(term, np.ndarray):
+                    term.setflags(write=False)
+            self._write(path, terms)
+        self._cache[key] = terms
+        return terms
+
+    def _digest(self, key: tuple) -> str:
+        digest = hashlib.sha256(PERSISTENT_CACHE_VERSION.encode())
+        for part in key:
+            digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        return digest.hexdigest()
+
+    def _read(self, path: Path) -> Optional[AffineTerms]:
+        try:
+            table = np.load(path, mmap_mode="r")
+            # mark as recently used for the eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            # missing, evicted meanwhile or unreadable
+            return None
+        return np.asarray(table[0]), np.asarray(table[1])
+
+    def _write(self, path: Path, terms: AffineTerms) -> None:
+        table = np.stack(np.broadcast_arrays(*terms))
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                np.save(file, table)
+            os.replace(temporary, path)
+        except OSError:
+            # e.g. a full disk, the tables stay in memory
+            Path(temporary).unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        files = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def solve_riccati(
+    coefficients: Callable[[np.ndarray], RiccatiCoefficients],
+    shape: tuple[int, ...],
+    time_to_option_expiry: Union[float, np.ndarray],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Classical fixed-step RK4 for C' = c0 + c1 D, D' = d0 + d1 D + d2 D**2 with
+    C(0) = D(0) = 0, on a whole array of Fourier nodes at once.
+
+    `coefficients(times)` returns (c0, c1, d0, d1, d2), each broadcastable to
+    (len(times),) + shape, so time-dependent terms are evaluated once on the
+    grid of step and mid-step times. The step is shared by all nodes and set
+    by the fastest rate sqrt(d1**2 - 4 d0 d2) of the batch.
+
+    For an array of sorted times to expiry the integration runs once to the
+    last one and the solution at each of them is returned along a leading
+    axis, the steps landing on every output time.
+    """
+    outputs = np.asarray(time_to_option_expiry, dtype=float)
+    tau = float(np.max(outputs))
+    _, _, d0, d1, d2 = coefficients(np.array([0.0, tau]))
+    rate = np.max(np.abs(np.sqrt(d1**2 - 4 * d0 * d2)), initial=0.0)
+    max_step = (
+        RK4_MAX_STEP if rate == 0.0 else min(RK4_MAX_STEP, RK4_MAX_RATE_STEP / rate)
+    )
+
+    knots = np.unique(np.concatenate([[0.0], np.ravel(outputs)]))
+    step_times = np.concatenate(
+        [[0.0]]
+        + [
+            np.linspace(start, end, max(1, math.ceil((end - start) / max_step)) + 1)[1:]
+            for start, end in zip(knots[:-1], knots[1:])
+        ]
+    )
+    # step and mid-step times interleaved
+    times = np.repeat(step_times, 2)[:-1]
+    times[1::2] = (step_times[1:] + step_times[:-1]) / 2
+    c0, c1, d0, d1, d2 = (
+        np.broadcast_to(coefficient, times.shape + shape)
+        for coefficient in coefficients(times)
+    )
+
+    def derivatives(index: int, upper_d: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            c0[index] + c1[index] * upper_d,
+            d0[index] + (d1[index] + d2[index] * upper_d) * upper_d,
+        )
+
+    upper_c = np.zeros((len(step_times),) + shape, dtype=complex)
+    upper_d = np.zeros((len(step_times),) + shape, dtype=complex)
+    for n, step in enumerate(np.diff(step_times)):
+        c_1, d_1 = derivatives(2 * n, upper_d[n])
+        c_2, d_2 = derivatives(2 * n + 1, upper_d[n] + step / 2 * d_1)
+        c_3, d_3 = derivatives(2 * n + 1, upper_d[n] + step / 2 * d_2)
+        c_4, d_4 = derivatives(2 * n + 2, upper_d[n] + step * d_3)
+        upper_c[n + 1] = upper_c[n] + step / 6 * (c_1 + 2 * c_2 + 2 * c_3 + c_4)
+        upper_d[n + 1] = upper_d[n] + step / 6 * (d_1 + 2 * d_2 + 2 * d_3 + d_4)
+
+    output_steps = np.searchsorted(step_times, outputs)
+    return upper_c[output_steps], upper_d[output_steps]
+
+
+def solve_expiries(
+    u: np.ndarray,
+    time_to_option_expiry: np.ndarray,
+    time_to_underlying_expiry: Optional[np.ndarray],
+    solve: Callable[[np.ndarray, Optional[float]], AffineTerms],
+) -> AffineTerms:
+    """
+    (C, D) for an array of expiries broadcast against u, the axes of the
+    expiries leading those of u (e.g. one row per expiry for a 1-d grid).
+
+    The Riccati equations depend on the expiries only through the gap between
+    underlying and option expiry, so `solve(taus, gap)` is called once per
+    gap (None without an underlying expiry) for the sorted unique times to
+    option expiry sharing it, and returns results of shape
+    (len(taus),) + u.shape.
+    """
+    taus = np.asarray(time_to_option_expiry, dtype=float)
+    if time_to_underlying_expiry is None:
+        gaps = np.zeros_like(taus)
+    else:
+        # rounded so that equal calendar gaps group together
+        gaps = np.round(np.asarray(time_to_underlying_expiry, dtype=float) - taus, 12)
+    taus, gaps = np.broadcast_arrays(taus, gaps)
+    shape = np.broadcast_shapes(taus.shape, u.shape)
+    if math.prod(shape) != taus.size * u.size:
+        raise ValueError("The axes of the expiries must lead the axes of u")
+
+    upper_c = np.empty((taus.size,) + u.shape, dtype=complex)
+    upper_d = np.empty((taus.size,) + u.shape, dtype=complex)
+    for gap in np.unique(gaps):
+        group = gaps.ravel() == gap
+        group_taus, inverse = np.unique(taus.ravel()[group], return_inverse=True)
+        group_c, group_d = solve(
+            group_taus, None if time_to_underlying_expiry is None else float(gap)
+        )
+        upper_c[group] = group_c[inverse]
+        upper_d[group] = group_d[inverse]
+    return upper_c.reshape(shape), upper_d.reshape(shape)
@@ -0,0 +1,156 @@
+import numpy as np
+from pydantic import BaseModel
+from typing import Optional, Union
+from priceforge.pricing.models.heston import SolverParameters
+from priceforge.pricing.models.ode_solver import RiccatiCache
+from priceforge.pricing.models.parameters import RateParameters, SpotParameters
+from priceforge.pricing.models.protocol import AffineModel
+
+
+class HestonPeriodParameters(BaseModel):
+    # end of the period in years from valuation, the last period extends to
+    # any later expiry
+    end: float
+    mean_reversion_rate: float = 1.0
+    long_term_mean: float = 0.16  # sqrt(theta)
+    volatility: float = 0.5
+    spot_vol: float = 0.0
+
+
+class PiecewiseHestonParameters(BaseModel):
+    spot: SpotParameters = SpotParameters()
+    rate: RateParameters = RateParameters()
+    initial_volatility: float = 0.16  # sqrt(v0)
+    periods: list[HestonPeriodParameters] = [HestonPeriodParameters(end=1.0)]
+    analytical_solution: SolverParameters = SolverParameters()
+
+
+class PiecewiseHestonModel(AffineModel):
+    """
+    Heston model whose kappa, theta, sigma and rho are constant over periods
+    of calendar time. The C and D terms are chained across periods backwards
+    from the expiry, each period solving the Heston Riccati equations in
+    closed form from the terms of the periods after it (Mikhailov & Noegel,
+    2003), so pricing stays analytical.
+    """
+
+    params_class = PiecewiseHestonParameters
+    riccati_cache = RiccatiCache()
+
+    def __init__(
+        self,
+        params: PiecewiseHestonParameters,
+        riccati_cache: Optional[RiccatiCache] = None,
+    ):
+        self.params = params
+        if riccati_cache is not None:
+            self.riccati_cache = riccati_cache
+
+    @property
+    def params(self) -> PiecewiseHestonParameters:
+        return self._params
+
+    @params.setter
+    def params(self, params: PiecewiseHestonParameters):
+        ends = [period.end for period in params.periods]
+        assert ends and ends == sorted(ends), "Periods must be sorted by end."
+        self._params = params
+
+    def zero_coupon_bond(self, time_to_expiry) -> float:
+        return np.exp(-self.params.rate.value * time_to_expiry)
+
+    def forward(self, time_to_expiry) -> float:
+        return self.params.spot.value / self.zero_coupon_bond(time_to_expiry)
+
+    def broadcasts_expiries(self) -> bool:
+        # the length of every period is taken per expiry
+        return True
+
+    def underlying_value(self) -> float:
+        return self.params.spot.value
+
+    def initial_variance(self) -> float:
+        return self.params.initial_volatility**2
+
+    def affine_terms(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        assert isinstance(time_to_underlying_expiry, type(None))
+        u = np.asarray(u, dtype=complex)
+        # C and D do not depend on the spot or on v0
+        structure = self.params.model_dump_json(
+            exclude={"spot": {"value"}, "initial_volatility": True}
+        )
+        return self.riccati_cache.get_or_solve(
+            structure,
+            u,
+            time_to_option_expiry,
+            time_to_underlying_expiry,
+            lambda: self._solve_affine_terms(u, time_to_option_expiry),
+        )
+
+    def _solve_affine_terms(
+        self, u: np.ndarray, time_to_option_expiry: Union[float, np.ndarray]
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        is_zero = u == 0.0 + 0.0j
+        u = np.where(is_zero, 1.0 + 0.0j, u)
+        expiry = np.asarray(time_to_option_expiry, dtype=float)
+
+        upper_c = np.zeros(np.broadcast(u, expiry).shape, dtype=complex)
+        upper_d = np.zeros_like(upper_c)
+        starts = [0.0] + [period.end for period in self.params.periods[:-1]]
+        # backwards in calendar time, so forwards in time to expiry
+        for start, period in reversed(list(zip(starts, self.params.periods))):
+            end = expiry if period is self.params.periods[-1] else period.end
+            length = np.clip(np.minimum(end, expiry) - start, 0.0, None)
+            if not length.any():
+                continue
+            upper_c, upper_d = self._period_terms(u, length, period, upper_c, upper_d)
+
+        return (
+            np.where(is_zero, 0.0j, upper_c)[()],
+            np.where(is_zero, 0.0j, upper_d)[()],
+        )
+
+    def _period_terms(
+        self,
+        u: np.ndarray,
+        length: np.ndarray,
+        period: HestonPeriodParameters,
+        upper_c: np.ndarray,
+        upper_d: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        C and D after `length` years of `period`, starting from `upper_c` and
+        `upper_d`. The starting value D0 turns the g term of the
+        constant-parameter solution into
+        G = (krs + d - sigma^2 D0) / (krs - d - sigma^2 D0), which is g when
+        D0 = 0.
+        """
+        sigma = period.volatility
+        kappa_rho_sigma = period.mean_reversion_rate - 1j * u * sigma * period.spot_vol
+        d_term = self.params.analytical_solution.d_root_sign * (
+            (kappa_rho_sigma**2 + sigma**2 * (u**2 + 1j * u)) ** 0.5
+        )
+        g_term = (kappa_rho_sigma + d_term - sigma**2 * upper_d) / (
+            kappa_rho_sigma - d_term - sigma**2 * upper_d
+        )
+        exp_dt = np.exp(d_term * length)
+
+        next_upper_d = (
+            (kappa_rho_sigma + d_term) - (kappa_rho_sigma - d_term) * g_term * exp_dt
+        ) / (sigma**2 * (1 - g_term * exp_dt))
+
+        kappa_theta_term = (
+            period.mean_reversion_rate * period.long_term_mean**2 / sigma**2
+        )
+        log_term = -2 * np.log((1 - g_term * exp_dt) / (1 - g_term))
+        next_upper_c = (
+            upper_c
+            + self.params.rate.value * 1j * u * length
+            + kappa_theta_term * ((kappa_rho_sigma + d_term) * length + log_term)
+        )
+        return next_upper_c, next_upper_d
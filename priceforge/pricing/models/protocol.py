@@ -1,9 +1,21 @@
+from enum import Enum
 from typing import Any, Callable, Optional, Protocol, TypeVar, Union, runtime_checkable
 
 import numpy as np
 from scipy.integrate import solve_ivp
 
 from priceforge.models.contracts import OptionKind
+from priceforge.pricing.models.ode_solver import (
+    RiccatiCoefficients,
+    solve_expiries,
+    solve_riccati,
+)
+
+
+class SimulationScheme(Enum):
+    EULER = "EULER"
+    FULL_TRUNCATION = "FULL_TRUNCATION"  # Euler with the variance floored at 0
+    QUADRATIC_EXPONENTIAL = "QUADRATIC_EXPONENTIAL"  # Andersen, martingale corrected
 
 
 @runtime_checkable
@@ -29,6 +41,50 @@ class StochasticProcess(Protocol):
         self, time: float, current_state: np.ndarray
     ) -> Union[float, np.ndarray]: ...
 
+    def evolve(
+        self,
+        time: float,
+        time_delta: float,
+        current_state: np.ndarray,
+        random_samples: np.ndarray,
+        scheme: SimulationScheme,
+    ) -> np.ndarray:
+        """
+        State after a step of `time_delta` ending at `time`, from correlated
+        standard normal samples of shape (n_paths, dimensions). Euler by
+        default.
+        """
+        if scheme != SimulationScheme.EULER:
+            raise ValueError(
+                f"{self.__class__.__name__} doesn't support the {scheme.value} scheme."
+            )
+        drift = self.drift(time, current_state)
+        volatility = self.volatility(time, current_state)
+        return (
+            current_state
+            + drift * time_delta
+            + volatility * random_samples[:, self.noise_indices()] * np.sqrt(time_delta)
+        )
+
+    def noise_indices(self) -> np.ndarray:
+        """
+        Brownian motion driving each state variable, when the state has more
+        variables than the process has Brownian motions.
+        """
+        return np.arange(self.dimensions())
+
+    def underlying_value(
+        self,
+        time: float,
+        current_state: np.ndarray,
+        time_to_underlying_expiry: Optional[float],
+    ) -> np.ndarray:
+        """
+        Value of the underlying at `time`, the first state variable being
+        its logarithm.
+        """
+        return np.exp(current_state[..., 0])
+
 
 P = TypeVar("P", bound=StochasticProcess)
 
@@ -42,12 +98,93 @@ class SimulatableModel(Protocol[P]):
 class PricingModel(Protocol):
     def zero_coupon_bond(self, time_to_expiry) -> float: ...
 
+    def forward(self, time_to_expiry) -> float: ...
+
     def characteristic_function(
         self,
-        u: complex,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> Union[complex, np.ndarray]:
+        """
+        Characteristic function of the log underlying at option expiry.
+
+        `u` may be a scalar or an array of any shape; the result has the same
+        shape, so a whole quadrature grid is evaluated in a single call.
+        """
+        ...
+
+    def broadcasts_expiries(self) -> bool:
+        """
+        Whether `characteristic_function` also accepts an array of option
+        expiries broadcasting against `u`, e.g. a column of expiries against a
+        row of nodes.
+        """
+        return False
+
+    def cumulants(
+        self,
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float],
-    ) -> complex: ...
+    ) -> tuple[float, float, float]:
+        """
+        First, second and fourth cumulants of the log underlying at option
+        expiry.
+
+        Estimated by central finite differences of the cumulant generating
+        function K(s) = log(phi(-i * s)); models with closed-form cumulants
+        override this.
+        """
+        step = 0.05
+        s = step * np.array([-2.0, -1.0, 1.0, 2.0])
+        cf = self.characteristic_function(
+            -1j * s, time_to_option_expiry, time_to_underlying_expiry
+        )
+        k_m2, k_m1, k_p1, k_p2 = np.log(cf).real
+
+        c1 = (-k_p2 + 8 * k_p1 - 8 * k_m1 + k_m2) / (12 * step)
+        c2 = (-k_p2 + 16 * k_p1 + 16 * k_m1 - k_m2) / (12 * step**2)
+        c4 = (k_p2 - 4 * k_p1 - 4 * k_m1 + k_m2) / step**4
+        return c1, c2, c4
+
+
+class AffineModel(PricingModel, Protocol):
+    """
+    Model whose characteristic function is exponential-affine in the log
+    underlying X (spot or forward) and the initial variance v0:
+    log(phi(u)) = C(u) + D(u) * v0 + i * u * log(X).
+    """
+
+    def underlying_value(self) -> float: ...
+
+    def initial_variance(self) -> float: ...
+
+    def affine_terms(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        """
+        C(u) and D(u), with the same shape as `u`; both vanish at u = 0.
+        """
+        ...
+
+    def characteristic_function(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> Union[complex, np.ndarray]:
+        u = np.asarray(u, dtype=complex)
+        upper_c, upper_d = self.affine_terms(
+            u, time_to_option_expiry, time_to_underlying_expiry
+        )
+        return np.exp(
+            upper_c
+            + upper_d * self.initial_variance()
+            + 1j * u * np.log(self.underlying_value())
+        )[()]
 
 
 class CharacteristicFunctionODEs(Protocol):
@@ -60,30 +197,124 @@ class CharacteristicFunctionODEs(Protocol):
         time_to_underlying_expiry: Optional[float],
     ) -> Callable[[float, float], tuple[complex, complex]]: ...
 
-    def analytical_soluton(
+    def analytical_solution(
         self,
-        u: complex,
+        u: Union[complex, np.ndarray],
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float],
-    ) -> tuple[complex, complex]: ...
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]: ...
 
     def numerical_solution(
         self,
-        u: complex,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: Union[float, np.ndarray],
+        time_to_underlying_expiry: Optional[Union[float, np.ndarray]],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        """
+        One adaptive solve per node. An array of expiries, broadcast ahead of
+        u, is integrated once per node and gap to the underlying expiry with
+        the solution read off at every time to option expiry.
+        """
+        u = np.asarray(u, dtype=complex)
+        if np.ndim(time_to_option_expiry) > 0:
+            return solve_expiries(
+                u,
+                time_to_option_expiry,
+                time_to_underlying_expiry,
+                lambda taus, gap: self._dense_numerical_solution(u, taus, gap),
+            )
+
+        upper_c_term, upper_d_term = self._dense_numerical_solution(
+            u,
+            np.array([time_to_option_expiry]),
+            (
+                None
+                if time_to_underlying_expiry is None
+                else time_to_underlying_expiry - time_to_option_expiry
+            ),
+        )
+        return (upper_c_term[0][()], upper_d_term[0][()])
+
+    def _dense_numerical_solution(
+        self, u: np.ndarray, taus: np.ndarray, underlying_gap: Optional[float]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        C and D at the sorted times to option expiry `taus`, of shape
+        (len(taus),) + u.shape, for a fixed gap between underlying and option
+        expiry.
+        """
+        upper_c_term = np.zeros((len(taus),) + u.shape, dtype=complex)
+        upper_d_term = np.zeros((len(taus),) + u.shape, dtype=complex)
+        longest = float(taus[-1])
+        if longest == 0.0:
+            return upper_c_term, upper_d_term
+
+        for index, u_value in np.ndenumerate(u):
+            odes = self.odes(
+                u_value,
+                longest,
+                None if underlying_gap is None else longest + underlying_gap,
+            )
+            sol = solve_ivp(
+                odes,
+                (0, longest),
+                [0j, 0j],
+                method="RK45",  # or 'DOP853' for higher precision
+                t_eval=taus,
+                rtol=1e-8,  # default is 1e-3
+                atol=1e-8,  # default is 1e-6
+                max_step=0.1,
+            )
+            upper_c_term[(slice(None),) + index] = sol.y[0]
+            upper_d_term[(slice(None),) + index] = sol.y[1]
+
+        return upper_c_term, upper_d_term
+
+    def riccati_coefficients(
+        self,
+        u: Union[complex, np.ndarray],
+        times: np.ndarray,
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float],
-    ) -> tuple[complex, complex]:
-        odes = self.odes(u, time_to_option_expiry, time_to_underlying_expiry)
-        sol = solve_ivp(
-            odes,
-            (0, time_to_option_expiry),
-            [0j, 0j],
-            method="RK45",  # or 'DOP853' for higher precision
-            rtol=1e-8,  # default is 1e-3
-            atol=1e-8,  # default is 1e-6
-            max_step=0.1,
-        )
-        upper_c_term = sol.y[0, -1]
-        upper_d_term = sol.y[1, -1]
+    ) -> RiccatiCoefficients:
+        """
+        (c0, c1, d0, d1, d2) of C' = c0 + c1 D, D' = d0 + d1 D + d2 D**2 at
+        `times`, each broadcastable to (len(times),) + u.shape. They may
+        depend on the expiries only through the gap between underlying and
+        option expiry.
+        """
+        ...
 
-        return (upper_c_term, upper_d_term)
+    def batched_numerical_solution(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: Union[float, np.ndarray],
+        time_to_underlying_expiry: Optional[Union[float, np.ndarray]],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        """
+        All nodes in one fixed-step scheme. An array of expiries, broadcast
+        ahead of u, is integrated once per gap to the underlying expiry.
+        """
+        u = np.asarray(u, dtype=complex)
+        if np.ndim(time_to_option_expiry) > 0:
+            return solve_expiries(
+                u,
+                time_to_option_expiry,
+                time_to_underlying_expiry,
+                lambda taus, gap: solve_riccati(
+                    lambda times: self.riccati_coefficients(
+                        u, times, taus[-1], None if gap is None else taus[-1] + gap
+                    ),
+                    u.shape,
+                    taus,
+                ),
+            )
+
+        upper_c, upper_d = solve_riccati(
+            lambda times: self.riccati_coefficients(
+                u, times, time_to_option_expiry, time_to_underlying_expiry
+            ),
+            u.shape,
+            time_to_option_expiry,
+        )
+        return (upper_c[()], upper_d[()])
@@ -3,7 +3,12 @@ import numpy as np
 from pydantic import BaseModel
 
 from priceforge.pricing.models.heston import HestonSpotProcess, OrnsteinUhlenbeckProcess
-from priceforge.pricing.models.ode_solver import OdeSolution, RootSign
+from priceforge.pricing.models.ode_solver import (
+    OdeSolution,
+    RiccatiCache,
+    RootSign,
+    solve_expiries,
+)
 from priceforge.pricing.models.parameters import (
     CorrelationParameters,
     CostOfCarryParameters,
@@ -13,12 +18,19 @@ from priceforge.pricing.models.parameters import (
     VolatilityParameters,
 )
 from priceforge.pricing.models.protocol import (
+    AffineModel,
     CharacteristicFunctionODEs,
-    PricingModel,
+    SimulatableModel,
     StochasticProcess,
 )
 import mpmath
 
+KUMMER_MAX_TERMS = 10_000
+KUMMER_TOLERANCE = 1e-12
+# relative cancellation accepted when combining the two solutions of
+# Kummer's equation in double precision
+ANALYTICAL_TOLERANCE = 1e-10
+
 
 def kummer(a, b, x):
     return mpmath.hyp1f1(a, b, x)
@@ -28,6 +40,63 @@ def tricomi(a, b, x):
     return mpmath.hyperu(a, b, x)
 
 
+def log_kummer(
+    a: Union[complex, np.ndarray],
+    b: Union[complex, np.ndarray],
+    z: Union[complex, np.ndarray],
+) -> Union[complex, np.ndarray]:
+    """
+    log(M(a, b, z)) on complex arrays, up to a multiple of 2 pi i.
+
+    Summed from the power series after Kummer's transformation
+    M(a, b, z) = exp(z) M(b - a, b, -z) to Re(z) >= 0, where the terms do not
+    alternate in sign. Elements where the series does not converge, or
+    cancellation leaves less than KUMMER_TOLERANCE relative accuracy, fall
+    back to mpmath.
+    """
+    a, b, z = np.broadcast_arrays(*(np.asarray(x, dtype=complex) for x in (a, b, z)))
+
+    reflect = z.real < 0
+    log_scale = np.where(reflect, z, 0.0)
+    series_a = np.where(reflect, b - a, a)
+    series_z = np.where(reflect, -z, z)
+
+    term = np.ones_like(series_z)
+    total = np.ones_like(series_z)
+    total_abs = np.ones(z.shape)
+    converged = np.zeros(z.shape, dtype=bool)
+    eps = np.finfo(float).eps
+
+    with np.errstate(all="ignore"):
+        for n in range(KUMMER_MAX_TERMS):
+            if converged.all():
+                break
+            ratio = (series_a + n) * series_z / ((b + n) * (n + 1))
+            term = np.where(converged, 0.0, term * ratio)
+            total += term
+            total_abs += np.abs(term)
+            # once past the smallest denominator b + n and with the terms
+            # shrinking geometrically, the tail is below the last term
+            converged |= (term == 0.0) | (
+                (np.abs(term) <= eps * np.abs(total))
+                & (np.abs(ratio) < 0.5)
+                & (n > -b.real)
+            )
+
+        log_m = np.array(log_scale + np.log(total))
+        failed = (
+            ~converged
+            | ~np.isfinite(log_m)
+            | ~(eps * total_abs <= KUMMER_TOLERANCE * np.abs(total))
+        )
+
+    log_m[failed] = [
+        complex(mpmath.log(kummer(*args)))
+        for args in zip(a[failed], b[failed], z[failed])
+    ]
+    return log_m[()]
+
+
 class SolverParameters(BaseModel):
     beta_root_sign: RootSign = RootSign.MINUS
     omega_root_sign: RootSign = RootSign.MINUS
@@ -45,6 +114,18 @@ class TrolleSchwartzParameters(BaseModel):
 
 
 class CostOfCarryProcess(StochasticProcess):
+    """
+    Factors of the cost-of-carry part of the futures curve, driven by
+    sqrt(v) dW with v the variance of the volatility process:
+
+        X = int sqrt(v) dW,  Y = int exp(-gamma (t - s)) sqrt(v) dW,
+        Z_k = int exp(-k gamma (t - s)) v ds,  k = 0, 1, 2.
+
+    The futures volatility alpha / gamma (1 - exp(-gamma (T - t))) is then a
+    combination of these with weights depending only on T - t, so the whole
+    curve is spanned by the five factors.
+    """
+
     def __init__(self, alpha: float, gamma: float):
         self.alpha = alpha
         self.gamma = gamma
@@ -53,18 +134,39 @@ class CostOfCarryProcess(StochasticProcess):
         return np.array([1])
 
     def initial_state(self) -> np.ndarray:
-        return np.array(np.nan)
+        return np.zeros(5)
 
-    def drift(self, time: float, current_state: np.ndarray) -> Union[float, np.ndarray]:
-        return np.nan
+    def drift(
+        self, time: float, current_state: np.ndarray, variance: np.ndarray
+    ) -> Union[float, np.ndarray]:
+        _, y, _, z1, z2 = current_state.T
+        return np.array(
+            [
+                np.zeros_like(variance),
+                -self.gamma * y,
+                variance,
+                variance - self.gamma * z1,
+                variance - 2 * self.gamma * z2,
+            ]
+        ).T
 
     def volatility(
-        self, time: float, current_state: np.ndarray
+        self, time: float, current_state: np.ndarray, variance: np.ndarray
     ) -> Union[float, np.ndarray]:
-        return np.nan
+        volatility = np.sqrt(variance)
+        zero = np.zeros_like(variance)
+        return np.array([volatility, volatility, zero, zero, zero]).T
 
 
 class TrolleSchwartzCompositeProcess(StochasticProcess):
+    """
+    State (log spot part, variance, X, Y, Z0, Z1, Z2) of the futures curve.
+
+    The spot process carries log F0 + int sigma_s sqrt(v) dW_s minus half its
+    variance, the cost-of-carry factors the rest, and the futures price of
+    any expiry follows from the state without re-simulation.
+    """
+
     def __init__(
         self,
         spot: HestonSpotProcess,
@@ -89,11 +191,14 @@ class TrolleSchwartzCompositeProcess(StochasticProcess):
     def correlation_matrix(self) -> np.ndarray:
         return self._correlation_matrix
 
+    def noise_indices(self) -> np.ndarray:
+        # the cost-of-carry factors share the third Brownian motion
+        return np.array([0, 1, 2, 2, 2, 2, 2])
+
     def initial_state(self) -> np.ndarray:
-        return np.array(
+        return np.concatenate(
             [
-                self.spot_process.initial_state(),
-                self.vol_process.initial_state(),
+                [self.spot_process.initial_state(), self.vol_process.initial_state()],
                 self.cost_of_carry_process.initial_state(),
             ]
         )
@@ -103,9 +208,9 @@ class TrolleSchwartzCompositeProcess(StochasticProcess):
         spot_drift = self.spot_process.drift(time, current_state=current_vol)
         vol_drift = self.vol_process.drift(time, current_state=current_vol)
         cost_of_carry_drift = self.cost_of_carry_process.drift(
-            time, current_state=current_vol
+            time, current_state=current_state[:, 2:], variance=current_vol
         )
-        return np.array([spot_drift, vol_drift, cost_of_carry_drift]).T
+        return np.column_stack([spot_drift, vol_drift, cost_of_carry_drift])
 
     def volatility(
         self, time: float, current_state: np.ndarray
@@ -114,9 +219,55 @@ class TrolleSchwartzCompositeProcess(StochasticProcess):
         spot_vol = self.spot_process.volatility(time, current_state=current_vol)
         vol_of_vol = self.vol_process.volatility(time, current_state=current_vol)
         cost_of_carry_vol = self.cost_of_carry_process.volatility(
-            time, current_state=current_vol
+            time, current_state=current_state[:, 2:], variance=current_vol
+        )
+        return np.column_stack([spot_vol, vol_of_vol, cost_of_carry_vol])
+
+    def forward_curve(
+        self,
+        time: float,
+        current_state: np.ndarray,
+        times_to_underlying_expiry: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Futures prices at `time` of each of `times_to_underlying_expiry`
+        (measured from the start of the simulation), along a new last axis.
+        Contracts that have expired by `time` are NaN.
+        """
+        alpha = self.cost_of_carry_process.alpha
+        gamma = self.cost_of_carry_process.gamma
+        scale = alpha / gamma
+        spot_covariance = self._correlation_matrix[0, 2] * self.spot_process.vol * scale
+
+        remaining = np.asarray(times_to_underlying_expiry, dtype=float) - time
+        decay = np.exp(-gamma * np.maximum(remaining, 0.0))
+        log_spot, _, x, y, z0, z1, z2 = (
+            current_state[..., i, None] for i in range(current_state.shape[-1])
+        )
+        log_forward = (
+            log_spot
+            + scale * (x - decay * y)
+            - 0.5
+            * (
+                (scale**2 + 2 * spot_covariance) * z0
+                - 2 * (scale**2 + spot_covariance) * decay * z1
+                + scale**2 * decay**2 * z2
+            )
         )
-        return np.array([spot_vol, vol_of_vol, cost_of_carry_vol]).T
+        return np.where(remaining >= 0.0, np.exp(log_forward), np.nan)
+
+    def underlying_value(
+        self,
+        time: float,
+        current_state: np.ndarray,
+        time_to_underlying_expiry: Optional[float],
+    ) -> np.ndarray:
+        underlying_time = (
+            time if time_to_underlying_expiry is None else time_to_underlying_expiry
+        )
+        return self.forward_curve(time, current_state, np.array([underlying_time]))[
+            ..., 0
+        ]
 
 
 class TrolleSchwartzODEs(CharacteristicFunctionODEs):
@@ -183,14 +334,165 @@ class TrolleSchwartzODEs(CharacteristicFunctionODEs):
 
         return y_prime
 
-    def analytical_soluton(
+    def riccati_coefficients(
         self,
-        u: complex,
+        u: Union[complex, np.ndarray],
+        times: np.ndarray,
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float],
-    ) -> tuple[complex, complex]:
+    ) -> tuple[Union[complex, np.ndarray], ...]:
         assert isinstance(time_to_underlying_expiry, float)
 
+        spot = self.params.spot
+        volatility = self.params.volatility
+        cost_of_carry = self.params.cost_of_carry
+        correlation = self.params.correlation
+
+        # time axis first, ahead of the axes of u
+        times = times.reshape(times.shape + (1,) * np.ndim(u))
+        b_function = (
+            cost_of_carry.alpha
+            / cost_of_carry.gamma
+            * (
+                1
+                - np.exp(
+                    -cost_of_carry.gamma
+                    * (time_to_underlying_expiry - time_to_option_expiry + times)
+                )
+            )
+        )
+
+        return (
+            0.0,
+            volatility.mean_reversion_rate * volatility.long_term_mean**2,
+            -0.5
+            * (u**2 + 1j * u)
+            * (
+                spot.volatility**2
+                + b_function**2
+                + 2 * correlation.spot_cost_of_carry * spot.volatility * b_function
+            ),
+            -volatility.mean_reversion_rate
+            + 1j
+            * u
+            * volatility.volatility
+            * (
+                correlation.spot_vol * spot.volatility
+                + correlation.vol_cost_of_carry * b_function
+            ),
+            0.5 * volatility.volatility**2,
+        )
+
+    def analytical_solution(
+        self,
+        u: Union[complex, np.ndarray],
+        time_to_option_expiry: Union[float, np.ndarray],
+        time_to_underlying_expiry: Optional[Union[float, np.ndarray]],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        """
+        C and D from Kummer's equation. An array of expiries, broadcast ahead
+        of u, shares the Kummer parameters and the solutions at 1 / omega
+        between all option expiries with the same gap to the underlying
+        expiry, e.g. the contracts of a futures strip, only the solutions at
+        z depend on the time to option expiry.
+        """
+        assert time_to_underlying_expiry is not None
+        u = np.asarray(u, dtype=complex)
+        if np.ndim(time_to_option_expiry) > 0:
+            return solve_expiries(
+                u,
+                time_to_option_expiry,
+                time_to_underlying_expiry,
+                lambda taus, gap: self._analytical_solution(
+                    u, taus.reshape(taus.shape + (1,) * u.ndim), gap
+                ),
+            )
+
+        upper_c, upper_d = self._analytical_solution(
+            u,
+            np.asarray(time_to_option_expiry, dtype=float),
+            time_to_underlying_expiry - time_to_option_expiry,
+        )
+        return upper_c[()], upper_d[()]
+
+    def _analytical_solution(
+        self, u: np.ndarray, taus: np.ndarray, underlying_gap: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        C and D for times to option expiry `taus` broadcasting against u.
+        """
+        beta, omega, mu, a, b = self._kummer_parameters(u, underlying_gap)
+        gamma = self.params.cost_of_carry.gamma
+        z = np.exp(-gamma * taus) / omega
+        inv_omega = 1 / omega
+
+        # The solution g of Kummer's equation with g'/g = -(beta omega + mu)
+        # at 1 / omega is expanded on y1 = M(a, b, z) and
+        # y2 = z**(1 - b) M(a - b + 1, 2 - b, z) instead of M and U(a, b, z):
+        # U is dominated by a huge multiple of M, which g cancels to many
+        # digits. Only ratios of g enter C and D, so everything is scaled by
+        # y1(1 / omega) and y2(1 / omega).
+        log_m0, dlog_m0, log_n0, dlog_n0 = _kummer_solutions(a, b, inv_omega)
+        log_m, dlog_m, log_n, dlog_n = _kummer_solutions(a, b, z)
+
+        with np.errstate(all="ignore"):
+            initial_slope = beta * omega + mu
+            y2_0 = -(dlog_m0 + initial_slope) / (dlog_n0 + initial_slope)
+            y1 = np.exp(log_m - log_m0)
+            # z / (1 / omega) = exp(-gamma tau)
+            y2 = y2_0 * np.exp(-(1 - b) * gamma * taus + log_n - log_n0)
+
+            g0 = 1 + y2_0
+            gend = y1 + y2
+            g1end = y1 * dlog_m + y2 * dlog_n
+
+            upper_d = (
+                (2 * gamma)
+                / (self.params.volatility.volatility**2)
+                * (beta + mu * z + z * g1end / gend)
+            )
+            upper_c = (
+                -2
+                * self.params.volatility.mean_reversion_rate
+                * self.params.volatility.long_term_mean**2
+                / self.params.volatility.volatility**2
+                * (beta * np.log(omega * z) + mu * (z - inv_omega) + np.log(gend / g0))
+            )
+
+            cancellation = np.maximum.reduce(
+                [
+                    np.broadcast_to((1 + np.abs(y2_0)) / np.abs(g0), upper_d.shape),
+                    (np.abs(y1) + np.abs(y2)) / np.abs(gend),
+                    (np.abs(y1 * dlog_m) + np.abs(y2 * dlog_n)) / np.abs(g1end),
+                ]
+            )
+            failed = ~np.isfinite(upper_c) | ~np.isfinite(upper_d)
+            failed |= ~(np.finfo(float).eps * cancellation <= ANALYTICAL_TOLERANCE)
+
+        if failed.any():
+            # degenerate b or heavy cancellation: integrate the Riccati
+            # equations of these nodes instead
+            solution = np.vectorize(
+                lambda u_value, tau: self.numerical_solution(
+                    u_value, tau, tau + underlying_gap
+                ),
+                otypes=[complex, complex],
+            )
+            upper_c, upper_d = np.array(upper_c), np.array(upper_d)
+            upper_c[failed], upper_d[failed] = solution(
+                np.broadcast_to(u, failed.shape)[failed],
+                np.broadcast_to(taus, failed.shape)[failed],
+            )
+        return upper_c, upper_d
+
+    def _kummer_parameters(
+        self, u: Union[complex, np.ndarray], underlying_gap: float
+    ) -> tuple:
+        """
+        beta, omega, mu and the parameters a, b of Kummer's equation. They
+        depend on the expiries only through the gap between underlying and
+        option expiry.
+        """
         spot = self.params.spot
         volatility = self.params.volatility
         cost_of_carry = self.params.cost_of_carry
@@ -210,10 +512,7 @@ class TrolleSchwartzODEs(CharacteristicFunctionODEs):
             * correlation.vol_cost_of_carry
             * cost_of_carry.alpha
             / cost_of_carry.gamma
-            * np.exp(
-                -cost_of_carry.gamma
-                * (time_to_underlying_expiry - time_to_option_expiry)
-            )
+            * np.exp(-cost_of_carry.gamma * underlying_gap)
         )
 
         d_0 = (
@@ -241,10 +540,7 @@ class TrolleSchwartzODEs(CharacteristicFunctionODEs):
                 cost_of_carry.alpha / cost_of_carry.gamma
                 + correlation.spot_cost_of_carry * spot.volatility
             )
-            * np.exp(
-                -cost_of_carry.gamma
-                * (time_to_underlying_expiry - time_to_option_expiry)
-            )
+            * np.exp(-cost_of_carry.gamma * underlying_gap)
         )
 
         d_2 = (
@@ -252,11 +548,7 @@ class TrolleSchwartzODEs(CharacteristicFunctionODEs):
             * (u**2 + 1j * u)
             / 4
             * (cost_of_carry.alpha / cost_of_carry.gamma) ** 2
-            * np.exp(
-                -2
-                * cost_of_carry.gamma
-                * (time_to_underlying_expiry - time_to_option_expiry)
-            )
+            * np.exp(-2 * cost_of_carry.gamma * underlying_gap)
         )
 
         beta = (beta_pm * (c_0**2 - 4 * d_0) ** 0.5 - c_0) / (2 * cost_of_carry.gamma)
@@ -269,109 +561,137 @@ class TrolleSchwartzODEs(CharacteristicFunctionODEs):
             - d_1 * omega / cost_of_carry.gamma**2
         )
         b = 2 * beta + 1 + c_0 / cost_of_carry.gamma
-
-        z = np.exp(-cost_of_carry.gamma * (time_to_option_expiry)) / omega
-
-        inv_omega = 1 / omega
-
-        kumm = kummer(a, b, inv_omega)
-        kumm1 = kummer(a + 1, b + 1, inv_omega)
-        tric = tricomi(a, b, inv_omega)
-        tric1 = tricomi(a + 1, b + 1, inv_omega)
-
-        k1 = 1
-        k2 = (
-            -k1
-            * ((beta * omega + mu) * kumm + a / b * kumm1)
-            / ((beta * omega + mu) * tric - a * tric1)
+        return beta, omega, mu, a, b
+
+
+def _kummer_solutions(a, b, z) -> tuple:
+    """
+    Logarithms and logarithmic derivatives of M(a, b, z) and of
+    M(a - b + 1, 2 - b, z), the latter including the factor z**(1 - b).
+    """
+    log_m = log_kummer(a, b, z)
+    log_n = log_kummer(a - b + 1, 2 - b, z)
+    with np.errstate(all="ignore"):
+        dlog_m = a / b * np.exp(log_kummer(a + 1, b + 1, z) - log_m)
+        dlog_n = (1 - b) / z + (a - b + 1) / (2 - b) * np.exp(
+            log_kummer(a - b + 2, 3 - b, z) - log_n
         )
+    return log_m, dlog_m, log_n, dlog_n
 
-        g0 = k1 * kumm + k2 * tric
-        gend = k1 * kummer(a, b, z) + k2 * tricomi(a, b, z)
-        g1end = k1 * a / b * kummer(a + 1, b + 1, z) - k2 * a * tricomi(a + 1, b + 1, z)
-
-        upper_d = (
-            (2 * cost_of_carry.gamma)
-            / (volatility.volatility**2)
-            * (beta + mu * z + z * g1end / gend)
-        )
-        upper_c = (
-            -2
-            * volatility.mean_reversion_rate
-            * volatility.long_term_mean**2
-            / volatility.volatility**2
-            * (
-                beta * mpmath.log(omega * z)
-                + mu * (z - inv_omega)
-                + mpmath.log(gend)
-                - mpmath.log(g0)
-            )
-        )
-        upper_c, upper_d = complex(upper_c), complex(upper_d)
-        return upper_c, upper_d
 
-
-class TrolleSchwartzModel(PricingModel):
+class TrolleSchwartzModel(AffineModel, SimulatableModel):
     params_class = TrolleSchwartzParameters
     characteristic_function_odes: TrolleSchwartzODEs
+    process: TrolleSchwartzCompositeProcess
+    riccati_cache = RiccatiCache()
 
     def __init__(
         self,
         params: TrolleSchwartzParameters,
+        riccati_cache: Optional[RiccatiCache] = None,
     ):
         self.params = params
+        if riccati_cache is not None:
+            self.riccati_cache = riccati_cache
+
+    @property
+    def params(self) -> TrolleSchwartzParameters:
+        return self._params
 
+    @params.setter
+    def params(self, params: TrolleSchwartzParameters):
+        # the ODEs and the process are rebuilt when the parameters are replaced
+        self._params = params
         self.characteristic_function_odes = TrolleSchwartzODEs(params)
 
-        # heston_process = HestonSpotProcess(
-        #     spot=params.spot.value, rate=0, vol=params.spot.volatility
-        # )
-        #
-        # vol_process = OrnsteinUhlenbeckProcess(
-        #     initial_variance=params.volatility.value**2,
-        #     mean_reversion_rate=params.volatility.mean_reversion_rate,
-        #     long_term_mean=params.volatility.long_term_mean**2,
-        #     vol_of_vol=params.volatility.volatility,
-        # )
-        #
-        # cost_of_carry_process = CostOfCarryProcess(
-        #     alpha=params.cost_of_carry.alpha, gamma=params.cost_of_carry.gamma
-        # )
-        #
-        # self.process = TrolleSchwartzCompositeProcess(
-        #     spot=heston_process,
-        #     vol=vol_process,
-        #     cost_of_carry=cost_of_carry_process,
-        #     spot_vol_corr=params.correlation.spot_vol,
-        #     spot_cost_of_carry_corr=params.correlation.spot_cost_of_carry,
-        #     vol_cost_of_carry_corr=params.correlation.vol_cost_of_carry,
-        # )
-
-    def characteristic_function(
+        # futures are martingales, the spot process carries the initial
+        # (flat) futures curve and no rate
+        heston_process = HestonSpotProcess(
+            spot=params.forward.value, rate=0, vol=params.spot.volatility
+        )
+
+        vol_process = OrnsteinUhlenbeckProcess(
+            initial_variance=params.volatility.value**2,
+            mean_reversion_rate=params.volatility.mean_reversion_rate,
+            long_term_mean=params.volatility.long_term_mean**2,
+            vol_of_vol=params.volatility.volatility,
+        )
+
+        cost_of_carry_process = CostOfCarryProcess(
+            alpha=params.cost_of_carry.alpha, gamma=params.cost_of_carry.gamma
+        )
+
+        self.process = TrolleSchwartzCompositeProcess(
+            spot=heston_process,
+            vol=vol_process,
+            cost_of_carry=cost_of_carry_process,
+            spot_vol_corr=params.correlation.spot_vol,
+            spot_cost_of_carry_corr=params.correlation.spot_cost_of_carry,
+            vol_cost_of_carry_corr=params.correlation.vol_cost_of_carry,
+        )
+
+    def underlying_value(self) -> float:
+        return self.params.forward.value
+
+    def initial_variance(self) -> float:
+        return self.params.volatility.value**2
+
+    def affine_terms(
         self,
-        u: complex,
+        u: Union[complex, np.ndarray],
         time_to_option_expiry: float,
         time_to_underlying_expiry: Optional[float] = None,
-    ) -> complex:
-        if u == 0.0 + 0.0j:
-            return 1.0 + 0.0j
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        u = np.asarray(u, dtype=complex)
+        # C and D do not depend on the forward or on v0
+        structure = self.params.model_dump_json(
+            exclude={"forward": {"value"}, "volatility": {"value"}}
+        )
+        return self.riccati_cache.get_or_solve(
+            structure,
+            u,
+            time_to_option_expiry,
+            time_to_underlying_expiry,
+            lambda: self._solve_affine_terms(
+                u, time_to_option_expiry, time_to_underlying_expiry
+            ),
+        )
+
+    def _solve_affine_terms(
+        self,
+        u: np.ndarray,
+        time_to_option_expiry: float,
+        time_to_underlying_expiry: Optional[float],
+    ) -> tuple[Union[complex, np.ndarray], Union[complex, np.ndarray]]:
+        is_zero = u == 0.0 + 0.0j
+        u = np.where(is_zero, 1.0 + 0.0j, u)
 
         match self.params.ode_solution:
             case OdeSolution.ANALYTICAL:
-                upper_c, upper_d = self.characteristic_function_odes.analytical_soluton(
-                    u, time_to_option_expiry, time_to_underlying_expiry
+                upper_c, upper_d = (
+                    self.characteristic_function_odes.analytical_solution(
+                        u, time_to_option_expiry, time_to_underlying_expiry
+                    )
                 )
             case OdeSolution.NUMERICAL:
                 upper_c, upper_d = self.characteristic_function_odes.numerical_solution(
                     u, time_to_option_expiry, time_to_underlying_expiry
                 )
-
-        psi = np.exp(
-            upper_c
-            + upper_d * self.params.volatility.value**2
-            + 1j * u * np.log(self.params.forward.value)
+            case OdeSolution.NUMERICAL_BATCHED:
+                upper_c, upper_d = (
+                    self.characteristic_function_odes.batched_numerical_solution(
+                        u, time_to_option_expiry, time_to_underlying_expiry
+                    )
+                )
+        return (
+            np.where(is_zero, 0.0j, upper_c)[()],
+            np.where(is_zero, 0.0j, upper_d)[()],
         )
-        return psi
+
+    def broadcasts_expiries(self) -> bool:
+        # contracts with the same gap between option and underlying expiry
+        # share their Kummer parameters or their ODE integration
+        return True
 
     def forward(self, time_to_expiry) -> float:
         return self.params.forward.value
@@ -0,0 +1,202 @@
+import datetime as dt
+import itertools
+import json
+import time
+from typing import Any, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from priceforge.models.contracts import Forward, Option, OptionKind, Spot
+from priceforge.pricing.calibration import with_parameter_values
+from priceforge.pricing.engines.surrogate import (
+    SCALE_PARAMETERS,
+    SECONDS_IN_A_YEAR,
+    chebyshev_coefficients,
+    chebyshev_nodes,
+    evaluate_chebyshev,
+    flatten_parameters,
+)
+from priceforge.pricing.models.protocol import PricingModel
+
+# arbitrary valuation time of the sampled options
+BUILD_VALUATION_TIME = dt.datetime(2000, 1, 1)
+
+
+class SurrogateBuildParameters(BaseModel):
+    log_moneyness: tuple[float, float] = (-0.5, 0.5)  # log(K / F)
+    time_to_expiry: tuple[float, float] = (0.1, 2.0)  # in years
+    # "group.field" model parameters spanned by the surrogate, and their ranges
+    parameter_ranges: dict[str, tuple[float, float]] = {}
+    # Chebyshev degree along the log moneyness and time to expiry, and along
+    # each parameter
+    degree: int = 24
+    parameter_degree: int = 8
+    # years from option to underlying expiry, for options on futures
+    underlying_gap: Optional[float] = None
+    n_validation: int = 200  # random points checked against the engine
+    seed: int = 0
+
+
+class SurrogateReport(BaseModel):
+    # the sum of validation_error and truncation_error, on prices normalised
+    # by the discounted forward
+    error_estimate: float
+    validation_error: float  # largest error on the validation points
+    truncation_error: float  # magnitude of the highest-degree coefficients
+    n_samples: int  # prices computed by the engine, validation included
+    wall_time: float  # in seconds
+
+
+def build_surrogate(
+    model: PricingModel,
+    engine: Any,
+    path: str,
+    params: SurrogateBuildParameters = SurrogateBuildParameters(),
+) -> SurrogateReport:
+    """
+    Sample the call prices of `engine` for `model` on the tensor Chebyshev
+    extrema of (log moneyness, time to expiry, parameter_ranges), and save
+    the coefficients of their interpolant to `path` (.npz) for
+    `SurrogateEngine`.
+
+    Prices are normalised by the discounted forward, so the surrogate holds
+    for any spot or forward level and rate; other parameters outside
+    `parameter_ranges` are fixed to those of `model`. The error estimate
+    adds the largest error on `n_validation` random points of the domain,
+    priced with `engine`, to the size of the highest-degree coefficients
+    along each axis, as a measure of what a higher degree would still change.
+    It is not a bound: the error between the validation points can be larger.
+
+    Returns:
+        SurrogateReport: Error estimate and cost of the build
+    """
+    start = time.perf_counter()
+    names = list(params.parameter_ranges)
+    assert not set(names) & set(
+        SCALE_PARAMETERS
+    ), f"{SCALE_PARAMETERS} only scale the prices."
+    lower = np.array(
+        [params.log_moneyness[0], params.time_to_expiry[0]]
+        + [bounds[0] for bounds in params.parameter_ranges.values()]
+    )
+    upper = np.array(
+        [params.log_moneyness[1], params.time_to_expiry[1]]
+        + [bounds[1] for bounds in params.parameter_ranges.values()]
+    )
+    degrees = [params.degree, params.degree] + [params.parameter_degree] * len(names)
+    nodes = [
+        lower[i] + (upper[i] - lower[i]) * (chebyshev_nodes(degree) + 1) / 2
+        for i, degree in enumerate(degrees)
+    ]
+
+    values = np.empty([degree + 1 for degree in degrees])
+    for index in itertools.product(*(range(len(axis)) for axis in nodes[2:])):
+        parameters = [nodes[2 + i][j] for i, j in enumerate(index)]
+        grid = np.array(list(itertools.product(nodes[0], nodes[1])))
+        values[(slice(None), slice(None)) + index] = _normalized_call_prices(
+            model, engine, names, parameters, grid[:, 0], grid[:, 1], params
+        ).reshape(len(nodes[0]), len(nodes[1]))
+    coefficients = chebyshev_coefficients(values)
+
+    rng = np.random.default_rng(params.seed)
+    validation_points = lower + (upper - lower) * rng.random(
+        (params.n_validation, len(lower))
+    )
+    expected = np.concatenate(
+        [
+            _normalized_call_prices(
+                model, engine, names, point[2:], point[:1], point[1:2], params
+            )
+            for point in validation_points
+        ]
+    )
+    validation_error = float(
+        np.max(
+            np.abs(
+                evaluate_chebyshev(coefficients, validation_points, lower, upper)
+                - expected
+            ),
+            initial=0.0,
+        )
+    )
+    truncation_error = float(
+        sum(
+            np.abs(np.take(coefficients, [-2, -1], axis=axis)).sum()
+            for axis in range(coefficients.ndim)
+        )
+    )
+
+    fixed_parameters = {
+        name: value
+        for name, value in flatten_parameters(
+            model.params.model_dump(mode="json")
+        ).items()
+        if name not in names and name not in SCALE_PARAMETERS
+    }
+    report = SurrogateReport(
+        error_estimate=validation_error + truncation_error,
+        validation_error=validation_error,
+        truncation_error=truncation_error,
+        n_samples=values.size + params.n_validation,
+        wall_time=time.perf_counter() - start,
+    )
+    metadata = {
+        "model_class": type(model).__name__,
+        "fixed_parameters": fixed_parameters,
+        "underlying_gap": params.underlying_gap,
+        "error_estimate": report.error_estimate,
+    }
+    with open(path, "wb") as file:
+        np.savez(
+            file,
+            coefficients=coefficients,
+            lower=lower,
+            upper=upper,
+            names=np.array(names, dtype=str),
+            metadata=np.array(json.dumps(metadata)),
+        )
+    return report
+
+
+def _normalized_call_prices(
+    model: PricingModel,
+    engine: Any,
+    names: list[str],
+    parameters: Any,
+    log_moneyness: np.ndarray,
+    taus: np.ndarray,
+    params: SurrogateBuildParameters,
+) -> np.ndarray:
+    """
+    C / (B F) of calls at the given log moneyness and times to expiry, for
+    the model with the selected parameters set to `parameters`.
+    """
+    model = type(model)(with_parameter_values(model.params, names, parameters))
+    forwards = np.array([model.forward(tau) for tau in taus])
+    discounts = np.array([model.zero_coupon_bond(tau) for tau in taus])
+
+    options = []
+    for tau, strike in zip(taus, forwards * np.exp(log_moneyness)):
+        expiry = BUILD_VALUATION_TIME + dt.timedelta(seconds=tau * SECONDS_IN_A_YEAR)
+        underlying: Any = Spot(symbol="")
+        if params.underlying_gap is not None:
+            underlying = Forward(
+                underlying=underlying,
+                expiry=expiry
+                + dt.timedelta(seconds=params.underlying_gap * SECONDS_IN_A_YEAR),
+            )
+        options.append(
+            Option(
+                underlying=underlying,
+                expiry=expiry,
+                strike=float(strike),
+                option_kind=OptionKind.CALL,
+            )
+        )
+
+    if hasattr(engine, "price_strip"):
+        prices = engine.price_strip(model, options, BUILD_VALUATION_TIME)
+    else:
+        prices = engine.price_many(model, options, BUILD_VALUATION_TIME)
+    return prices / (discounts * forwards)
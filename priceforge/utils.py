@@ -1,5 +1,6 @@
+from collections import OrderedDict
 from enum import Enum
-from typing import Type, TypeVar, Union
+from typing import Any, Hashable, Type, TypeVar, Union
 
 
 E = TypeVar("E", bound=Enum)
@@ -33,3 +34,35 @@ def parse_enum(
     raise TypeError(
         f"Value must be string or {enum_class.__name__}, " f"got {type(value).__name__}"
     )
+
+
+class LRUCache:
+    """Dictionary holding at most `maxsize` entries, evicting the least recently used."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        return self[key]
+
+    def clear(self) -> None:
+        self._data.clear()
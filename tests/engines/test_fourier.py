@@ -1,15 +1,24 @@
 import datetime as dt
+import numpy as np
 import pytest
 from numpy.testing import assert_almost_equal
+from scipy.stats import norm
 
 from priceforge.models.contracts import Forward, Option, OptionKind, Spot
-from priceforge.pricing.engines.closed_form import ClosedFormEngine
+from priceforge.pricing.engines.closed_form import (
+    ClosedFormEngine,
+    ClosedFormParameters,
+)
 from priceforge.pricing.engines.fourier import (
     FourierEngine,
     FourierMethod,
     FourierParameters,
+    Quadrature,
+    fractional_fft,
+    quadrature_rule,
 )
 from priceforge.pricing.models import ode_solver
+from priceforge.pricing.models.black_76 import Black76Model, Black76Parameters
 from priceforge.pricing.models.black_scholes import (
     BlackScholesModel,
     BlackScholesParameters,
@@ -32,30 +41,52 @@ from priceforge.pricing.models.trolle_schwartz import (
 )
 
 
-# def test_black_scholes():
-#     spot_params = SpotParameters(value=100, volatility=0.16)
-#     rate_params = RateParameters(value=0.0)
-#
-#     model = BlackScholesModel(
-#         BlackScholesParameters(spot=spot_params, rate=rate_params)
-#     )
-#
-#     f_engine = FourierEngine(method=FourierMethod.CARR_MADAN)
-#     cf_engine = ClosedFormEngine()
-#
-#     initial_time = dt.datetime(1900, 1, 1)
-#     expiry = initial_time + dt.timedelta(days=365)
-#     option = Option(
-#         underlying=Spot(symbol="AAPL"),
-#         strike=100.0,
-#         option_kind=OptionKind.CALL,
-#         expiry=expiry,
-#     )
-#
-#     price = f_engine.price(model=model, option=option, initial_time=initial_time)
-#     expected_price = cf_engine.price(model, option, initial_time)
-#
-#     assert_almost_equal(price, expected_price, decimal=4)
+@pytest.mark.parametrize(
+    "method",
+    [
+        FourierMethod.CARR_MADAN,
+        FourierMethod.CARR_MADAN_FFT,
+        FourierMethod.COS,
+        FourierMethod.HESTON_ORIGINAL,
+        FourierMethod.LEWIS,
+    ],
+)
+@pytest.mark.parametrize(
+    "model",
+    [
+        BlackScholesModel(
+            BlackScholesParameters(
+                spot=SpotParameters(value=100, volatility=0.16),
+                rate=RateParameters(value=0.05),
+            )
+        ),
+        Black76Model(
+            Black76Parameters(
+                forward=ForwardParameters(value=100, volatility=0.16),
+                rate=RateParameters(value=0.05),
+            )
+        ),
+    ],
+)
+@pytest.mark.parametrize("option_kind", [OptionKind.CALL, OptionKind.PUT])
+def test_black_models(model, method, option_kind):
+    initial_time = dt.datetime(1900, 1, 1)
+    expiry = initial_time + dt.timedelta(days=365)
+    option = Option(
+        underlying=Spot(symbol="AAPL"),
+        strike=110.0,
+        option_kind=option_kind,
+        expiry=expiry,
+    )
+
+    price = FourierEngine(FourierParameters(method=method)).price(
+        model, option, initial_time
+    )
+    expected_price = ClosedFormEngine(ClosedFormParameters()).price(
+        model, option, initial_time
+    )
+
+    assert_almost_equal(price, expected_price, decimal=4)
 
 
 @pytest.mark.parametrize(
@@ -117,7 +148,8 @@ def test_heston(rate, volatility, vol_of_vol, correlation, expected_price):
         (56, 6, 6.3921),
     ],
 )
-def test_trolle_schwartz(forward, years, expected_price):
+@pytest.mark.parametrize("ode_solution", ["NUMERICAL", "NUMERICAL_BATCHED"])
+def test_trolle_schwartz(forward, years, expected_price, ode_solution):
     # params from Sitzia 2018 paper
 
     spot_params = SpotParameters(value=50, volatility=0.2289)
@@ -141,7 +173,7 @@ def test_trolle_schwartz(forward, years, expected_price):
         cost_of_carry=cost_of_carry_params,
         rate=rate_params,
         correlation=corr_params,
-        ode_solution="NUMERICAL",
+        ode_solution=ode_solution,
     )
 
     model = TrolleSchwartzModel(ts_params)
@@ -159,3 +191,786 @@ def test_trolle_schwartz(forward, years, expected_price):
 
     price = engine.price(model, option, initial_time)
     assert_almost_equal(price, expected_price, decimal=4)
+
+
+@pytest.fixture
+def heston_model():
+    return HestonModel(
+        HestonParameters(
+            spot=SpotParameters(value=100, volatility=1),
+            rate=RateParameters(value=0.05),
+            volatility=VolatilityParameters(
+                value=0.16, mean_reversion_rate=2, long_term_mean=0.16, volatility=0.3
+            ),
+            correlation=CorrelationParameters(spot_vol=-0.7),
+            ode_solution="ANALYTICAL",
+        ),
+    )
+
+
+def make_strike_ladder(initial_time, strikes, option_kind, days=365):
+    expiry = initial_time + dt.timedelta(days=days)
+    return [
+        Option(
+            underlying=Spot(symbol="AAPL"),
+            strike=strike,
+            option_kind=option_kind,
+            expiry=expiry,
+        )
+        for strike in strikes
+    ]
+
+
+@pytest.mark.parametrize("option_kind", [OptionKind.CALL, OptionKind.PUT])
+def test_carr_madan_fft_strike_ladder(heston_model, option_kind):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, np.linspace(60.0, 150.0, 19), option_kind
+    )
+
+    quad_engine = FourierEngine(FourierParameters(method=FourierMethod.CARR_MADAN))
+    fft_engine = FourierEngine(FourierParameters(method=FourierMethod.CARR_MADAN_FFT))
+
+    expected_prices = quad_engine.price_many(heston_model, options, initial_time)
+    prices = fft_engine.price_many(heston_model, options, initial_time)
+
+    assert_almost_equal(prices, expected_prices, decimal=4)
+    assert_almost_equal(
+        fft_engine.price(heston_model, options[3], initial_time),
+        expected_prices[3],
+        decimal=4,
+    )
+
+
+def test_put_call_parity(heston_model):
+    initial_time = dt.datetime(1900, 1, 1)
+    calls = make_strike_ladder(initial_time, [80.0, 100.0, 120.0], OptionKind.CALL)
+    puts = make_strike_ladder(initial_time, [80.0, 100.0, 120.0], OptionKind.PUT)
+
+    engine = FourierEngine(FourierParameters())
+    call_prices = engine.price_many(heston_model, calls, initial_time)
+    put_prices = engine.price_many(heston_model, puts, initial_time)
+
+    discount = heston_model.zero_coupon_bond(1.0)
+    forward = heston_model.forward(1.0)
+    assert_almost_equal(
+        call_prices - put_prices,
+        discount * (forward - np.array([80.0, 100.0, 120.0])),
+        decimal=10,
+    )
+    assert all(put_prices > 0)
+
+
+@pytest.mark.parametrize(
+    "method",
+    [FourierMethod.CARR_MADAN, FourierMethod.HESTON_ORIGINAL, FourierMethod.LEWIS],
+)
+@pytest.mark.parametrize(
+    "quadrature", [Quadrature.GAUSS_LEGENDRE, Quadrature.GAUSS_LAGUERRE]
+)
+def test_fixed_node_quadrature(heston_model, method, quadrature):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, [70.0, 90.0, 100.0, 110.0, 140.0], OptionKind.CALL
+    ) + make_strike_ladder(initial_time, [80.0, 100.0], OptionKind.PUT, days=180)
+
+    adaptive_engine = FourierEngine(FourierParameters(method=method))
+    fixed_node_engine = FourierEngine(
+        FourierParameters(method=method, quadrature=quadrature)
+    )
+
+    expected_prices = adaptive_engine.price_many(heston_model, options, initial_time)
+    prices = fixed_node_engine.price_many(heston_model, options, initial_time)
+
+    assert_almost_equal(prices, expected_prices, decimal=4)
+
+
+def test_quadrature_rule_is_cached():
+    nodes, weights = quadrature_rule(Quadrature.GAUSS_LEGENDRE, 64, 100)
+
+    assert quadrature_rule(Quadrature.GAUSS_LEGENDRE, 64, 100)[0] is nodes
+    assert not nodes.flags.writeable
+    assert_almost_equal(weights.sum(), 100)
+    assert_almost_equal(nodes.min(), 0, decimal=1)
+    assert_almost_equal(nodes.max(), 100, decimal=1)
+
+    with pytest.raises(ValueError):
+        quadrature_rule(Quadrature.ADAPTIVE, 64, 100)
+
+
+@pytest.mark.parametrize("days", [30, 365])
+def test_cos(heston_model, days):
+    initial_time = dt.datetime(1900, 1, 1)
+    strikes = np.linspace(60.0, 150.0, 10)
+    options = make_strike_ladder(
+        initial_time, strikes, OptionKind.CALL, days=days
+    ) + make_strike_ladder(initial_time, strikes, OptionKind.PUT, days=days)
+
+    reference_engine = FourierEngine(
+        FourierParameters(
+            quadrature=Quadrature.GAUSS_LEGENDRE,
+            quadrature_nodes=512,
+            integral_truncation=400,
+        )
+    )
+    expected_prices = reference_engine.price_many(heston_model, options, initial_time)
+    prices = FourierEngine(FourierParameters(method=FourierMethod.COS)).price_many(
+        heston_model, options, initial_time
+    )
+
+    assert_almost_equal(prices, expected_prices, decimal=5)
+
+
+@pytest.mark.parametrize(
+    "forward,years,expected_price",
+    [
+        (50, 0, 0.8937),
+        (53, 3, 4.6748),
+    ],
+)
+def test_trolle_schwartz_cos(forward, years, expected_price):
+    model = TrolleSchwartzModel(
+        TrolleSchwartzParameters(
+            spot=SpotParameters(value=50, volatility=0.2289),
+            forward=ForwardParameters(value=forward, volatility=0.2289),
+            volatility=VolatilityParameters(
+                value=0.9877**0.5,
+                mean_reversion_rate=1.0125,
+                long_term_mean=0.9877**0.5,
+                volatility=2.8051,
+            ),
+            cost_of_carry=CostOfCarryParameters(alpha=0.1373, gamma=0.7796),
+            rate=RateParameters(value=0.0),
+            correlation=CorrelationParameters(
+                spot_vol=-0.0912, spot_cost_of_carry=-0.8797, vol_cost_of_carry=-0.1128
+            ),
+            ode_solution="NUMERICAL",
+        )
+    )
+    engine = FourierEngine(FourierParameters(method=FourierMethod.COS))
+
+    initial_time = dt.datetime(2017, 4, 13)
+    option_expiry = initial_time + dt.timedelta(days=365 * years + 15)
+    option = Option(
+        underlying=Forward(
+            underlying=Spot(symbol="TEST"),
+            expiry=option_expiry + dt.timedelta(days=3),
+        ),
+        strike=forward,
+        option_kind=OptionKind.CALL,
+        expiry=option_expiry,
+    )
+
+    assert_almost_equal(
+        engine.price(model, option, initial_time), expected_price, decimal=4
+    )
+
+
+@pytest.mark.parametrize("option_kind", [OptionKind.CALL, OptionKind.PUT])
+def test_lewis(heston_model, option_kind):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, np.linspace(60.0, 150.0, 10), option_kind
+    )
+
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS)
+    ).price_many(heston_model, options, initial_time)
+    prices = FourierEngine(FourierParameters(method=FourierMethod.LEWIS)).price_many(
+        heston_model, options, initial_time
+    )
+
+    assert_almost_equal(prices, expected_prices, decimal=5)
+
+
+@pytest.mark.parametrize(
+    "method, quadrature",
+    [
+        (FourierMethod.CARR_MADAN, Quadrature.ADAPTIVE),
+        (FourierMethod.CARR_MADAN, Quadrature.GAUSS_LEGENDRE),
+        (FourierMethod.CARR_MADAN_FFT, Quadrature.ADAPTIVE),
+    ],
+)
+@pytest.mark.parametrize("days", [7, 365])
+def test_optimal_dampening(heston_model, method, quadrature, days):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, np.linspace(60.0, 150.0, 10), OptionKind.CALL, days=days
+    )
+
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=1024)
+    ).price_many(heston_model, options, initial_time)
+    engine = FourierEngine(
+        FourierParameters(
+            method=method,
+            quadrature=quadrature,
+            optimal_dampening=True,
+            integral_truncation=400,
+            quadrature_nodes=512,
+        )
+    )
+    prices = engine.price_many(heston_model, options, initial_time)
+
+    assert_almost_equal(prices, expected_prices, decimal=4)
+    assert len(engine._dampening_cache) > 0
+
+
+@pytest.mark.parametrize(
+    "method",
+    [FourierMethod.CARR_MADAN, FourierMethod.CARR_MADAN_FFT, FourierMethod.LEWIS],
+)
+@pytest.mark.parametrize("quadrature", [Quadrature.ADAPTIVE, Quadrature.GAUSS_LEGENDRE])
+def test_control_variate(heston_model, method, quadrature):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, np.linspace(80.0, 120.0, 9), OptionKind.PUT, days=7
+    )
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=1024)
+    ).price_many(heston_model, options, initial_time)
+
+    # a truncation far too short for a week's characteristic function
+    params = FourierParameters(
+        method=method,
+        quadrature=quadrature,
+        integral_truncation=25,
+        quadrature_nodes=64,
+        fft_grid_size=256,
+    )
+    prices = FourierEngine(params).price_many(heston_model, options, initial_time)
+    params.control_variate = True
+    cv_prices = FourierEngine(params).price_many(heston_model, options, initial_time)
+
+    assert np.abs(prices - expected_prices).max() > 0.1
+    assert np.abs(cv_prices - expected_prices).max() < 0.01
+
+
+def test_control_variate_unsupported_method(heston_model):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(initial_time, [100.0], OptionKind.CALL)
+    engine = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, control_variate=True)
+    )
+
+    with pytest.raises(ValueError):
+        engine.price_many(heston_model, options, initial_time)
+
+
+@pytest.mark.parametrize(
+    "method",
+    [FourierMethod.CARR_MADAN, FourierMethod.HESTON_ORIGINAL, FourierMethod.LEWIS],
+)
+@pytest.mark.parametrize("days", [7, 365, 5 * 365])
+def test_automatic_truncation(heston_model, method, days):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, np.linspace(60.0, 150.0, 4), OptionKind.CALL, days=days
+    )
+    expected_prices = FourierEngine(
+        FourierParameters(
+            quadrature=Quadrature.GAUSS_LEGENDRE,
+            integral_truncation=3000,
+            quadrature_nodes=8192,
+        )
+    ).price_many(heston_model, options, initial_time)
+
+    engine = FourierEngine(FourierParameters(method=method, automatic_truncation=True))
+    results = [
+        engine.price_with_error_estimate(heston_model, option, initial_time)
+        for option in options
+    ]
+    prices, errors = np.array(results).T
+
+    assert_almost_equal(prices, expected_prices, decimal=6)
+    assert np.all(errors < 1e-5)
+    # up to the accuracy of the reference prices
+    assert np.all(np.abs(prices - expected_prices) <= errors + 1e-8)
+
+
+def test_automatic_truncation_decreases_with_expiry(heston_model):
+    engine = FourierEngine(FourierParameters(automatic_truncation=True))
+    truncations = [
+        engine._integral_truncation(heston_model, tau, None)
+        for tau in [7 / 365, 30 / 365, 1.0, 5.0]
+    ]
+
+    assert np.all(np.diff(truncations) < 0)
+    assert truncations[-1] < FourierParameters().integral_truncation
+
+
+@pytest.mark.parametrize("method", [FourierMethod.CARR_MADAN, FourierMethod.COS])
+def test_slice_error_estimate(heston_model, method):
+    initial_time = dt.datetime(1900, 1, 1)
+    (option,) = make_strike_ladder(initial_time, [120.0], OptionKind.PUT)
+    params = FourierParameters(
+        method=method, quadrature=Quadrature.GAUSS_LEGENDRE, quadrature_nodes=16
+    )
+
+    price, error = FourierEngine(params).price_with_error_estimate(
+        heston_model, option, initial_time
+    )
+    expected_price = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=1024)
+    ).price(heston_model, option, initial_time)
+
+    assert price == FourierEngine(params).price(heston_model, option, initial_time)
+    assert abs(price - expected_price) <= error
+
+
+def test_fractional_fft():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=64) + 1j * rng.normal(size=64)
+    fraction = 0.0123
+
+    indices = np.arange(64)
+    expected = np.exp(-2j * np.pi * fraction * np.outer(indices, indices)) @ values
+
+    assert_almost_equal(fractional_fft(values, fraction), expected, decimal=10)
+    assert_almost_equal(fractional_fft(values, 1 / 64), np.fft.fft(values), decimal=10)
+
+
+def test_carr_madan_frft_default_wide_chain(heston_model):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = [
+        option
+        for option_kind in OptionKind
+        for option in make_strike_ladder(
+            initial_time, np.arange(60.0, 161.0, 5.0), option_kind, days=182
+        )
+    ]
+    expected_prices = FourierEngine(FourierParameters()).price_many(
+        heston_model, options, initial_time
+    )
+
+    prices = FourierEngine(
+        FourierParameters(method=FourierMethod.CARR_MADAN_FRFT)
+    ).price_many(heston_model, options, initial_time)
+
+    np.testing.assert_allclose(prices, expected_prices, rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("days", [30, 182, 730])
+def test_carr_madan_frft_beats_fft_with_fewer_points(heston_model, days):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(
+        initial_time, np.arange(60.0, 161.0, 5.0), OptionKind.CALL, days=days
+    )
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=4096)
+    ).price_many(heston_model, options, initial_time)
+
+    def error(params):
+        prices = FourierEngine(params).price_many(heston_model, options, initial_time)
+        return np.abs(prices - expected_prices).max()
+
+    # an eighth of the points of the default FFT
+    frft_error = error(
+        FourierParameters(method=FourierMethod.CARR_MADAN_FRFT, frft_grid_size=512)
+    )
+    fft_error = error(
+        FourierParameters(method=FourierMethod.CARR_MADAN_FFT, fft_grid_size=4096)
+    )
+
+    assert frft_error < fft_error / 2
+
+
+@pytest.mark.parametrize("frft_log_strike_spacing", [None, 0.001])
+@pytest.mark.parametrize("option_kind", [OptionKind.CALL, OptionKind.PUT])
+@pytest.mark.parametrize("days", [30, 365])
+def test_carr_madan_frft(heston_model, frft_log_strike_spacing, option_kind, days):
+    initial_time = dt.datetime(1900, 1, 1)
+    # a tight listed-strike chain
+    options = make_strike_ladder(
+        initial_time, np.arange(90.0, 111.0), option_kind, days=days
+    )
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=2048)
+    ).price_many(heston_model, options, initial_time)
+
+    # an eighth of the default CARR_MADAN_FFT grid
+    params = FourierParameters(
+        method=FourierMethod.CARR_MADAN_FRFT,
+        frft_grid_size=512,
+        frft_log_strike_spacing=frft_log_strike_spacing,
+        integral_truncation=200,
+        optimal_dampening=True,
+    )
+    prices = FourierEngine(params).price_many(heston_model, options, initial_time)
+
+    assert_almost_equal(prices, expected_prices, decimal=6)
+
+
+def test_carr_madan_frft_strikes_outside_grid(heston_model):
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(initial_time, [50.0, 150.0], OptionKind.CALL)
+    engine = FourierEngine(
+        FourierParameters(
+            method=FourierMethod.CARR_MADAN_FRFT,
+            frft_grid_size=512,
+            frft_log_strike_spacing=0.001,
+        )
+    )
+
+    with pytest.raises(ValueError):
+        engine.price_many(heston_model, options, initial_time)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        # broadcast over expiries
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE),
+        FourierParameters(
+            method=FourierMethod.HESTON_ORIGINAL, quadrature=Quadrature.GAUSS_LAGUERRE
+        ),
+        FourierParameters(
+            method=FourierMethod.LEWIS, quadrature=Quadrature.GAUSS_LEGENDRE
+        ),
+        # priced per expiry
+        FourierParameters(method=FourierMethod.COS),
+        FourierParameters(
+            quadrature=Quadrature.GAUSS_LEGENDRE, automatic_truncation=True
+        ),
+        FourierParameters(method=FourierMethod.LEWIS),
+    ],
+)
+def test_price_surface(heston_model, params):
+    initial_time = dt.datetime(1900, 1, 1)
+    expiries = [initial_time + dt.timedelta(days=days) for days in (30, 365, 730)]
+    strikes = np.linspace(80.0, 120.0, 5)
+    option_kinds = [OptionKind.PUT] * 2 + [OptionKind.CALL] * 3
+
+    engine = FourierEngine(params)
+    prices = engine.price_surface(
+        heston_model, expiries, strikes, option_kinds, initial_time
+    )
+
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=strike,
+            option_kind=option_kind,
+            expiry=expiry,
+        )
+        for expiry in expiries
+        for strike, option_kind in zip(strikes, option_kinds)
+    ]
+    expected_prices = engine.price_many(heston_model, options, initial_time)
+
+    assert prices.shape == (3, 5)
+    assert_almost_equal(prices.ravel(), expected_prices, decimal=10)
+
+
+def test_price_surface_forward_underlying():
+    model = Black76Model(
+        Black76Parameters(
+            forward=ForwardParameters(value=100, volatility=0.16),
+            rate=RateParameters(value=0.05),
+        )
+    )
+    initial_time = dt.datetime(1900, 1, 1)
+    expiries = [initial_time + dt.timedelta(days=days) for days in (30, 365)]
+    underlying_expiries = [expiry + dt.timedelta(days=3) for expiry in expiries]
+    strikes = [90.0, 110.0]
+
+    prices = FourierEngine(FourierParameters(method=FourierMethod.COS)).price_surface(
+        model, expiries, strikes, OptionKind.CALL, initial_time, underlying_expiries
+    )
+    expected_prices = [
+        [model.price(days / 365, strike, OptionKind.CALL) for strike in strikes]
+        for days in (30, 365)
+    ]
+
+    assert_almost_equal(prices, expected_prices, decimal=5)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE),
+        FourierParameters(
+            method=FourierMethod.LEWIS, quadrature=Quadrature.GAUSS_LAGUERRE
+        ),
+        FourierParameters(method=FourierMethod.COS),
+        FourierParameters(method=FourierMethod.CARR_MADAN_FFT),
+        FourierParameters(method=FourierMethod.CARR_MADAN_FRFT, optimal_dampening=True),
+    ],
+)
+def test_greeks_black_scholes(params):
+    model = BlackScholesModel(
+        BlackScholesParameters(
+            spot=SpotParameters(value=100, volatility=0.2),
+            rate=RateParameters(value=0.05),
+        )
+    )
+    initial_time = dt.datetime(1900, 1, 1)
+    strikes = np.array([80.0, 100.0, 120.0])
+    options = make_strike_ladder(
+        initial_time, strikes, OptionKind.CALL
+    ) + make_strike_ladder(initial_time, strikes, OptionKind.PUT)
+
+    greeks = FourierEngine(params).price_many_with_greeks(model, options, initial_time)
+
+    d1, _ = model._compute_d1_and_d2(1.0, np.tile(strikes, 2))
+    call_delta = norm.cdf(d1)
+    assert_almost_equal(
+        greeks["price"],
+        [model.price(1.0, option.strike, option.option_kind) for option in options],
+        decimal=5,
+    )
+    assert_almost_equal(
+        greeks["delta"], np.r_[call_delta[:3], call_delta[3:] - 1], decimal=6
+    )
+    assert_almost_equal(greeks["gamma"], norm.pdf(d1) / (100 * 0.2), decimal=6)
+    assert_almost_equal(greeks["vega"], 100 * norm.pdf(d1), decimal=5)
+
+
+def bump_and_reprice(engine, model, options, initial_time, parameter, bump):
+    def reprice(shift):
+        params = model.params.model_copy(deep=True)
+        group, field = parameter.split(".")
+        values = getattr(params, group)
+        setattr(values, field, getattr(values, field) + shift)
+        return engine.price_many(type(model)(params), options, initial_time)
+
+    down, up = reprice(-bump), reprice(bump)
+    centre = engine.price_many(model, options, initial_time)
+    return (up - down) / (2 * bump), (up - 2 * centre + down) / bump**2
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        FourierParameters(method=FourierMethod.COS, cos_terms=512),
+        FourierParameters(
+            quadrature=Quadrature.GAUSS_LEGENDRE,
+            quadrature_nodes=256,
+            integral_truncation=200,
+        ),
+    ],
+)
+def test_greeks_heston(heston_model, params):
+    initial_time = dt.datetime(1900, 1, 1)
+    strikes = [80.0, 100.0, 120.0]
+    options = make_strike_ladder(
+        initial_time, strikes, OptionKind.CALL, days=90
+    ) + make_strike_ladder(initial_time, strikes, OptionKind.PUT, days=90)
+    engine = FourierEngine(params)
+
+    greeks = engine.price_many_with_greeks(heston_model, options, initial_time)
+
+    delta, gamma = bump_and_reprice(
+        engine, heston_model, options, initial_time, "spot.value", 0.01
+    )
+    vega, _ = bump_and_reprice(
+        engine, heston_model, options, initial_time, "volatility.value", 1e-4
+    )
+    assert_almost_equal(
+        greeks["price"], engine.price_many(heston_model, options, initial_time)
+    )
+    assert_almost_equal(greeks["delta"], delta, decimal=6)
+    assert_almost_equal(greeks["gamma"], gamma, decimal=4)
+    assert_almost_equal(greeks["vega"], vega, decimal=5)
+
+
+def test_greeks_trolle_schwartz():
+    model = TrolleSchwartzModel(
+        TrolleSchwartzParameters(
+            spot=SpotParameters(value=50, volatility=0.2289),
+            forward=ForwardParameters(value=51, volatility=0.2289),
+            volatility=VolatilityParameters(
+                value=0.9877**0.5,
+                mean_reversion_rate=1.0125,
+                long_term_mean=0.9877**0.5,
+                volatility=2.8051,
+            ),
+            cost_of_carry=CostOfCarryParameters(alpha=0.1373, gamma=0.7796),
+            rate=RateParameters(value=0.0),
+            correlation=CorrelationParameters(
+                spot_vol=-0.0912, spot_cost_of_carry=-0.8797, vol_cost_of_carry=-0.1128
+            ),
+            ode_solution="NUMERICAL",
+        )
+    )
+    engine = FourierEngine(FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE))
+    initial_time = dt.datetime(2017, 4, 13)
+    option_expiry = initial_time + dt.timedelta(days=365)
+    options = [
+        Option(
+            underlying=Forward(
+                underlying=Spot(symbol="TEST"),
+                expiry=option_expiry + dt.timedelta(days=3),
+            ),
+            strike=51.0,
+            option_kind=OptionKind.CALL,
+            expiry=option_expiry,
+        )
+    ]
+
+    greeks = engine.price_many_with_greeks(model, options, initial_time)
+
+    delta, _ = bump_and_reprice(
+        engine, model, options, initial_time, "forward.value", 0.01
+    )
+    vega, _ = bump_and_reprice(
+        engine, model, options, initial_time, "volatility.value", 1e-4
+    )
+    assert_almost_equal(greeks["delta"], delta, decimal=6)
+    assert_almost_equal(greeks["vega"], vega, decimal=5)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        FourierParameters(),
+        FourierParameters(
+            method=FourierMethod.HESTON_ORIGINAL, quadrature=Quadrature.GAUSS_LEGENDRE
+        ),
+        FourierParameters(method=FourierMethod.CARR_MADAN_FFT, control_variate=True),
+    ],
+)
+def test_greeks_unsupported_configuration(heston_model, params):
+    initial_time = dt.datetime(1900, 1, 1)
+    (option,) = make_strike_ladder(initial_time, [100.0], OptionKind.CALL)
+
+    with pytest.raises(ValueError):
+        FourierEngine(params).price_with_greeks(heston_model, option, initial_time)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE),
+        FourierParameters(
+            method=FourierMethod.LEWIS, quadrature=Quadrature.GAUSS_LEGENDRE
+        ),
+        FourierParameters(method=FourierMethod.CARR_MADAN_FFT),
+    ],
+)
+def test_price_many_with_jacobian(heston_model, params):
+    initial_time = dt.datetime(1900, 1, 1)
+    strikes = [80.0, 100.0, 120.0]
+    options = make_strike_ladder(
+        initial_time, strikes, OptionKind.CALL, days=90
+    ) + make_strike_ladder(initial_time, strikes, OptionKind.PUT, days=400)
+    engine = FourierEngine(params)
+
+    prices, jacobian = engine.price_many_with_jacobian(
+        heston_model, options, initial_time
+    )
+
+    assert_almost_equal(prices, engine.price_many(heston_model, options, initial_time))
+    assert jacobian.shape == (len(options), len(heston_model.gradient_parameters))
+    for column, parameter in zip(jacobian.T, heston_model.gradient_parameters):
+        derivative, _ = bump_and_reprice(
+            engine, heston_model, options, initial_time, parameter, 1e-5
+        )
+        assert_almost_equal(column, derivative, decimal=5)
+
+
+def test_price_many_with_jacobian_unsupported_model():
+    model = BlackScholesModel(
+        BlackScholesParameters(
+            spot=SpotParameters(value=100, volatility=0.2),
+            rate=RateParameters(value=0.05),
+        )
+    )
+    initial_time = dt.datetime(1900, 1, 1)
+    options = make_strike_ladder(initial_time, [100.0], OptionKind.CALL)
+    engine = FourierEngine(FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE))
+
+    assert not engine.supports_parameter_jacobian(model)
+    with pytest.raises(ValueError):
+        engine.price_many_with_jacobian(model, options, initial_time)
+
+
+def make_futures_strip(initial_time, strikes, months=6, days_to_futures_expiry=3):
+    options = []
+    for month in range(1, months + 1):
+        expiry = initial_time + dt.timedelta(days=30 * month)
+        underlying = Forward(
+            underlying=Spot(symbol="TEST"),
+            expiry=expiry + dt.timedelta(days=days_to_futures_expiry),
+        )
+        options += [
+            Option(
+                underlying=underlying,
+                strike=strike,
+                option_kind=OptionKind.PUT if strike < 110 else OptionKind.CALL,
+                expiry=expiry,
+            )
+            for strike in strikes
+        ]
+    return options
+
+
+def make_trolle_schwartz_model(ode_solution, forward=110.0):
+    return TrolleSchwartzModel(
+        TrolleSchwartzParameters(
+            spot=SpotParameters(value=100.0, volatility=1),
+            forward=ForwardParameters(value=forward),
+            volatility=VolatilityParameters(
+                value=0.2**0.5,
+                mean_reversion_rate=1.5,
+                long_term_mean=0.2**0.5,
+                volatility=0.3,
+            ),
+            cost_of_carry=CostOfCarryParameters(alpha=0.1, gamma=0.8),
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(
+                spot_vol=-0.3, spot_cost_of_carry=-0.1, vol_cost_of_carry=0.2
+            ),
+            ode_solution=ode_solution,
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "ode_solution", ["ANALYTICAL", "NUMERICAL", "NUMERICAL_BATCHED"]
+)
+@pytest.mark.parametrize(
+    "params",
+    [
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE, quadrature_nodes=64),
+        FourierParameters(
+            method=FourierMethod.LEWIS,
+            quadrature=Quadrature.GAUSS_LEGENDRE,
+            quadrature_nodes=64,
+        ),
+        # priced per contract
+        FourierParameters(method=FourierMethod.COS, cos_terms=64),
+    ],
+)
+def test_price_strip_trolle_schwartz(ode_solution, params):
+    model = make_trolle_schwartz_model(ode_solution)
+    initial_time = dt.datetime(2017, 4, 13)
+    options = make_futures_strip(initial_time, [100.0, 110.0, 120.0])
+    engine = FourierEngine(params)
+
+    prices = engine.price_strip(model, options, initial_time)
+
+    expected_prices = engine.price_many(model, options, initial_time)
+    assert_almost_equal(prices, expected_prices, decimal=8)
+
+
+def test_price_strip_forwards():
+    model = make_trolle_schwartz_model("ANALYTICAL")
+    initial_time = dt.datetime(2017, 4, 13)
+    options = make_futures_strip(initial_time, [100.0, 110.0, 120.0], months=2)
+    forwards = np.repeat([105.0, 115.0], 3)
+    engine = FourierEngine(FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE))
+
+    prices = engine.price_strip(model, options, initial_time, forwards)
+
+    expected_prices = np.concatenate(
+        [
+            engine.price_many(
+                make_trolle_schwartz_model("ANALYTICAL", forward),
+                options[3 * i : 3 * i + 3],
+                initial_time,
+            )
+            for i, forward in enumerate((105.0, 115.0))
+        ]
+    )
+    assert_almost_equal(prices, expected_prices, decimal=8)
@@ -1,14 +1,22 @@
 import datetime as dt
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from numpy.testing import assert_almost_equal
 import pytest
 
-from priceforge.models.contracts import Option, OptionKind, Spot
+from priceforge.models.contracts import Forward, Option, OptionKind, Spot
 from priceforge.pricing.engines.closed_form import (
     ClosedFormEngine,
     ClosedFormParameters,
 )
-from priceforge.pricing.engines.fourier import FourierEngine, FourierParameters
+from priceforge.pricing.engines.fourier import (
+    FourierEngine,
+    FourierMethod,
+    FourierParameters,
+    Quadrature,
+)
+from priceforge.pricing.engines import monte_carlo
 from priceforge.pricing.engines.monte_carlo import (
     MonteCarloEngine,
     MonteCarloParameters,
@@ -20,10 +28,17 @@ from priceforge.pricing.models.black_scholes import (
 from priceforge.pricing.models.heston import HestonModel, HestonParameters
 from priceforge.pricing.models.parameters import (
     CorrelationParameters,
+    CostOfCarryParameters,
+    ForwardParameters,
     RateParameters,
     SpotParameters,
     VolatilityParameters,
 )
+from priceforge.pricing.models.protocol import SimulationScheme
+from priceforge.pricing.models.trolle_schwartz import (
+    TrolleSchwartzModel,
+    TrolleSchwartzParameters,
+)
 
 
 def generate_random_test_cases(n=50):
@@ -58,7 +73,9 @@ def test_monte_carlo(spot, strike, time_to_expiry, rate, vol, option_kind):
 
     cf_engine = ClosedFormEngine(params=ClosedFormParameters())
     mc_engine = MonteCarloEngine(
-        MonteCarloParameters(n_steps=1, n_paths=1_000_000, antithetic_variates=False)
+        MonteCarloParameters(
+            seed=1, n_steps=1, n_paths=1_000_000, antithetic_variates=False
+        )
     )
 
     valuation_time = dt.datetime(2000, 1, 1)
@@ -98,7 +115,9 @@ def test_monte_carlo_2d(correlation, expected_price):
 
     model = HestonModel(params=heston_params)
     engine = MonteCarloEngine(
-        MonteCarloParameters(n_steps=100, n_paths=100_000, antithetic_variates=True)
+        MonteCarloParameters(
+            seed=0, n_steps=100, n_paths=100_000, antithetic_variates=True
+        )
     )
 
     strike = 100
@@ -117,3 +136,349 @@ def test_monte_carlo_2d(correlation, expected_price):
     print(four_pr)
 
     assert_almost_equal(price, expected_price, decimal=1)
+
+
+@pytest.mark.parametrize(
+    "vol_of_vol,correlation", [(0.3, -0.7), (1.0, -0.9)]  # Feller violated
+)
+def test_monte_carlo_heston_quadratic_exponential(vol_of_vol, correlation):
+    model = HestonModel(
+        HestonParameters(
+            spot=SpotParameters(value=100),
+            rate=RateParameters(value=0.05),
+            volatility=VolatilityParameters(
+                value=0.2,
+                mean_reversion_rate=0.5,
+                long_term_mean=0.2,
+                volatility=vol_of_vol,
+            ),
+            correlation=CorrelationParameters(spot_vol=correlation),
+        )
+    )
+    valuation_time = dt.datetime(2000, 1, 1)
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=strike,
+            option_kind=OptionKind.CALL,
+            expiry=valuation_time + dt.timedelta(days=2 * 365),
+        )
+        for strike in (70.0, 100.0, 140.0)
+    ]
+
+    # a step every quarter
+    prices = MonteCarloEngine(
+        MonteCarloParameters(
+            seed=0,
+            n_steps=8,
+            n_paths=200_000,
+            scheme=SimulationScheme.QUADRATIC_EXPONENTIAL,
+        )
+    ).price_many(model, options, valuation_time)
+
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=1024)
+    ).price_many(model, options, valuation_time)
+    assert_almost_equal(prices, expected_prices, decimal=1)
+
+
+@pytest.mark.parametrize(
+    "scheme",
+    [SimulationScheme.FULL_TRUNCATION, SimulationScheme.QUADRATIC_EXPONENTIAL],
+)
+def test_monte_carlo_heston_schemes_variance(scheme):
+    model = HestonModel(
+        HestonParameters(
+            volatility=VolatilityParameters(
+                value=0.2, mean_reversion_rate=0.5, long_term_mean=0.3, volatility=1.0
+            ),
+        )
+    )
+
+    state = MonteCarloEngine(
+        MonteCarloParameters(seed=0, n_steps=50, n_paths=100_000, scheme=scheme)
+    ).simulate(model.process, 1.0)
+
+    expected_variance = 0.3**2 + (0.2**2 - 0.3**2) * np.exp(-0.5)
+    assert_almost_equal(state[:, 1].mean(), expected_variance, decimal=2)
+    assert_almost_equal(np.exp(state[:, 0]).mean() / 100, 1.0, decimal=2)
+
+
+def test_monte_carlo_heston_quadratic_exponential_infinite_moment():
+    # with a large positive correlation and a single five year step, the
+    # moment behind the martingale correction is infinite on most paths
+    model = HestonModel(
+        HestonParameters(
+            volatility=VolatilityParameters(
+                value=0.5, mean_reversion_rate=2.0, long_term_mean=0.5, volatility=2.0
+            ),
+            correlation=CorrelationParameters(spot_vol=0.9),
+        )
+    )
+
+    state = MonteCarloEngine(
+        MonteCarloParameters(
+            seed=0,
+            n_steps=1,
+            n_paths=100_000,
+            scheme=SimulationScheme.QUADRATIC_EXPONENTIAL,
+        )
+    ).simulate(model.process, 5.0)
+
+    assert np.isfinite(state).all()
+    assert_almost_equal(state[:, 1].mean(), 0.25, decimal=2)
+
+
+def test_monte_carlo_unsupported_scheme():
+    model = BlackScholesModel(BlackScholesParameters())
+    valuation_time = dt.datetime(2000, 1, 1)
+    option = Option(
+        underlying=Spot(symbol="TEST"),
+        strike=100.0,
+        option_kind=OptionKind.CALL,
+        expiry=valuation_time + dt.timedelta(days=365),
+    )
+    engine = MonteCarloEngine(
+        MonteCarloParameters(scheme=SimulationScheme.QUADRATIC_EXPONENTIAL)
+    )
+
+    with pytest.raises(ValueError):
+        engine.price(model, option, valuation_time)
+
+
+@pytest.fixture
+def trolle_schwartz_model():
+    return TrolleSchwartzModel(
+        TrolleSchwartzParameters(
+            spot=SpotParameters(value=100.0, volatility=1),
+            forward=ForwardParameters(value=110.0),
+            volatility=VolatilityParameters(
+                value=0.2**0.5,
+                mean_reversion_rate=1.5,
+                long_term_mean=0.2**0.5,
+                volatility=0.3,
+            ),
+            cost_of_carry=CostOfCarryParameters(alpha=0.1, gamma=0.8),
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(
+                spot_vol=-0.3, spot_cost_of_carry=-0.1, vol_cost_of_carry=0.2
+            ),
+            ode_solution="ANALYTICAL",
+        )
+    )
+
+
+def test_monte_carlo_trolle_schwartz_strip(trolle_schwartz_model):
+    valuation_time = dt.datetime(2017, 4, 13)
+    options = []
+    for months in (1, 6, 12):
+        expiry = valuation_time + dt.timedelta(days=30 * months)
+        underlying = Forward(
+            underlying=Spot(symbol="TEST"), expiry=expiry + dt.timedelta(days=90)
+        )
+        options += [
+            Option(
+                underlying=underlying,
+                strike=strike,
+                option_kind=option_kind,
+                expiry=expiry,
+            )
+            for strike, option_kind in (
+                (100.0, OptionKind.PUT),
+                (120.0, OptionKind.CALL),
+            )
+        ]
+
+    prices = MonteCarloEngine(
+        MonteCarloParameters(seed=0, n_steps=50, n_paths=100_000)
+    ).price_many(trolle_schwartz_model, options, valuation_time)
+
+    expected_prices = FourierEngine(
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE)
+    ).price_strip(trolle_schwartz_model, options, valuation_time)
+    assert_almost_equal(prices, expected_prices, decimal=1)
+
+
+def test_monte_carlo_trolle_schwartz_forward_curve(trolle_schwartz_model):
+    valuation_time = dt.datetime(2017, 4, 13)
+    underlying_expiries = [
+        valuation_time + dt.timedelta(days=days) for days in (90, 365, 730)
+    ]
+    end_time = valuation_time + dt.timedelta(days=365)
+
+    times, curves = MonteCarloEngine(
+        MonteCarloParameters(seed=0, n_steps=20, n_paths=100_000)
+    ).simulate_forward_curve(
+        trolle_schwartz_model, underlying_expiries, end_time, valuation_time
+    )
+
+    assert times.shape == (21,)
+    assert curves.shape == (100_000, 21, 3)
+    assert_almost_equal(curves[:, 0], 110.0)
+    # expired contracts are NaN, the others are martingales
+    assert np.isnan(curves[:, -1, 0]).all()
+    assert_almost_equal(curves[:, -1, 1:].mean(axis=0) / 110.0, 1.0, decimal=2)
+    # contracts further out are less volatile
+    log_returns = np.log(curves[:, 4, 1:] / 110.0)
+    assert log_returns[:, 0].std() > log_returns[:, 1].std()
+
+
+@pytest.mark.parametrize("antithetic_variates", [True, False])
+def test_monte_carlo_chunks(antithetic_variates):
+    model = HestonModel(
+        HestonParameters(
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(spot_vol=-0.5),
+        )
+    )
+    valuation_time = dt.datetime(2000, 1, 1)
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=strike,
+            option_kind=option_kind,
+            expiry=valuation_time + dt.timedelta(days=days),
+        )
+        for days in (90, 365)
+        for strike, option_kind in ((90.0, OptionKind.PUT), (110.0, OptionKind.CALL))
+    ]
+    # an odd last chunk
+    engine = MonteCarloEngine(
+        MonteCarloParameters(
+            seed=0,
+            n_paths=100_001,
+            n_steps=50,
+            chunk_size=10_000,
+            antithetic_variates=antithetic_variates,
+            scheme=SimulationScheme.QUADRATIC_EXPONENTIAL,
+        )
+    )
+
+    prices, standard_errors = engine.price_many_with_standard_errors(
+        model, options, valuation_time
+    )
+
+    expected_prices = FourierEngine(
+        FourierParameters(method=FourierMethod.COS, cos_terms=1024)
+    ).price_many(model, options, valuation_time)
+    assert np.all(standard_errors < 0.05)
+    assert np.all(np.abs(prices - expected_prices) < 4 * standard_errors)
+
+
+def test_monte_carlo_chunks_bound_memory():
+    model = HestonModel(HestonParameters())
+    valuation_time = dt.datetime(2000, 1, 1)
+    option = Option(
+        underlying=Spot(symbol="TEST"),
+        strike=100.0,
+        option_kind=OptionKind.CALL,
+        expiry=valuation_time + dt.timedelta(days=365),
+    )
+
+    def peak_memory(n_paths):
+        engine = MonteCarloEngine(
+            MonteCarloParameters(n_paths=n_paths, n_steps=100, chunk_size=5_000)
+        )
+        tracemalloc.start()
+        engine.price(model, option, valuation_time)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    assert peak_memory(100_000) < 1.5 * peak_memory(10_000)
+
+
+def test_monte_carlo_chunked_paths(trolle_schwartz_model):
+    states = MonteCarloEngine(
+        MonteCarloParameters(n_paths=1_001, n_steps=10, chunk_size=100)
+    ).simulate_paths(trolle_schwartz_model.process, np.array([0.5, 1.0]))
+
+    assert states.shape == (
+        1_001,
+        2,
+        len(trolle_schwartz_model.process.initial_state()),
+    )
+    assert np.isfinite(states).all()
+    # every chunk draws its own samples
+    assert len(np.unique(states[:, -1, 0])) == 1_001
+
+
+@pytest.fixture
+def heston_options():
+    valuation_time = dt.datetime(2000, 1, 1)
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=strike,
+            option_kind=OptionKind.CALL,
+            expiry=valuation_time + dt.timedelta(days=days),
+        )
+        for days in (90, 365)
+        for strike in (90.0, 110.0)
+    ]
+    return HestonModel(HestonParameters()), options, valuation_time
+
+
+def test_monte_carlo_seed(heston_options):
+    model, options, valuation_time = heston_options
+
+    def price(seed):
+        return MonteCarloEngine(
+            MonteCarloParameters(seed=seed, n_paths=10_000, n_steps=20)
+        ).price_many(model, options, valuation_time)
+
+    np.testing.assert_array_equal(price(1), price(1))
+    assert not np.array_equal(price(1), price(2))
+    assert not np.array_equal(price(None), price(None))
+
+
+@pytest.mark.parametrize("antithetic_variates", [True, False])
+def test_monte_carlo_workers(heston_options, antithetic_variates):
+    model, options, valuation_time = heston_options
+
+    def price(n_workers):
+        return MonteCarloEngine(
+            MonteCarloParameters(
+                seed=1,
+                n_paths=20_001,
+                n_steps=20,
+                chunk_size=3_000,
+                antithetic_variates=antithetic_variates,
+                n_workers=n_workers,
+            )
+        ).price_many_with_standard_errors(model, options, valuation_time)
+
+    prices, standard_errors = price(1)
+    for n_workers in (2, 3, 16):
+        parallel_prices, parallel_standard_errors = price(n_workers)
+        np.testing.assert_array_equal(parallel_prices, prices)
+        np.testing.assert_array_equal(parallel_standard_errors, standard_errors)
+
+
+def test_monte_carlo_workers_default_chunks(heston_options, monkeypatch):
+    model, options, valuation_time = heston_options
+    batches = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def map(self, function, *iterables):
+            batches.extend(iterables[0])
+            return super().map(function, *iterables)
+
+    monkeypatch.setattr(monte_carlo, "ProcessPoolExecutor", RecordingExecutor)
+
+    def price(n_workers):
+        return MonteCarloEngine(
+            MonteCarloParameters(
+                seed=1, n_paths=250_000, n_steps=5, n_workers=n_workers
+            )
+        ).price_many_with_standard_errors(model, options, valuation_time)
+
+    prices, standard_errors = price(1)
+    for n_workers in (2, 4):
+        parallel_prices, parallel_standard_errors = price(n_workers)
+        np.testing.assert_array_equal(parallel_prices, prices)
+        np.testing.assert_array_equal(parallel_standard_errors, standard_errors)
+
+    # default chunks of 100_000 paths, spread over the workers
+    paths_per_worker = [sum(size for size, _ in batch) for batch in batches]
+    assert paths_per_worker == [200_000, 50_000] + [100_000, 100_000, 50_000]
@@ -0,0 +1,193 @@
+import datetime as dt
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from priceforge.api import Engine, Model, create_option
+from priceforge.models.contracts import Option, OptionKind, Spot
+from priceforge.pricing.engines.fourier import (
+    FourierEngine,
+    FourierMethod,
+    FourierParameters,
+)
+from priceforge.pricing.engines.surrogate import (
+    SurrogateEngine,
+    SurrogateParameters,
+    chebyshev_coefficients,
+    chebyshev_nodes,
+    evaluate_chebyshev,
+)
+from priceforge.pricing.models.heston import (
+    CorrelationParameters,
+    HestonModel,
+    HestonParameters,
+    RateParameters,
+    SpotParameters,
+    VolatilityParameters,
+)
+from priceforge.pricing.surrogate_builder import (
+    SurrogateBuildParameters,
+    build_surrogate,
+)
+
+VALUATION_TIME = dt.datetime(2024, 1, 1)
+
+
+def make_heston_model(spot=100.0, volatility=0.2, mean_reversion_rate=2.0):
+    return HestonModel(
+        HestonParameters(
+            spot=SpotParameters(value=spot),
+            volatility=VolatilityParameters(
+                value=volatility,
+                mean_reversion_rate=mean_reversion_rate,
+                long_term_mean=0.25,
+                volatility=0.6,
+            ),
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(spot_vol=-0.6),
+        )
+    )
+
+
+@pytest.fixture
+def fourier_engine():
+    return FourierEngine(FourierParameters(method=FourierMethod.COS, cos_terms=256))
+
+
+@pytest.fixture
+def surrogate_path(tmp_path, fourier_engine):
+    path = tmp_path / "heston.npz"
+    report = build_surrogate(
+        make_heston_model(),
+        fourier_engine,
+        str(path),
+        SurrogateBuildParameters(
+            log_moneyness=(-0.4, 0.4),
+            time_to_expiry=(0.25, 2.0),
+            parameter_ranges={"volatility.value": (0.1, 0.4)},
+            degree=16,
+            parameter_degree=6,
+            n_validation=50,
+        ),
+    )
+    assert report.error_estimate < 1e-3
+    assert report.n_samples == 17 * 17 * 7 + 50
+    return path
+
+
+def test_chebyshev_interpolation_is_exact_for_polynomials():
+    lower, upper = np.array([-1.0, 0.0]), np.array([2.0, 1.0])
+    x = lower[0] + (upper[0] - lower[0]) * (chebyshev_nodes(4) + 1) / 2
+    y = lower[1] + (upper[1] - lower[1]) * (chebyshev_nodes(3) + 1) / 2
+
+    def polynomial(x, y):
+        return 1 + x**3 - 2 * x * y**2 + y
+
+    coefficients = chebyshev_coefficients(polynomial(x[:, None], y[None, :]))
+    points = np.random.default_rng(0).uniform(lower, upper, (20, 2))
+
+    np.testing.assert_allclose(
+        evaluate_chebyshev(coefficients, points, lower, upper),
+        polynomial(points[:, 0], points[:, 1]),
+        atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("spot", [100.0, 80.0])
+def test_surrogate_prices(surrogate_path, fourier_engine, spot):
+    surrogate = SurrogateEngine(SurrogateParameters(path=str(surrogate_path)))
+    model = make_heston_model(spot=spot, volatility=0.27)
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=moneyness * spot,
+            option_kind=option_kind,
+            expiry=VALUATION_TIME + dt.timedelta(days=days),
+        )
+        for days in (100, 365, 700)
+        for moneyness in (0.8, 1.0, 1.2)
+        for option_kind in OptionKind
+    ]
+
+    prices = surrogate.price_many(model, options, VALUATION_TIME)
+
+    expected = fourier_engine.price_many(model, options, VALUATION_TIME)
+    discounted_forwards = np.array(
+        [
+            model.zero_coupon_bond(tau) * model.forward(tau)
+            for tau in (
+                (option.expiry - VALUATION_TIME).days / 365 for option in options
+            )
+        ]
+    )
+    assert np.all(
+        np.abs(prices - expected) <= surrogate.error_estimate * discounted_forwards
+    )
+
+
+def test_surrogate_rejects_unsupported_inputs(surrogate_path):
+    surrogate = SurrogateEngine(SurrogateParameters(path=str(surrogate_path)))
+    option = Option(
+        underlying=Spot(symbol="TEST"),
+        strike=100.0,
+        option_kind=OptionKind.CALL,
+        expiry=VALUATION_TIME + dt.timedelta(days=365),
+    )
+
+    with pytest.raises(ValueError, match="volatility.value"):
+        surrogate.price(make_heston_model(volatility=0.5), option, VALUATION_TIME)
+    with pytest.raises(ValueError, match="mean_reversion_rate"):
+        surrogate.price(
+            make_heston_model(mean_reversion_rate=1.0), option, VALUATION_TIME
+        )
+    with pytest.raises(ValueError, match="time_to_expiry"):
+        surrogate.price(
+            make_heston_model(),
+            option.model_copy(update={"expiry": VALUATION_TIME + dt.timedelta(days=7)}),
+            VALUATION_TIME,
+        )
+
+
+def test_surrogate_loads_without_scipy(surrogate_path):
+    script = f"""
+import sys
+
+class BlockScipy:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ("scipy", "mpmath"):
+            raise ImportError(name)
+
+sys.meta_path.insert(0, BlockScipy())
+from priceforge.pricing.engines.surrogate import SurrogateEngine, SurrogateParameters
+
+engine = SurrogateEngine(SurrogateParameters(path={str(surrogate_path)!r}))
+print(engine.evaluate([0.0, 1.0, 0.2])[0])
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parents[2],
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert 0 < float(result.stdout) < 1
+
+
+def test_surrogate_api(surrogate_path):
+    model = Model("HESTON", make_heston_model().params.model_dump(mode="json"))
+    option = create_option("2025-01-01", 100.0, "CALL")
+
+    price = Engine("SURROGATE", path=str(surrogate_path)).price(
+        "2024-01-01", option, model
+    )
+
+    assert price == pytest.approx(
+        Engine("FOURIER", method="COS", cos_terms=256).price(
+            "2024-01-01", option, model
+        ),
+        abs=1e-2,
+    )
@@ -61,3 +61,31 @@ def test_black_76_against_black_scholes(
     )
 
     assert_almost_equal(price, expected_price, decimal=8)
+
+
+def test_characteristic_function_against_black_scholes():
+    rate_parameters = RateParameters(value=0.05)
+    b76_model = Black76Model(
+        Black76Parameters(
+            forward=ForwardParameters(value=100 * np.exp(0.05), volatility=0.2),
+            rate=rate_parameters,
+        )
+    )
+    bs_model = BlackScholesModel(
+        BlackScholesParameters(
+            spot=SpotParameters(value=100, volatility=0.2), rate=rate_parameters
+        )
+    )
+
+    u = np.linspace(-20, 20, 11) - 0.5j
+    assert_almost_equal(
+        b76_model.characteristic_function(u, 1.0, None),
+        bs_model.characteristic_function(u, 1.0, None),
+    )
+    # martingale: E[F_T] = F_0
+    assert_almost_equal(
+        b76_model.characteristic_function(-1j, 1.0, None), 100 * np.exp(0.05)
+    )
+    assert_almost_equal(
+        b76_model.cumulants(1.0, None), bs_model.cumulants(1.0, None), decimal=12
+    )
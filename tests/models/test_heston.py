@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+from priceforge.pricing.models.ode_solver import OdeSolution
 from priceforge.pricing.models.heston import (
     HestonODEs,
     HestonParameters,
@@ -9,6 +10,7 @@ from priceforge.pricing.models.heston import (
     RateParameters,
     CorrelationParameters,
 )
+from priceforge.pricing.models.protocol import PricingModel
 
 
 @pytest.fixture
@@ -67,7 +69,7 @@ def heston_odes(heston_params) -> HestonODEs:
     ],
 )
 def test_uppercase_terms(heston_odes: HestonODEs, u, tau, expected_c, expected_d):
-    analytical_c, analytical_d = heston_odes.analytical_soluton(u, tau, None)
+    analytical_c, analytical_d = heston_odes.analytical_solution(u, tau, None)
     numerical_c, numerical_d = heston_odes.numerical_solution(u, tau, None)
 
     np.testing.assert_almost_equal(
@@ -151,7 +153,9 @@ def test_numerical_vs_analytical(heston_params):
     time_to_option_expiry = 1.1
 
     numerical_c, numerical_d = odes.numerical_solution(u, time_to_option_expiry, None)
-    analytical_c, analytical_d = odes.analytical_soluton(u, time_to_option_expiry, None)
+    analytical_c, analytical_d = odes.analytical_solution(
+        u, time_to_option_expiry, None
+    )
 
     np.testing.assert_almost_equal(
         numerical_d,
@@ -165,3 +169,127 @@ def test_numerical_vs_analytical(heston_params):
         decimal=4,
         err_msg="Numerical C doesn't match analytical C",
     )
+
+
+@pytest.mark.parametrize("tau", [1 / 365, 0.5, 5.0])
+def test_batched_numerical_solution(heston_odes, tau):
+    u = np.concatenate([np.linspace(0.1, 200.0, 101), np.linspace(0.0, 20.0, 11) - 1j])
+
+    batched_c, batched_d = heston_odes.batched_numerical_solution(u, tau, None)
+    analytical_c, analytical_d = heston_odes.analytical_solution(u, tau, None)
+
+    np.testing.assert_allclose(batched_c, analytical_c, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(batched_d, analytical_d, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize(
+    "ode_solution", [OdeSolution.ANALYTICAL, OdeSolution.NUMERICAL]
+)
+def test_vectorized_characteristic_function(heston_params, ode_solution):
+    heston_params.ode_solution = ode_solution
+    heston_model = HestonModel(heston_params)
+
+    u = np.array([[0.0, 1.0, 2.0], [-1 + 2j, 0.5 - 1.75j, 10.0]])
+    result = heston_model.characteristic_function(u, 0.5, None)
+
+    assert result.shape == u.shape
+    assert result[0, 0] == 1.0 + 0.0j
+    for index, u_value in np.ndenumerate(u):
+        np.testing.assert_almost_equal(
+            result[index],
+            heston_model.characteristic_function(u_value, 0.5, None),
+            decimal=12,
+        )
+
+
+@pytest.mark.parametrize("tau", [0.1, 1.0, 5.0])
+@pytest.mark.parametrize("correlation", [-0.7, 0.0, 0.5])
+def test_cumulants(heston_params, tau, correlation):
+    heston_params.correlation.spot_vol = correlation
+    heston_model = HestonModel(heston_params)
+
+    c1, c2, _ = heston_model.cumulants(tau, None)
+    expected_c1, expected_c2, _ = PricingModel.cumulants(heston_model, tau, None)
+
+    np.testing.assert_almost_equal(c1, expected_c1, decimal=6)
+    np.testing.assert_almost_equal(c2, expected_c2, decimal=6)
+
+
+def test_characteristic_function_broadcasts_expiries(heston_params):
+    heston_model = HestonModel(heston_params)
+    assert heston_model.broadcasts_expiries()
+
+    u = np.array([0.0, 1.0, 5.0 - 1.75j])
+    taus = np.array([[0.1], [1.0], [5.0]])
+    result = heston_model.characteristic_function(u, taus, None)
+
+    assert result.shape == (3, 3)
+    for i, tau in enumerate(taus[:, 0]):
+        np.testing.assert_almost_equal(
+            result[i], heston_model.characteristic_function(u, tau, None), decimal=12
+        )
+
+
+def test_affine_terms_cached_across_spot_and_variance_moves(heston_params):
+    heston_model = HestonModel(heston_params)
+    u = np.linspace(0.0, 20.0, 65)
+    heston_model.characteristic_function(u, 0.5, None)
+
+    heston_params.spot.value = 105.0
+    heston_params.volatility.value = 0.25
+    upper_c, upper_d = heston_model._solve_affine_terms(u.astype(complex), 0.5, None)
+    expected = np.exp(upper_c + upper_d * 0.25**2 + 1j * u * np.log(105.0))
+
+    odes = heston_model.characteristic_function_odes
+    solve, calls = odes.analytical_solution, []
+    odes.analytical_solution = lambda *args: calls.append(args) or solve(*args)
+
+    result = heston_model.characteristic_function(u, 0.5, None)
+    assert not calls
+    np.testing.assert_almost_equal(result, expected, decimal=14)
+
+    heston_params.volatility.mean_reversion_rate = 2.0
+    heston_model.characteristic_function(u, 0.5, None)
+    assert len(calls) == 1
+
+
+def test_replaced_params_reach_characteristic_function(heston_params):
+    heston_model = HestonModel(heston_params.model_copy(deep=True))
+    heston_params.volatility.volatility = 0.6
+    heston_model.params = heston_params
+
+    np.testing.assert_almost_equal(
+        heston_model.characteristic_function(np.array([1.0, 2.0]), 1.0, None),
+        HestonModel(heston_params).characteristic_function(
+            np.array([1.0, 2.0]), 1.0, None
+        ),
+        decimal=14,
+    )
+
+
+@pytest.mark.parametrize("tau", [0.1, 1.0, 5.0])
+def test_characteristic_function_gradient(heston_params, tau):
+    model = HestonModel(heston_params)
+    u = np.array([0.0, 0.5 - 1.5j, 3.0 - 1.5j, 20.0 - 0.5j])
+
+    cf, gradient = model.characteristic_function_gradient(u, tau, None)
+
+    np.testing.assert_allclose(cf, model.characteristic_function(u, tau, None))
+    assert gradient.shape == (len(model.gradient_parameters),) + u.shape
+    assert np.all(gradient[:, 0] == 0)
+    bump = 1e-4
+    for derivative, parameter in zip(gradient, model.gradient_parameters):
+        group, field = parameter.split(".")
+
+        def bumped_cf(shift):
+            params = heston_params.model_copy(deep=True)
+            values = getattr(params, group)
+            setattr(values, field, getattr(values, field) + shift)
+            return HestonModel(params).characteristic_function(u, tau, None)
+
+        np.testing.assert_allclose(
+            derivative,
+            (bumped_cf(bump) - bumped_cf(-bump)) / (2 * bump),
+            rtol=1e-5,
+            atol=1e-6,
+        )
@@ -0,0 +1,205 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from priceforge.api import Engine, Model, create_option
+from priceforge.models.contracts import Option, OptionKind, Spot
+from priceforge.pricing.engines.fourier import (
+    FourierEngine,
+    FourierMethod,
+    FourierParameters,
+    Quadrature,
+)
+from priceforge.pricing.models.heston import (
+    CorrelationParameters,
+    HestonModel,
+    HestonParameters,
+    RateParameters,
+    SpotParameters,
+    VolatilityParameters,
+)
+from priceforge.pricing.models.piecewise_heston import (
+    HestonPeriodParameters,
+    PiecewiseHestonModel,
+    PiecewiseHestonParameters,
+)
+
+PERIODS = [
+    HestonPeriodParameters(
+        end=0.25,
+        mean_reversion_rate=1.0,
+        long_term_mean=0.2,
+        volatility=0.4,
+        spot_vol=-0.3,
+    ),
+    HestonPeriodParameters(
+        end=0.75,
+        mean_reversion_rate=3.0,
+        long_term_mean=0.3,
+        volatility=0.8,
+        spot_vol=-0.7,
+    ),
+    HestonPeriodParameters(
+        end=2.0,
+        mean_reversion_rate=1.5,
+        long_term_mean=0.25,
+        volatility=0.5,
+        spot_vol=0.2,
+    ),
+]
+
+
+@pytest.fixture
+def piecewise_model():
+    return PiecewiseHestonModel(
+        PiecewiseHestonParameters(
+            spot=SpotParameters(value=100.0),
+            rate=RateParameters(value=0.02),
+            initial_volatility=0.2,
+            periods=PERIODS,
+        )
+    )
+
+
+def numerical_characteristic_function(params, u, tau):
+    # Heston Riccati equations in time to expiry, with the parameters of the
+    # period at calendar time tau - s
+    def y_prime(s, state):
+        time = tau - s
+        period = next(
+            (period for period in params.periods if time < period.end),
+            params.periods[-1],
+        )
+        upper_c, upper_d = state[0] + 1j * state[1], state[2] + 1j * state[3]
+        upper_c_prime = (
+            period.mean_reversion_rate * period.long_term_mean**2 * upper_d
+            + 1j * u * params.rate.value
+        )
+        upper_d_prime = (
+            -0.5 * (u**2 + 1j * u)
+            + upper_d
+            * (
+                -period.mean_reversion_rate
+                + 1j * u * period.volatility * period.spot_vol
+            )
+            + 0.5 * period.volatility**2 * upper_d**2
+        )
+        return [
+            upper_c_prime.real,
+            upper_c_prime.imag,
+            upper_d_prime.real,
+            upper_d_prime.imag,
+        ]
+
+    solution = solve_ivp(
+        y_prime, (0, tau), [0, 0, 0, 0], rtol=1e-11, atol=1e-12, max_step=0.01
+    )
+    c_real, c_imag, d_real, d_imag = solution.y[:, -1]
+    return np.exp(
+        c_real
+        + 1j * c_imag
+        + (d_real + 1j * d_imag) * params.initial_volatility**2
+        + 1j * u * np.log(params.spot.value)
+    )
+
+
+@pytest.mark.parametrize("tau", [0.1, 0.5, 1.0, 3.0])
+def test_characteristic_function_matches_numerical_solution(piecewise_model, tau):
+    u = np.array([0.5, 3.0, 10.0]) - 0.5j
+
+    cf = piecewise_model.characteristic_function(u, tau, None)
+
+    expected = [
+        numerical_characteristic_function(piecewise_model.params, value, tau)
+        for value in u
+    ]
+    np.testing.assert_allclose(cf, expected, rtol=1e-8, atol=1e-10)
+
+
+@pytest.mark.parametrize("tau", [0.1, 1.0, 3.0])
+def test_constant_periods_match_heston(tau):
+    heston = HestonModel(
+        HestonParameters(
+            volatility=VolatilityParameters(
+                value=0.2, mean_reversion_rate=2.0, long_term_mean=0.25, volatility=0.6
+            ),
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(spot_vol=-0.6),
+        )
+    )
+    period = {
+        "mean_reversion_rate": 2.0,
+        "long_term_mean": 0.25,
+        "volatility": 0.6,
+        "spot_vol": -0.6,
+    }
+    piecewise = PiecewiseHestonModel(
+        PiecewiseHestonParameters(
+            rate=RateParameters(value=0.02),
+            initial_volatility=0.2,
+            periods=[
+                HestonPeriodParameters(end=end, **period) for end in (0.3, 0.7, 1.0)
+            ],
+        )
+    )
+    u = np.linspace(0, 30, 7) - 0.5j
+
+    np.testing.assert_allclose(
+        piecewise.characteristic_function(u, tau, None),
+        heston.characteristic_function(u, tau, None),
+        atol=1e-14,
+    )
+
+
+def test_characteristic_function_broadcasts_expiries(piecewise_model):
+    u = np.linspace(0, 30, 7) - 0.5j
+    taus = np.array([0.1, 0.5, 1.0, 3.0])
+
+    cf = piecewise_model.characteristic_function(u, taus[:, None], None)
+
+    expected = [piecewise_model.characteristic_function(u, tau, None) for tau in taus]
+    np.testing.assert_allclose(cf, expected)
+
+
+def test_unsorted_periods():
+    with pytest.raises(AssertionError):
+        PiecewiseHestonModel(PiecewiseHestonParameters(periods=PERIODS[::-1]))
+
+
+@pytest.mark.parametrize("method", list(FourierMethod))
+def test_fourier_methods(piecewise_model, method):
+    initial_time = dt.datetime(2024, 1, 1)
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=strike,
+            option_kind=OptionKind.CALL,
+            expiry=initial_time + dt.timedelta(days=days),
+        )
+        for days in (30, 180, 400, 800)
+        for strike in (80.0, 100.0, 120.0)
+    ]
+    reference = FourierEngine(
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE, quadrature_nodes=256)
+    ).price_many(piecewise_model, options, initial_time)
+
+    prices = FourierEngine(
+        FourierParameters(method=method, quadrature=Quadrature.GAUSS_LEGENDRE)
+    ).price_many(piecewise_model, options, initial_time)
+
+    np.testing.assert_allclose(prices, reference, atol=1e-3)
+
+
+def test_api():
+    model = Model(
+        "PIECEWISE_HESTON",
+        initial_volatility=0.2,
+        periods=[period.model_dump() for period in PERIODS],
+    )
+    option = create_option("2025-01-01", 100.0, "CALL")
+
+    price = Engine("FOURIER", method="COS").price("2024-01-01", option, model)
+
+    assert 0 < price < 100
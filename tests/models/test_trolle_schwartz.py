@@ -1,6 +1,13 @@
+import os
+import mpmath
 import pytest
 import numpy as np
 
+from priceforge.pricing.models.ode_solver import (
+    OdeSolution,
+    PersistentRiccatiCache,
+    RiccatiCache,
+)
 from priceforge.pricing.models.parameters import (
     CorrelationParameters,
     CostOfCarryParameters,
@@ -9,9 +16,12 @@ from priceforge.pricing.models.parameters import (
     SpotParameters,
     VolatilityParameters,
 )
+from priceforge.pricing.models import trolle_schwartz
 from priceforge.pricing.models.trolle_schwartz import (
+    TrolleSchwartzModel,
     TrolleSchwartzODEs,
     TrolleSchwartzParameters,
+    log_kummer,
 )
 
 
@@ -85,7 +95,7 @@ def test_uppercase_terms(
     numerical_c, numerical_d = ts_odes.numerical_solution(
         u, time_to_option_expiry, time_to_underlying_expiry
     )
-    analytical_c, analytical_d = ts_odes.analytical_soluton(
+    analytical_c, analytical_d = ts_odes.analytical_solution(
         u, time_to_option_expiry, time_to_underlying_expiry
     )
 
@@ -114,3 +124,170 @@ def test_uppercase_terms(
         decimal=8,
         err_msg=f"Numerical solution C mismatch for u={u}, time_to_option_expiry={time_to_option_expiry}, time_to_underlying_expiry={time_to_underlying_expiry}",
     )
+
+
+@pytest.mark.parametrize(
+    "ode_solution", [OdeSolution.ANALYTICAL, OdeSolution.NUMERICAL]
+)
+def test_vectorized_characteristic_function(trolle_schwartz_params, ode_solution):
+    trolle_schwartz_params.ode_solution = ode_solution
+    model = TrolleSchwartzModel(trolle_schwartz_params)
+
+    u = np.array([0.0, 1.0, 1 + 1j, 5 - 1.75j])
+    result = model.characteristic_function(u, 1.0, 1.1)
+
+    assert result.shape == u.shape
+    assert result[0] == 1.0 + 0.0j
+    for index, u_value in np.ndenumerate(u):
+        np.testing.assert_almost_equal(
+            result[index], model.characteristic_function(u_value, 1.0, 1.1), decimal=12
+        )
+
+
+@pytest.mark.parametrize(
+    "a, b, z",
+    [
+        (1.5, 2.5, 3 + 1j),
+        (-0.37 - 0.17j, -0.74 - 0.22j, -0.02 - 0.03j),
+        (-32.3 - 0.46j, -70.8 - 0.73j, -8.48 - 0.02j),
+        (2 + 3j, -4.5 + 1j, 10 - 5j),
+        (-163.5 - 0.46j, -357.7 - 0.73j, -42.4 - 0.02j),
+    ],
+)
+def test_log_kummer(a, b, z):
+    expected = complex(mpmath.log(mpmath.hyp1f1(a, b, z)))
+    np.testing.assert_almost_equal(np.exp(log_kummer(a, b, z) - expected), 1.0)
+
+
+@pytest.mark.parametrize("time_to_option_expiry", [1 / 12, 1.0, 5.0])
+def test_analytical_solution_large_u(trolle_schwartz_params, time_to_option_expiry):
+    ts_odes = TrolleSchwartzODEs(trolle_schwartz_params)
+    time_to_underlying_expiry = time_to_option_expiry + 0.1
+    u = np.array([0.5, 10.0, 50.0, 150.0, 20 - 1.75j])
+
+    analytical_c, analytical_d = ts_odes.analytical_solution(
+        u, time_to_option_expiry, time_to_underlying_expiry
+    )
+    for i, u_value in enumerate(u):
+        numerical_c, numerical_d = ts_odes.numerical_solution(
+            u_value, time_to_option_expiry, time_to_underlying_expiry
+        )
+        np.testing.assert_allclose(analytical_c[i], numerical_c, rtol=1e-7)
+        np.testing.assert_allclose(analytical_d[i], numerical_d, rtol=1e-7)
+
+
+def test_analytical_solution_fallback(trolle_schwartz_params, monkeypatch):
+    # no cancellation is accepted, so every node takes the fallback
+    monkeypatch.setattr(trolle_schwartz, "ANALYTICAL_TOLERANCE", 0.0)
+    ts_odes = TrolleSchwartzODEs(trolle_schwartz_params)
+    u = np.array([1.0, 5.0 - 0.5j, 200.0, 500.0])
+
+    upper_c, upper_d = ts_odes.analytical_solution(u, 1.0, 1.1)
+    for i, u_value in enumerate(u):
+        expected_c, expected_d = ts_odes.numerical_solution(u_value, 1.0, 1.1)
+        assert upper_c[i] == expected_c
+        assert upper_d[i] == expected_d
+
+
+@pytest.mark.parametrize("time_to_option_expiry", [1 / 12, 1.0, 5.0])
+def test_batched_numerical_solution(trolle_schwartz_params, time_to_option_expiry):
+    ts_odes = TrolleSchwartzODEs(trolle_schwartz_params)
+    time_to_underlying_expiry = time_to_option_expiry + 0.1
+    u = np.concatenate([np.linspace(0.1, 200.0, 101), np.linspace(0.0, 20.0, 11) - 1j])
+
+    batched_c, batched_d = ts_odes.batched_numerical_solution(
+        u, time_to_option_expiry, time_to_underlying_expiry
+    )
+    analytical_c, analytical_d = ts_odes.analytical_solution(
+        u, time_to_option_expiry, time_to_underlying_expiry
+    )
+
+    np.testing.assert_allclose(batched_c, analytical_c, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(batched_d, analytical_d, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize(
+    "ode_solution",
+    [OdeSolution.ANALYTICAL, OdeSolution.NUMERICAL, OdeSolution.NUMERICAL_BATCHED],
+)
+def test_expiry_array_characteristic_function(trolle_schwartz_params, ode_solution):
+    trolle_schwartz_params.ode_solution = ode_solution
+    model = TrolleSchwartzModel(trolle_schwartz_params)
+    u = np.array([0.5, 3.0, 10 - 1j])
+    # two gaps to the underlying expiry, shared by two expiries each
+    time_to_option_expiry = np.array([[0.25], [0.5], [1.0], [2.0]])
+    time_to_underlying_expiry = time_to_option_expiry + np.array([[0.1], [0.2]] * 2)
+
+    result = model.characteristic_function(
+        u, time_to_option_expiry, time_to_underlying_expiry
+    )
+
+    assert result.shape == (4, 3)
+    for (i, j), value in np.ndenumerate(result):
+        expected = model.characteristic_function(
+            u[j], time_to_option_expiry[i, 0], time_to_underlying_expiry[i, 0]
+        )
+        np.testing.assert_allclose(value, expected, rtol=1e-6)
+
+
+@pytest.fixture
+def shared_riccati_cache():
+    # a fresh in-memory cache shared by the models of the test, the original
+    # cache of the class is restored afterwards
+    original = TrolleSchwartzModel.riccati_cache
+    TrolleSchwartzModel.riccati_cache = RiccatiCache()
+    yield TrolleSchwartzModel.riccati_cache
+    TrolleSchwartzModel.riccati_cache = original
+
+
+def test_persistent_riccati_cache(
+    trolle_schwartz_params, tmp_path, shared_riccati_cache
+):
+    trolle_schwartz_params.ode_solution = OdeSolution.ANALYTICAL
+    u = np.linspace(0.0, 20.0, 33)
+    expected = TrolleSchwartzModel(trolle_schwartz_params).characteristic_function(
+        u, 1.0, 1.1
+    )
+
+    model = TrolleSchwartzModel(
+        trolle_schwartz_params, riccati_cache=PersistentRiccatiCache(tmp_path)
+    )
+    np.testing.assert_array_equal(model.characteristic_function(u, 1.0, 1.1), expected)
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+    assert TrolleSchwartzModel.riccati_cache is shared_riccati_cache
+
+    # a fresh cache on the same directory, e.g. after a restart, reads the
+    # table back without solving
+    model = TrolleSchwartzModel(
+        trolle_schwartz_params, riccati_cache=PersistentRiccatiCache(tmp_path)
+    )
+    odes = model.characteristic_function_odes
+    solve, calls = odes.analytical_solution, []
+    odes.analytical_solution = lambda *args: calls.append(args) or solve(*args)
+
+    model.params.forward.value = 120.0
+    result = model.characteristic_function(u, 1.0, 1.1)
+    assert not calls
+    np.testing.assert_almost_equal(
+        result, expected * np.exp(1j * u * np.log(120.0 / 110.0)), decimal=14
+    )
+
+
+def test_persistent_riccati_cache_eviction(tmp_path):
+    table_bytes = 2 * 64 * 16 + 128  # two complex rows and the .npy header
+    cache = PersistentRiccatiCache(tmp_path, max_bytes=3 * table_bytes)
+    u = np.linspace(0.0, 10.0, 64).astype(complex)
+
+    for i, tau in enumerate((0.1, 0.2, 0.3, 0.4)):
+        existing = set(tmp_path.glob("*.npy"))
+        cache.get_or_solve("structure", u, tau, None, lambda: (u * tau, u / tau))
+        cache.clear()
+        # one second apart, whatever the resolution of the file system
+        for path in set(tmp_path.glob("*.npy")) - existing:
+            os.utime(path, (i, i))
+    assert len(list(tmp_path.glob("*.npy"))) == 3
+
+    # the oldest table was evicted and is solved again
+    calls = []
+    cache.get_or_solve("structure", u, 0.1, None, lambda: calls.append(1) or (u, u))
+    assert calls
@@ -32,7 +32,19 @@ def test_engine_get_config():
     assert configs == {
         "method": "CARR_MADAN",
         "integral_truncation": 100,
+        "automatic_truncation": False,
+        "truncation_tolerance": 1e-10,
         "dampening_factor": 0.75,
+        "optimal_dampening": False,
+        "control_variate": False,
+        "fft_grid_size": 4096,
+        "fft_grid_spacing": 0.1,
+        "frft_grid_size": 512,
+        "frft_log_strike_spacing": None,
+        "quadrature": "ADAPTIVE",
+        "quadrature_nodes": 128,
+        "cos_terms": 256,
+        "cos_truncation_width": 12.0,
     }
 
 
@@ -86,3 +98,95 @@ def test_pricing():
     option = create_option("2024-03-01", 100, "CALL", underlying_expiry="2024-03-03")
     price = engine.price(valuation_time, option, model)
     assert_almost_equal(price, 1.7447853541595835, decimal=4)
+
+
+def test_price_many():
+    valuation_time = "2024-02-01"
+    options = [create_option("2024-03-01", strike, "PUT") for strike in (90.0, 110.0)]
+    model = Model("HESTON")
+
+    expected_prices = Engine("CLOSED_FORM").price_many(
+        valuation_time, options, Model("BLACK_SCHOLES")
+    )
+    assert_almost_equal(
+        expected_prices,
+        [
+            Engine("CLOSED_FORM").price(valuation_time, option, Model("BLACK_SCHOLES"))
+            for option in options
+        ],
+    )
+
+    prices = Engine("FOURIER").price_many(valuation_time, options, model)
+    fft_prices = Engine("FOURIER", method="CARR_MADAN_FFT").price_many(
+        valuation_time, options, model
+    )
+    assert_almost_equal(fft_prices, prices, decimal=4)
+
+
+def test_price_with_error_estimate():
+    valuation_time = "2024-02-01"
+    option = create_option("2024-03-01", 100.0, "CALL")
+    model = Model("HESTON")
+
+    engine = Engine("FOURIER", automatic_truncation=True)
+    price, error = engine.price_with_error_estimate(valuation_time, option, model)
+
+    # the default truncation of 100 is too short for a one month expiry
+    expected_price = Engine("FOURIER", integral_truncation=1000).price(
+        valuation_time, option, model
+    )
+    assert_almost_equal(price, expected_price)
+    assert 0 <= error < 1e-5
+
+
+def test_price_surface():
+    valuation_time = "2024-02-01"
+    expiries = ["2024-03-01", "2025-02-01"]
+    strikes = [90.0, 100.0, 110.0]
+    model = Model("HESTON")
+
+    engine = Engine("FOURIER", quadrature="GAUSS_LEGENDRE")
+    prices = engine.price_surface(
+        valuation_time, expiries, strikes, ["PUT", "CALL", "CALL"], model
+    )
+    expected_prices = [
+        [
+            engine.price(valuation_time, create_option(expiry, strike, kind), model)
+            for strike, kind in zip(strikes, ["PUT", "CALL", "CALL"])
+        ]
+        for expiry in expiries
+    ]
+
+    assert_almost_equal(prices, expected_prices)
+
+
+def test_price_with_greeks():
+    valuation_time = "2024-02-01"
+    option = create_option("2024-03-01", 100.0, "CALL")
+    model = Model("HESTON")
+
+    engine = Engine("FOURIER", method="COS")
+    greeks = engine.price_with_greeks(valuation_time, option, model)
+
+    assert set(greeks) == {"price", "delta", "gamma", "vega"}
+    assert_almost_equal(greeks["price"], engine.price(valuation_time, option, model))
+    assert 0 < greeks["delta"] < 1
+
+
+def test_model_update_config_reprices():
+    valuation_time = "2024-02-01"
+    option = create_option("2024-03-01", 100.0, "CALL")
+    engine = Engine("FOURIER", quadrature="GAUSS_LEGENDRE")
+
+    model = Model("HESTON")
+    engine.price(valuation_time, option, model)
+    model.update_config(volatility={"value": 0.3, "volatility": 0.5})
+
+    assert_almost_equal(
+        engine.price(valuation_time, option, model),
+        engine.price(
+            valuation_time,
+            option,
+            Model("HESTON", volatility={"value": 0.3, "volatility": 0.5}),
+        ),
+    )
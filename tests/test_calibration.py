@@ -0,0 +1,298 @@
+import datetime as dt
+
+import numpy as np
+from numpy.testing import assert_almost_equal
+import pytest
+
+from priceforge.api import Model, calibrate as calibrate_kind
+from priceforge.models.contracts import Forward, Option, OptionKind, Spot
+from priceforge.pricing.calibration import (
+    CalibrationParameters,
+    MarketQuote,
+    RecalibrationParameters,
+    Recalibrator,
+    calibrate,
+    parameter_values,
+    with_parameter_values,
+)
+from priceforge.pricing.engines.fourier import (
+    FourierEngine,
+    FourierParameters,
+    Quadrature,
+)
+from priceforge.pricing.models.heston import HestonModel, HestonParameters
+from priceforge.pricing.models.parameters import (
+    CorrelationParameters,
+    CostOfCarryParameters,
+    ForwardParameters,
+    RateParameters,
+    SpotParameters,
+    VolatilityParameters,
+)
+from priceforge.pricing.models.trolle_schwartz import (
+    TrolleSchwartzModel,
+    TrolleSchwartzParameters,
+)
+
+VALUATION_TIME = dt.datetime(2017, 4, 13)
+
+PARAMETER_BOUNDS = {
+    "volatility.value": (1e-3, 5.0),
+    "volatility.volatility": (1e-3, 10.0),
+    "correlation.spot_vol": (-0.999, 0.999),
+    "cost_of_carry.alpha": (1e-4, 5.0),
+}
+
+
+@pytest.fixture
+def trolle_schwartz_model():
+    return TrolleSchwartzModel(
+        TrolleSchwartzParameters(
+            spot=SpotParameters(value=100.0, volatility=1),
+            forward=ForwardParameters(value=110.0),
+            volatility=VolatilityParameters(
+                value=0.2**0.5,
+                mean_reversion_rate=1.5,
+                long_term_mean=0.2**0.5,
+                volatility=0.3,
+            ),
+            cost_of_carry=CostOfCarryParameters(alpha=0.1, gamma=0.8),
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(
+                spot_vol=-0.3, spot_cost_of_carry=-0.1, vol_cost_of_carry=0.2
+            ),
+            ode_solution="ANALYTICAL",
+        )
+    )
+
+
+@pytest.fixture
+def engine():
+    return FourierEngine(
+        FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE, quadrature_nodes=64)
+    )
+
+
+@pytest.fixture
+def market_quotes(trolle_schwartz_model, engine):
+    options = []
+    for months in range(1, 13):
+        expiry = VALUATION_TIME + dt.timedelta(days=30 * months)
+        underlying = Forward(
+            underlying=Spot(symbol="TEST"), expiry=expiry + dt.timedelta(days=60)
+        )
+        options += [
+            Option(
+                underlying=underlying,
+                strike=strike,
+                option_kind=OptionKind.CALL,
+                expiry=expiry,
+            )
+            for strike in (90.0, 110.0, 130.0)
+        ]
+    prices = engine.price_strip(trolle_schwartz_model, options, VALUATION_TIME)
+    return [
+        MarketQuote(option=option, price=price)
+        for option, price in zip(options, prices)
+    ]
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_calibrate_trolle_schwartz(
+    trolle_schwartz_model, engine, market_quotes, n_workers
+):
+    names = list(PARAMETER_BOUNDS)
+    initial_params = with_parameter_values(
+        trolle_schwartz_model.params, names, [0.6, 0.5, 0.0, 0.2]
+    )
+
+    result = calibrate(
+        TrolleSchwartzModel(initial_params),
+        market_quotes,
+        VALUATION_TIME,
+        engine,
+        CalibrationParameters(parameter_bounds=PARAMETER_BOUNDS, n_workers=n_workers),
+    )
+
+    assert result.success
+    assert_almost_equal(
+        parameter_values(result.params, names),
+        parameter_values(trolle_schwartz_model.params, names),
+        decimal=6,
+    )
+    assert len(result.iterations) > 1
+    assert result.iterations[0].n_evaluations == len(names) + 1
+    assert sum(iteration.n_evaluations for iteration in result.iterations) <= (
+        result.n_evaluations
+    )
+    assert result.iterations[-1].cost < result.iterations[0].cost
+
+
+def test_calibrate_warm_start(trolle_schwartz_model, engine, market_quotes):
+    result = calibrate(
+        trolle_schwartz_model,
+        market_quotes,
+        VALUATION_TIME,
+        engine,
+        CalibrationParameters(parameter_bounds=PARAMETER_BOUNDS),
+    )
+
+    # already at the optimum, one Jacobian and no step
+    assert len(result.iterations) == 1
+    assert result.cost < 1e-20
+
+
+def test_calibrate_api(trolle_schwartz_model, market_quotes):
+    warm_start = Model(
+        "TROLLE_SCHWARTZ", trolle_schwartz_model.params.model_dump(mode="json")
+    )
+    quotes = [(quote.option, quote.price) for quote in market_quotes]
+
+    model, result = calibrate_kind(
+        "TROLLE_SCHWARTZ",
+        quotes,
+        VALUATION_TIME,
+        warm_start=warm_start,
+        parameter_bounds={"volatility.volatility": (1e-3, 10.0)},
+    )
+
+    assert result.success
+    assert model.get_config()["volatility"]["volatility"] == pytest.approx(
+        0.3, rel=1e-4
+    )
+    assert np.isfinite(result.wall_time)
+
+
+@pytest.fixture
+def heston_model():
+    return HestonModel(
+        HestonParameters(
+            spot=SpotParameters(value=100.0),
+            volatility=VolatilityParameters(
+                value=0.2, mean_reversion_rate=2.0, long_term_mean=0.25, volatility=0.6
+            ),
+            rate=RateParameters(value=0.02),
+            correlation=CorrelationParameters(spot_vol=-0.6),
+        )
+    )
+
+
+@pytest.fixture
+def heston_surface_quotes(heston_model):
+    # 10 expiries x 30 strikes
+    options = [
+        Option(
+            underlying=Spot(symbol="TEST"),
+            strike=float(strike),
+            option_kind=OptionKind.CALL if strike >= 100 else OptionKind.PUT,
+            expiry=VALUATION_TIME + dt.timedelta(days=int(days)),
+        )
+        for days in np.linspace(30, 720, 10)
+        for strike in np.linspace(70, 130, 30)
+    ]
+    engine = FourierEngine(FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE))
+    prices = engine.price_many(heston_model, options, VALUATION_TIME)
+    return [
+        MarketQuote(option=option, price=price)
+        for option, price in zip(options, prices)
+    ]
+
+
+@pytest.mark.parametrize("analytic_jacobian", [True, False])
+def test_calibrate_heston_surface(
+    heston_model, heston_surface_quotes, analytic_jacobian
+):
+    names = list(heston_model.gradient_parameters)
+    initial_model = HestonModel(
+        with_parameter_values(heston_model.params, names, [0.16, 1.0, 0.16, 0.5, 0.0])
+    )
+
+    result = calibrate(
+        initial_model,
+        heston_surface_quotes,
+        VALUATION_TIME,
+        params=CalibrationParameters(analytic_jacobian=analytic_jacobian),
+    )
+
+    assert result.success
+    assert_almost_equal(
+        parameter_values(result.params, names),
+        parameter_values(heston_model.params, names),
+        decimal=6,
+    )
+    if analytic_jacobian:
+        # prices and Jacobian come from the same evaluation
+        assert result.iterations[0].n_evaluations == 1
+    else:
+        assert result.iterations[0].n_evaluations == len(names) + 1
+
+
+def reprice_quotes(quotes, model):
+    engine = FourierEngine(FourierParameters(quadrature=Quadrature.GAUSS_LEGENDRE))
+    options = [quote.option for quote in quotes]
+    prices = engine.price_many(model, options, VALUATION_TIME)
+    return [
+        MarketQuote(option=option, price=price)
+        for option, price in zip(options, prices)
+    ]
+
+
+def test_recalibrator(heston_model, heston_surface_quotes):
+    names = list(heston_model.gradient_parameters)
+    recalibrator = Recalibrator(
+        HestonModel(HestonParameters(rate=RateParameters(value=0.02))),
+        heston_surface_quotes,
+        VALUATION_TIME,
+    )
+    initial_evaluations = recalibrator.result.n_evaluations
+    moved_model = HestonModel(
+        with_parameter_values(heston_model.params, names, [0.205, 2.0, 0.25, 0.6, -0.6])
+    )
+    moved_quotes = reprice_quotes(heston_surface_quotes, moved_model)
+
+    result = recalibrator.update(moved_quotes[::10])
+
+    assert result.success and not result.restarted
+    # the first iteration reuses the kept prices and Jacobian
+    assert result.iterations[0].n_evaluations == 0
+    assert result.n_evaluations * 3 < initial_evaluations
+
+    result = recalibrator.update(moved_quotes[1::10] + moved_quotes[2::10])
+    assert not result.restarted
+    assert recalibrator.model.params == result.params
+
+
+def test_recalibrator_new_and_removed_quotes(heston_model, heston_surface_quotes):
+    recalibrator = Recalibrator(
+        heston_model, heston_surface_quotes[:250], VALUATION_TIME
+    )
+
+    result = recalibrator.update(
+        heston_surface_quotes[250:],
+        [quote.option for quote in heston_surface_quotes[:10]],
+    )
+
+    assert len(recalibrator.quotes) == 290
+    assert len(result.prices) == 290
+    # new quotes are priced once at the previous parameters, already optimal
+    assert result.iterations[0].n_evaluations == 0
+    assert result.n_evaluations <= 1
+    assert result.cost < 1e-20
+
+
+def test_recalibrator_restarts(heston_model, heston_surface_quotes):
+    recalibrator = Recalibrator(
+        heston_model,
+        heston_surface_quotes,
+        VALUATION_TIME,
+        params=RecalibrationParameters(restart_rmse=1e-3),
+    )
+    shifted = [
+        quote.model_copy(update={"price": quote.price + 0.1})
+        for quote in heston_surface_quotes
+    ]
+
+    # most quotes change
+    assert recalibrator.update(shifted).restarted
+    # the refined fit stays too far from the quotes
+    assert recalibrator.update(shifted[:20]).restarted